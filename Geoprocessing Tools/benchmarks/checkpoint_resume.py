@@ -0,0 +1,162 @@
+# coding: utf-8
+"""
+Source Name:   checkpoint_resume.py
+Description:   Checks that Exploratory Regression resumed from a checkpoint
+               writes the same report as an uninterrupted search.  The search
+               is stopped at every step-th checkpoint in turn and resumed,
+               for the engines and worker count given, with pruning.
+               Exits with status 1 when any resumed report differs.
+
+Usage:         python checkpoint_resume.py [--tools desktop|web]
+                                           [--engines BATCH GRAM ...]
+                                           [--workers N] [--step N]
+                                           [--path DIR]
+"""
+
+################ Imports ####################
+import sys as SYS
+import os as OS
+import argparse as ARG
+import tempfile as TEMP
+import collections as COLL
+import numpy as NUM
+
+############### Methods ###############
+
+class Field(object):
+    """Field of the in-memory data object."""
+
+    def __init__(self, data):
+        self.data = data
+
+    def returnDouble(self):
+        return self.data.copy()
+
+class Data(object):
+    """In-memory stand-in for the SSDataObject read by the tool.
+
+    INPUTS:
+    n (int): # of observations
+    k (int): # of candidate explanatory variables
+    seed (int): random seed
+    """
+
+    def __init__(self, n = 150, k = 14, seed = 3):
+        rng = NUM.random.RandomState(seed)
+        x = rng.randn(n, k)
+        x[:,3] = x[:,1] + 0.05 * rng.randn(n)
+        y = 2.0 * x[:,0] + x[:,1] - x[:,5] + 0.5 * rng.randn(n)
+        self.numObs = n
+        self.masterField = "ID"
+        self.xyCoords = rng.rand(n, 2)
+        self.gaTable = self.xyCoords
+        self.master2Order = dict((1000 + i, i) for i in range(n))
+        self.fields = COLL.OrderedDict()
+        self.fields["Y"] = Field(y)
+        self.names = []
+        for j in range(k):
+            name = "X%i" % j
+            self.fields[name] = Field(x[:,j])
+            self.names.append(name)
+
+class Stop(Exception):
+    pass
+
+def readReport(reportFile):
+    reportFile = open(reportFile)
+    report = reportFile.read()
+    reportFile.close()
+    return report
+
+def resumeReports(MS, engine, numWorkers, step, folder):
+    """Yields (stop, same) for the search stopped at every step-th
+    checkpoint in turn and resumed, where same is True when the resumed
+    report matches the uninterrupted one.
+
+    INPUTS:
+    MS (module): ModelSelectionOLS
+    engine (str): search engine
+    numWorkers (int): # of worker processes
+    step (int): # of checkpoints from one stop to the next
+    folder (str): folder for the reports and checkpoint
+    """
+
+    reportFile = OS.path.join(folder, "report.txt")
+    checkpointFile = OS.path.join(folder, "search.ckpt")
+    kwargs = dict(outputReportFile = reportFile, maxIndVars = 5,
+                  minR2 = .6, maxCoef = .05, engine = engine, batchSize = 50,
+                  numWorkers = numWorkers, prune = True)
+    data = Data()
+    MS.ExploratoryRegression(data, "Y", data.names, None, **kwargs)
+    expected = readReport(reportFile)
+
+    class Stopped(MS.ExploratoryRegression):
+        def advanceCursor(self, *args, **kwargs):
+            self.numCursors += 1
+            if self.numCursors == stop:
+                raise Stop()
+            return MS.ExploratoryRegression.advanceCursor(self, *args,
+                                                          **kwargs)
+
+    stop = 1
+    while True:
+        if OS.path.exists(checkpointFile):
+            OS.remove(checkpointFile)
+        Stopped.numCursors = 0
+        data = Data()
+        try:
+            Stopped(data, "Y", data.names, None,
+                    checkpointFile = checkpointFile, **kwargs)
+            return
+        except Stop:
+            pass
+        data = Data()
+        MS.ExploratoryRegression(data, "Y", data.names, None,
+                                 checkpointFile = checkpointFile,
+                                 resume = True, **kwargs)
+        yield stop, readReport(reportFile) == expected
+        stop += step
+
+def run():
+    parser = ARG.ArgumentParser(description = "Checks that Exploratory "
+                                "Regression resumed from a checkpoint "
+                                "writes the same report.")
+    parser.add_argument("--tools", default = "desktop",
+                        choices = ["desktop", "web"])
+    parser.add_argument("--engines", nargs = "+",
+                        default = ["BATCH"])
+    parser.add_argument("--workers", type = int, default = 1)
+    parser.add_argument("--step", type = int, default = 1,
+                        help = "check every N-th checkpoint; STANDARD "
+                        "writes one per model")
+    parser.add_argument("--path", action = "append", default = [],
+                        help = "folder of arcpy or other modules to import")
+    args = parser.parse_args()
+
+    here = OS.path.dirname(OS.path.abspath(__file__))
+    SYS.path[0:0] = args.path + [OS.path.join(OS.path.dirname(here),
+                                              args.tools)]
+    import ModelSelectionOLS as MS
+
+    #### Write a Checkpoint at Every Chunk ####
+    MS.checkpointInterval = 0.0
+
+    failures = 0
+    folder = TEMP.mkdtemp()
+    for engine in args.engines:
+        numStops = 0
+        for stop, same in resumeReports(MS, engine, args.workers,
+                                        args.step, folder):
+            numStops += 1
+            if not same:
+                failures += 1
+                SYS.stdout.write("%s resumed after checkpoint %i differs\n"
+                                 % (engine, stop))
+        SYS.stdout.write("%-10s %i workers, %i stops\n" %
+                         (engine, args.workers, numStops))
+
+    if failures:
+        SYS.exit(1)
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,118 @@
+# coding: utf-8
+"""
+Source Name:   import_latency.py
+Description:   Measures how long the regression tools take to import in a
+               fresh interpreter, as a web service spawning one per request
+               sees it, and lists the heavy modules each import loads.
+
+Usage:         python import_latency.py [--tools desktop|web] [--repeat N]
+                                        [--path DIR] [module ...]
+"""
+
+################ Imports ####################
+import sys as SYS
+import os as OS
+import json as JSON
+import time as TIME
+import argparse as ARG
+import subprocess as SUB
+
+################ Constants ####################
+#### Modules Timed When None Are Named ####
+defaultModules = ["OLS", "ScoreOLS", "ModelSelectionOLS",
+                  "MergeModelSelectionOLS", "RegressionUtilities",
+                  "RegressionMessages", "SparseWeights", "VectorStats"]
+
+#### Optional Modules That Should Only Load When Used ####
+heavyModules = ["matplotlib", "pylab", "SSReport", "multiprocessing",
+                "MoransI_Step", "WeightsUtilities", "ModelSelectionOLS"]
+
+#### Run in the Child: Time the Import, Then Report the Loaded Modules ####
+childScript = """
+import sys, time, json
+sys.path[0:0] = json.loads(sys.argv[2])
+start = time.time()
+try:
+    __import__(sys.argv[1])
+    error = None
+except BaseException as e:
+    error = "%s: %s" % (e.__class__.__name__, e)
+seconds = time.time() - start
+heavy = [ name for name in json.loads(sys.argv[3])
+          if name in sys.modules and name != sys.argv[1] ]
+sys.stdout.write(json.dumps({'seconds': seconds, 'error': error,
+                             'heavy': heavy}))
+"""
+
+############### Methods ###############
+
+def timeImport(moduleName, paths, repeat):
+    """Imports a module in repeat fresh interpreters and returns the
+    seconds of each import and of each whole process, the heavy modules
+    loaded and any import error.
+
+    INPUTS:
+    moduleName (str): name of the module
+    paths (list): directories put first on the child's sys.path
+    repeat (int): # of interpreters
+    """
+
+    times = []
+    processTimes = []
+    heavy = []
+    error = None
+    for i in range(repeat):
+        start = TIME.time()
+        output = SUB.check_output([SYS.executable, "-c", childScript,
+                                   moduleName, JSON.dumps(paths),
+                                   JSON.dumps(heavyModules)])
+        processTimes.append(TIME.time() - start)
+        result = JSON.loads(output.decode("utf-8"))
+        if result['error']:
+            error = result['error']
+            break
+        times.append(result['seconds'])
+        heavy = result['heavy']
+    return times, processTimes, heavy, error
+
+def run():
+    parser = ARG.ArgumentParser(description = "Measures how long the "
+                                "regression tools take to import in a fresh "
+                                "interpreter.")
+    parser.add_argument("modules", nargs = "*", default = defaultModules)
+    parser.add_argument("--tools", default = "desktop",
+                        choices = ["desktop", "web"])
+    parser.add_argument("--repeat", type = int, default = 5)
+    parser.add_argument("--path", action = "append", default = [],
+                        help = "extra directory for arcpy and the ESRI "
+                               "modules, may be repeated")
+    args = parser.parse_args()
+
+    #### Tool Directory First, Then the Extra Paths ####
+    here = OS.path.dirname(OS.path.abspath(__file__))
+    toolDir = OS.path.join(OS.path.dirname(here), args.tools)
+    paths = [toolDir] + [ OS.path.abspath(path) for path in args.path ]
+
+    #### Import Alone, and the Process a Request Would Pay For ####
+    header = "%-24s %9s %9s %9s  %s\n" % ("Module", "Import", "Median",
+                                         "Process", "Heavy Modules Loaded")
+    SYS.stdout.write(header)
+    SYS.stdout.write("-" * (len(header) - 1) + "\n")
+    for moduleName in args.modules:
+        times, processTimes, heavy, error = timeImport(moduleName, paths,
+                                                       args.repeat)
+        if error:
+            SYS.stdout.write("%-24s %s\n" % (moduleName, error))
+            continue
+        times.sort()
+        SYS.stdout.write("%-24s %9.1f %9.1f %9.1f  %s\n" %
+                         (moduleName, 1000.0 * times[0],
+                          1000.0 * times[len(times) // 2],
+                          1000.0 * min(processTimes),
+                          ", ".join(heavy) or "-"))
+    SYS.stdout.write("\nMilliseconds: minimum and median import, minimum "
+                     "process wall time\nover %i fresh interpreters.\n" %
+                     args.repeat)
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,127 @@
+# coding: utf-8
+"""
+Source Name:   nearest_neighbors.py
+Description:   Checks the k nearest neighbor searches of SparseWeights
+               against brute force on random, skewed, collinear, clustered,
+               duplicate and gridded points, and times them on larger sets.
+               Exits with status 1 when any search disagrees.
+
+Usage:         python nearest_neighbors.py [--tools desktop|web]
+                                           [--cases N] [--size N]
+"""
+
+################ Imports ####################
+import sys as SYS
+import os as OS
+import time as TIME
+import argparse as ARG
+import numpy as NUM
+
+################ Constants ####################
+#### Point Layouts Checked Against Brute Force ####
+layoutNames = ["random", "skewed", "collinear", "clustered", "duplicate",
+               "gridded", "identical", "horizontal"]
+
+############### Methods ###############
+
+def makePoints(layout, n, rng):
+    """Returns n x 2 points in one of the layouts.
+
+    INPUTS:
+    layout (str): one of layoutNames
+    n (int): # of points
+    rng (obj): NUM.random.RandomState
+    """
+
+    if layout == "random":
+        return rng.rand(n, 2)
+    if layout == "skewed":
+        return rng.rand(n, 2) * [1e6, 1e-3]
+    if layout == "collinear":
+        x = rng.rand(n)
+        return NUM.column_stack((x, 2.0 * x + 1.0))
+    if layout == "clustered":
+        numFar = max(n // 100, 1)
+        return NUM.vstack((rng.rand(n - numFar, 2) * 1e-6,
+                           rng.rand(numFar, 2) * 1e4))
+    if layout == "duplicate":
+        return NUM.round(rng.rand(n, 2) * 5.0)
+    if layout == "gridded":
+        inds = NUM.arange(n)
+        return NUM.column_stack((inds % 17, inds // 17)).astype(float)
+    if layout == "identical":
+        return NUM.zeros((n, 2)) + 3.0
+    return NUM.column_stack((rng.rand(n), NUM.zeros(n)))
+
+def bruteNeighbors(coords, k):
+    """Returns the k nearest neighbors of every point, nearest first with
+    ties broken by index, from all n x n distances."""
+
+    n = len(coords)
+    diff = coords[:,None,:] - coords[None,:,:]
+    dist2 = (diff * diff).sum(2)
+    NUM.fill_diagonal(dist2, NUM.inf)
+    inds = NUM.tile(NUM.arange(n), (n, 1))
+    return NUM.lexsort((inds, dist2))[:,0:k]
+
+def searches(SW):
+    """Returns the searches to check, by name: the full search, which
+    searches points sharing a location once, and each tree alone."""
+
+    found = [("nearest", SW.nearestNeighbors),
+             ("kdtree", lambda coords, k:
+                        SW.treeNeighbors(coords, k, SW.KDTree(coords)))]
+    try:
+        from scipy.spatial import cKDTree
+    except ImportError:
+        return found
+    tree = lambda coords, k: SW.treeNeighbors(coords, k, cKDTree(coords))
+    return found + [("ckdtree", tree)]
+
+def run():
+    parser = ARG.ArgumentParser(description = "Checks and times the k "
+                                "nearest neighbor searches of SparseWeights.")
+    parser.add_argument("--tools", default = "desktop",
+                        choices = ["desktop", "web"])
+    parser.add_argument("--cases", type = int, default = 200)
+    parser.add_argument("--size", type = int, default = 100000)
+    args = parser.parse_args()
+
+    here = OS.path.dirname(OS.path.abspath(__file__))
+    SYS.path.insert(0, OS.path.join(OS.path.dirname(here), args.tools))
+    import SparseWeights as SW
+    rng = NUM.random.RandomState(1)
+    named = searches(SW)
+
+    #### Exact Agreement With Brute Force ####
+    failures = 0
+    for case in range(args.cases):
+        layout = layoutNames[case % len(layoutNames)]
+        n = rng.randint(2, 400)
+        k = min(rng.randint(1, 12), n - 1)
+        coords = makePoints(layout, n, rng)
+        expected = bruteNeighbors(coords, k)
+        for name, search in named:
+            if not NUM.array_equal(search(coords, k), expected):
+                failures += 1
+                SYS.stdout.write("%s search differs: %s, n = %i, k = %i\n" %
+                                 (name, layout, n, k))
+    SYS.stdout.write("%i cases, %i failures\n\n" % (args.cases, failures))
+
+    #### Time on Larger Sets, 8 Neighbors ####
+    for layout in ["random", "skewed", "clustered", "duplicate"]:
+        coords = makePoints(layout, args.size, rng)
+        for name, search in named:
+            if layout == "duplicate" and name != "nearest":
+                continue
+            start = TIME.time()
+            search(coords, 8)
+            SYS.stdout.write("%-10s %-8s %9i points %8.2f s\n" %
+                             (layout, name, args.size,
+                              TIME.time() - start))
+
+    if failures:
+        SYS.exit(1)
+
+if __name__ == '__main__':
+    run()
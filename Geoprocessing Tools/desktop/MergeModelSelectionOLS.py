@@ -0,0 +1,36 @@
+# coding: utf-8
+"""
+Tool Name:     Merge Exploratory Regression Shards
+Source Name:   MergeModelSelectionOLS.py
+Description:   Rebuilds the Exploratory Regression report from the partial
+               results of a search split into shards across processes or
+               hosts.
+"""
+
+################ Imports ####################
+import os as OS
+import arcpy as ARCPY
+import ModelSelectionOLS as MSOLS
+
+################ Interfaces ##################
+
+def runShardMerge():
+    """Retrieves the parameters from the User Interface and executes the
+    appropriate commands."""
+
+    #### Get User Provided Inputs ####
+    ARCPY.env.overwriteOutput = True
+    shardFiles = [ shardFile.strip("'\"") for shardFile in
+                   ARCPY.GetParameterAsText(0).split(";") ]
+
+    #### Derived Output ####
+    outputReportFile = OS.path.join(ARCPY.env.scratchFolder,
+                                    "ModelSelectionOLS.txt")
+
+    MSOLS.ShardMerge(shardFiles, outputReportFile)
+
+    #### Send Derived Output back to the tool ####
+    ARCPY.SetParameterAsText(1, outputReportFile)
+
+if __name__ == '__main__':
+    runShardMerge()
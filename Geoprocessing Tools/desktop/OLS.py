@@ -10,19 +10,26 @@ Description:   Runs OLS and produces standard output.
 ################ Imports ####################
 import sys as SYS
 import os as OS
+import itertools as ITER
 import numpy as NUM
 import numpy.linalg as LA
 import numpy.random as RAND
 import arcpy as ARCPY
+import arcpy.management as DM
+import arcpy.da as DA
 import ErrorUtils as ERROR
 import SSUtilities as UTILS
 import SSDataObject as SSDO
 import Stats as STATS
+import VectorStats as VSTATS
+import RegressionUtilities as RU
+import SparseWeights as SW
+import RegressionMessages as MSG
 import locale as LOCALE
 LOCALE.setlocale(LOCALE.LC_ALL, '')
-import SSReport as REPORT
-import pylab as PYLAB
-import matplotlib.pyplot as PLT
+
+#### SSReport, pylab, matplotlib, multiprocessing, WeightsUtilities and ####
+#### ModelSelectionOLS Are Imported Where Used, Keeping Tool Start Fast ####
 
 ################ Output Field Names #################
 olsCoefFieldNames = ["Variable", "Coef", "StdError", "t_Stat", "Prob",
@@ -32,6 +39,52 @@ olsDiagFieldNames = ["Diag_Name", "Diag_Value", "Definition"]
 
 olsFCFieldNames = ["Estimated", "Residual", "StdResid"]
 
+olsResampleFieldNames = ["Resamp_Lo", "Resamp_Hi", "Resamp_Pr"]
+
+################ Saved Model Diagnostics #################
+olsModelDiagNames = ["N", "R2", "AdjR2", "AICc", "F_Stat", "F_Prob", "Wald",
+                     "Wald_Prob", "JB", "JB_Prob", "BP", "BP_Prob",
+                     "LOO_RMSE"]
+
+################ Resampling ####################
+#### PAIRS and WILD Bootstrap, PERMUTATION (Freedman-Lane) ####
+resampleMethods = ["PAIRS", "WILD", "PERMUTATION"]
+
+#### Two-Sided Percentile Interval ####
+resampleAlpha = 0.05
+
+#### Replicates x Observations (x Variables for PAIRS) per Batch ####
+resampleCells = 2 ** 22
+
+################ Geographically Weighted Regression ####################
+#### Bisquare Kernel Over ADAPTIVE (# of Neighbors) or FIXED Distance ####
+gwrKernels = ["ADAPTIVE", "FIXED"]
+
+#### Neighbor Lists Are Found Once, Up to This Many per Feature ####
+gwrMaxNeighbors = 500
+
+#### Features x Neighbors x Variables per Chunk of Local Fits ####
+gwrCells = 2 ** 22
+
+################ Spatial Regression ####################
+#### Maximum Likelihood Spatial ERROR and Spatial LAG Models ####
+spatialModels = ["ERROR", "LAG"]
+
+#### Log-Determinant From Dense Eigenvalues Up to This Many Features ####
+spatialEigenMax = 1000
+
+#### Monte Carlo Log-Determinant: Order of the Series, # of Probes ####
+logDetOrder = 50
+logDetProbes = 32
+
+################ Report Graphics ####################
+#### Above This Many Observations Scatter Plots Are Drawn as Densities ####
+graphicMaxPoints = 5000
+
+#### Hexagons Across a Density Plot, and the Sample of Points Over It ####
+graphicGridSize = 50
+graphicOverlayPoints = 1000
+
 ############### Methods ###############
 
 def writeVarColHeaders(grid, colLabs):
@@ -44,6 +97,155 @@ def writeVarColHeaders(grid, colLabs):
                         justify = justify)
     grid.stepRow()
 
+def plotPoints(xVals, yVals, **kwargs):
+    """Scatter plots every point, up to graphicMaxPoints.  Beyond that it
+    draws their density in hexagonal bins with a random sample of the
+    points over it, both rasterized, so the time to draw and the size of
+    the PDF do not grow with the # of observations.
+
+    INPUTS:
+    xVals (array): n horizontal values
+    yVals (array): n vertical values
+    **kwargs: for matplotlib scatter; an n-length c is sampled with them
+    """
+
+    import matplotlib.pyplot as PLT
+    n = len(xVals)
+    if n <= graphicMaxPoints:
+        return PLT.scatter(xVals, yVals, **kwargs)
+
+    #### Density, Then Sampled Points ####
+    PLT.hexbin(xVals, yVals, gridsize = graphicGridSize, bins = "log",
+               mincnt = 1, cmap = "Greys", linewidths = 0.0,
+               rasterized = True)
+    rng = RAND.RandomState(0)
+    sample = NUM.sort(rng.permutation(n)[0:graphicOverlayPoints])
+    colors = kwargs.get("c")
+    if colors is not None and len(colors) == n:
+        kwargs["c"] = colors[sample]
+
+    #### Smaller Markers So the Density Shows Through ####
+    kwargs["s"] = kwargs.get("s", 20.0) / 3.0
+    return PLT.scatter(xVals[sample], yVals[sample], rasterized = True,
+                       **kwargs)
+
+def plotFitLine(xVals, yVals, **kwargs):
+    """Plots the least squares line of y on x between the extremes of x,
+    two vertices whatever the # of observations.
+
+    INPUTS:
+    xVals (array): n horizontal values
+    yVals (array): n vertical values
+    **kwargs: for matplotlib plot
+    """
+
+    import matplotlib.pyplot as PLT
+    m = NUM.polyfit(xVals, yVals, 1)
+    xEnds = NUM.array([xVals.min(), xVals.max()])
+    return PLT.plot(xEnds, NUM.polyval(m, xEnds), **kwargs)
+
+def initResampleWorker(sharedX, shape, state):
+    """Sets up a worker process with a read-only view of the shared
+    design matrix."""
+    global resampler
+    x = NUM.frombuffer(sharedX, dtype = float).reshape(shape)
+    resampler = Resampler(x, state)
+
+def runResampleBatch(task):
+    """Runs a batch of replicates in a worker process."""
+    return resampler.runBatch(*task)
+
+def initGWRWorker(sharedX, shape, sharedNeighbors, neighborShape, state):
+    """Sets up a worker process with read-only views of the shared design
+    matrix and neighbor lists."""
+    global gwrWorker
+    x = NUM.frombuffer(sharedX, dtype = float).reshape(shape)
+    neighbors = NUM.frombuffer(sharedNeighbors,
+                               dtype = NUM.int32).reshape(neighborShape)
+    gwrWorker = GWRWorker(x, neighbors, state)
+
+def runGWRChunk(task):
+    """Fits a chunk of local regressions in a worker process."""
+    return gwrWorker.fit(*task)
+
+def goldenSection(func, lo, hi, integer = False, tol = 1.0e-3):
+    """Returns the minimizer of a unimodal function on [lo, hi] found by
+    golden section search.  Values are cached, so each point is only
+    evaluated once; integer searches finish by trying every integer
+    left in the bracket.
+
+    INPUTS:
+    func (function): function to minimize
+    lo (float): lower bound
+    hi (float): upper bound
+    integer {bool, False}: search the integers only?
+    tol {float, 1.0e-3}: width of the final bracket, relative to hi - lo
+
+    RETURN:
+    best (float): minimizer
+    values (dict): function value of each point evaluated
+    """
+
+    values = {}
+    def evaluate(point):
+        if integer:
+            point = int(round(point))
+        if point not in values:
+            values[point] = func(point)
+        return values[point]
+
+    ratio = (NUM.sqrt(5.0) - 1.0) / 2.0
+    a, b = lo, hi
+    if integer:
+        tolerance = 3
+    else:
+        tolerance = tol * (hi - lo)
+    c = b - ratio * (b - a)
+    d = a + ratio * (b - a)
+    while b - a > tolerance:
+        if evaluate(c) <= evaluate(d):
+            b = d
+        else:
+            a = c
+        c = b - ratio * (b - a)
+        d = a + ratio * (b - a)
+
+    #### Finish Inside the Final Bracket ####
+    if integer:
+        for point in range(int(NUM.ceil(a)), int(NUM.floor(b)) + 1):
+            evaluate(point)
+    else:
+        evaluate((a + b) / 2.0)
+    best = min(sorted(values), key = lambda point: values[point])
+    return best, values
+
+def buildSpatialWeights(ssdo, weightsFile = None):
+    """Returns the sparse weights of a spatial regression from an SWM or
+    text (GWT) weights file, or the 8 nearest neighbors, as read for the
+    Moran's I of Exploratory Regression.
+
+    INPUTS:
+    ssdo (obj): instance of SSDataObject
+    weightsFile {str, None}: SWM or GWT path, None for nearest neighbors
+    """
+
+    import ModelSelectionOLS as MSOLS
+    if not weightsFile:
+        #### If No Weightsfile Provided, Use 8 Nearest Neighbors ####
+        if ssdo.numObs <= 9:
+            nn = ssdo.numObs - 2
+            ARCPY.AddIDMessage("WARNING", 1500, 8, nn)
+        else:
+            nn = 8
+        return MSOLS.buildMoranWeights(ssdo, None, weightsType = "GA",
+                                       numNeighs = nn)
+
+    if weightsFile.split(".")[-1].lower() == "swm":
+        return MSOLS.buildMoranWeights(ssdo, weightsFile, "SWM")
+    import WeightsUtilities as WU
+    weightsDict = WU.buildTextWeightDict(weightsFile, ssdo.master2Order)
+    return MSOLS.buildMoranWeights(ssdo, weightsDict, "GWT")
+
 ################### GUI Interface ###################
 
 def setupOLS():
@@ -54,28 +256,114 @@ def setupOLS():
     inputFC = ARCPY.GetParameterAsText(0)
     masterField = ARCPY.GetParameterAsText(1)
     outputFC = OS.path.join(ARCPY.env.scratchGDB, "OutputFC")
-    depVarName = ARCPY.GetParameterAsText(3).upper()
+    depVarNames = ARCPY.GetParameterAsText(3).upper().split(";")
     indVarNames = ARCPY.GetParameterAsText(4).upper()
     indVarNames = indVarNames.split(";")
     isCheckedReport = ARCPY.GetParameter(5)
     reportFile = OS.path.join(ARCPY.env.scratchFolder, "OLSResults.pdf")
+    blockSize = UTILS.getNumericParameter(7)
+
+    #### Resampled Inference (PAIRS, WILD, PERMUTATION or None) ####
+    resampleMethod = UTILS.getTextParameter(8)
+    numReps = UTILS.getNumericParameter(9)
+    if numReps is None:
+        numReps = 999
+    numWorkers = UTILS.getNumericParameter(10)
+    if numWorkers is None:
+        numWorkers = 1
+    seed = UTILS.getNumericParameter(11)
+    if seed is None:
+        seed = 0
+    if resampleMethod is not None:
+        resampleMethod = resampleMethod.upper()
+        if resampleMethod not in resampleMethods:
+            MSG.addMessage("ERROR", "resampleMethods",
+                           ", ".join(resampleMethods))
+            raise SystemExit()
+
+    #### Geographically Weighted Regression (ADAPTIVE, FIXED or None) ####
+    gwrKernel = UTILS.getTextParameter(12)
+    bandwidth = UTILS.getNumericParameter(13)
+    if gwrKernel is not None:
+        gwrKernel = gwrKernel.upper()
+        if gwrKernel not in gwrKernels:
+            MSG.addMessage("ERROR", "gwrKernels", ", ".join(gwrKernels))
+            raise SystemExit()
+        if blockSize or len(depVarNames) > 1:
+            MSG.addMessage("ERROR", "gwrOneResponse")
+            raise SystemExit()
+
+    #### Spatial Regression (ERROR, LAG or None) ####
+    spatialModel = UTILS.getTextParameter(14)
+    weightsFile = UTILS.getTextParameter(15)
+    if spatialModel is not None:
+        spatialModel = spatialModel.upper()
+        if spatialModel not in spatialModels:
+            MSG.addMessage("ERROR", "spatialModels",
+                           ", ".join(spatialModels))
+            raise SystemExit()
+        if blockSize or len(depVarNames) > 1 or gwrKernel is not None:
+            MSG.addMessage("ERROR", "spatialOneResponse")
+            raise SystemExit()
+
+    #### Saved Model for Scoring New Data ####
+    modelFile = UTILS.getTextParameter(16)
+    if modelFile is not None:
+        if (len(depVarNames) > 1 or gwrKernel is not None or
+            spatialModel is not None):
+            MSG.addMessage("ERROR", "modelFileOLS")
+            raise SystemExit()
 
-    #### Create SSDataObject ####
-    fieldList = [depVarName] + indVarNames
-    ssdo = SSDO.SSDataObject(inputFC, templateFC = outputFC,
-                             useChordal = False)
+    if blockSize:
+        #### Stream Large Tables in Blocks of Rows ####
+        if len(depVarNames) > 1:
+            MSG.addMessage("ERROR", "streamOneResponse")
+            raise SystemExit()
+        if resampleMethod is not None:
+            MSG.addMessage("ERROR", "streamResample")
+            raise SystemExit()
+        ols = StreamingOLS(inputFC, depVarNames[0], indVarNames, outputFC,
+                           blockSize = int(blockSize))
+    else:
+        #### Create SSDataObject ####
+        fieldList = depVarNames + indVarNames
+        ssdo = SSDO.SSDataObject(inputFC, templateFC = outputFC,
+                                 useChordal = False)
+
+        #### Populate SSDO with Data ####
+        ssdo.obtainData(masterField, fieldList, minNumObs = 5)
+
+        #### Call OLS Class for Regression ####
+        if len(depVarNames) > 1:
+            ols = MultiResponseOLS(ssdo, depVarNames, indVarNames)
+        elif gwrKernel is not None:
+            ols = GWR(ssdo, depVarNames[0], indVarNames, kernel = gwrKernel,
+                      bandwidth = bandwidth, numWorkers = int(numWorkers))
+        elif spatialModel is not None:
+            weights = buildSpatialWeights(ssdo, weightsFile)
+            if spatialModel == "ERROR":
+                ols = SpatialError(ssdo, depVarNames[0], indVarNames,
+                                   weights)
+            else:
+                ols = SpatialLag(ssdo, depVarNames[0], indVarNames, weights)
+        else:
+            ols = OLS(ssdo, depVarNames[0], indVarNames)
 
-    #### Populate SSDO with Data ####
-    ssdo.obtainData(masterField, fieldList, minNumObs = 5)
+        #### Resample the Coefficients ####
+        if resampleMethod is not None:
+            ols.resample(resampleMethod, int(numReps),
+                         numWorkers = int(numWorkers), seed = int(seed))
 
-    #### Call OLS Class for Regression ####
-    ols = OLS(ssdo, depVarName, indVarNames)
+    #### Save the Model ####
+    if modelFile is not None:
+        ols.saveModel(modelFile)
 
     #### Print Results ####
     ols.report()
 
-    #### Spatial Autocorrelation Warning ####
-    ARCPY.AddIDMessage("WARNING", 851)
+    #### Spatial Autocorrelation Warning, Not for Spatial Models ####
+    if gwrKernel is None and spatialModel is None:
+        ARCPY.AddIDMessage("WARNING", 851)
 
     #### Derived Output Feature Class ####
     ols.outputResults(outputFC)
@@ -85,8 +373,17 @@ def setupOLS():
 
     #### Create Report File ####
     if isCheckedReport:
-        ols.createOutputGraphic(reportFile)
-        ARCPY.SetParameterAsText(6, reportFile)
+        if blockSize:
+            MSG.addMessage("WARNING", "streamReport")
+        elif len(depVarNames) > 1:
+            MSG.addMessage("WARNING", "multiResponseReport")
+        elif gwrKernel is not None:
+            MSG.addMessage("WARNING", "gwrReport")
+        elif spatialModel is not None:
+            MSG.addMessage("WARNING", "spatialReport")
+        else:
+            ols.createOutputGraphic(reportFile)
+            ARCPY.SetParameterAsText(6, reportFile)
 
 
 class OLS(object):
@@ -96,6 +393,7 @@ class OLS(object):
     ssdo (obj): instance of SSDataObject
     depVarName (str): name of dependent variable field
     indVarNames (list): name of independent variable field(s)
+    design {obj, None}: DesignMatrix shared with other dependent variables
 
     ATTRIBUTES:
     n (int): # of observations
@@ -134,21 +432,27 @@ class OLS(object):
     waldStat (float): Robust Wald test for overall sign. of regression
     waldProb (float): Probability for waldStat
     vifVal (str,array): Either an error message or result
+    resampleMethod (str): PAIRS, WILD, PERMUTATION or None
+    resampleLo (array): k lower percentile bounds of the coefficients
+    resampleHi (array): k upper percentile bounds of the coefficients
+    resamplePVals (array): k resampled pvalues (two sided test)
 
     METHODS:
     initialize
     calculate
+    resample
     createCoefficientReport
     createDiagnosticReport
     createInterpretReport
     report
     """
 
-    def __init__(self, ssdo, depVarName, indVarNames):
+    def __init__(self, ssdo, depVarName, indVarNames, design = None):
 
         #### Set Initial Attributes ####
         UTILS.assignClassAttr(self, locals())
         self.warnedTProb = False
+        self.resampleMethod = None
 
         #### Initialize Data ####
         self.initialize()
@@ -190,6 +494,7 @@ class OLS(object):
             raise SystemExit()
 
         #### Create Dependent Variable ####
+        self.inName = ssdo.inName
         self.allVars = [self.depVarName] + self.indVarNames
         self.y = ssdo.fields[self.depVarName].returnDouble()
         self.n = ssdo.numObs
@@ -202,6 +507,10 @@ class OLS(object):
             raise SystemExit()
 
         #### Create Design Matrix ####
+        if self.design is not None:
+            self.k = self.design.k
+            self.x = self.design.x
+            return
         self.k = len(self.indVarNames) + 1
         self.x = NUM.ones((self.n, self.k), dtype = float)
         for column, variable in enumerate(self.indVarNames):
@@ -229,22 +538,31 @@ class OLS(object):
         fdof = dof * 1.0
         xt = x.T
         yt = y.T
-        xx = NUM.dot(xt, x)
 
-        try:
-            xxi = LA.inv(xx)
-        except:
-            #### Perfect multicollinearity, cannot proceed ####
-            ARCPY.AddIDMessage("ERROR", 639)
-            raise SystemExit()
+        if self.design is None:
+            xSTD = x.std(0)
+            leverage = None
+            xx = NUM.dot(xt, x)
 
-        #### Compute Coefficients ####
-        xy = NUM.dot(xt, y)
-        coef = NUM.dot(xxi, xy)
+            try:
+                xxi = LA.inv(xx)
+            except:
+                #### Perfect multicollinearity, cannot proceed ####
+                ARCPY.AddIDMessage("ERROR", 639)
+                raise SystemExit()
+
+            #### Compute Coefficients ####
+            xy = NUM.dot(xt, y)
+            coef = NUM.dot(xxi, xy)
+        else:
+            #### Factorized Once, Solved With the Other Responses ####
+            xxi = self.design.xxi
+            coef = self.design.coef[self.depVarName]
+            xSTD = self.design.xSTD
+            leverage = self.design.leverage
 
         #### Compute Standardized Coefficients ####
         ySTD = y.std()
-        xSTD = x.std(0)
         stdRatio = xSTD / ySTD
         self.coefSTD = stdRatio * coef.flatten()
 
@@ -262,50 +580,12 @@ class OLS(object):
         r2Adj =  1.0 - ( (ess / (fdof)) / (tss / (fn-1)) )
         u2 = e * e
 
-        #### Variance-Covariance for Coefficients ####
-        varBeta = xxi * s2
-
-        #### Standard Errors / t-Statistics ####
-        seBeta = NUM.sqrt(varBeta.diagonal())
-        tStat = (coef.T / seBeta).flatten()
-
-        #### Bad Probabilities - Near Multicollinearity ####
-        badProbs = NUM.isnan(seBeta).sum() != 0
-
-        #### White's Robust Standard Errors ####
+        #### Coefficient Tests ####
+        self.dof = dof
+        self.coef = coef
         dofScale =  (int( n / (n - k) )) * 1.0
         sHat = NUM.dot((u2 * x).T, x) * dofScale
-        varBetaRob = NUM.dot(NUM.dot(xxi, sHat), xxi)
-        seBetaRob =  NUM.sqrt(varBetaRob.diagonal())
-        tStatRob = (coef.T / seBetaRob).flatten()
-
-        #### DOF Warning Once for t-Stats ####
-        silentVector = [ True for i in range(k) ]
-        if (2 <= dof <= 4) and not self.warnedTProb:
-            silentVector[0] = False
-            self.warnedTProb = True
-
-        #### Coefficient t-Tests ####
-        pVals = NUM.empty((k,), float)
-        pValsRob = NUM.empty((k,), float)
-        for varInd in UTILS.ssRange(k):
-            #### General ####
-            try:
-                p = STATS.tProb(tStat[varInd], dof, type = 2,
-                                silent = silentVector[varInd])
-            except:
-                p =  NUM.nan
-                badProbs = True
-            pVals[varInd] = p
-
-            #### Robust ####
-            try:
-                p = STATS.tProb(tStatRob[varInd], dof, type = 2,
-                                silent = True)
-            except:
-                p =  NUM.nan
-                badProbs = True
-            pValsRob[varInd] = p
+        self.testCoefficients(coef, xxi, s2, sHat)
 
         #### Jarque-Bera Test For Normality of the Residuals ####
         muE = (e.sum()) / fn
@@ -317,11 +597,6 @@ class OLS(object):
         skew = u3 / denomS
         kurt = u4 / denomK
         self.JB = (n/6.) * ( skew**2. + ( (kurt - 3.)**2. / 4. ))
-        if self.JB >= 0.0:
-            self.JBProb = STATS.chiProb(self.JB, 2, type = 1)
-        else:
-            self.JBProb = NUM.nan
-            badProbs = True
 
         #### Breusch-Pagan Test for Heteroskedasticity ####
         u2y = NUM.dot(xt, u2)
@@ -334,41 +609,142 @@ class OLS(object):
         tssU = NUM.dot(ssU.T, ssU)
         r2U = 1.0 - (essU/tssU)
         self.BP = (fn * r2U)[0][0]
-        if self.BP >= 0.0:
-            self.BPProb = STATS.chiProb(self.BP, (k-1), type = 1)
+
+        #### Joint Tests, Likelihood and Information Criteria ####
+        self.testModel(n, k, r2, s2mle)
+
+        #### Leave-One-Out Prediction Error From the Hat Diagonal ####
+        self.press, self.looRMSE = RU.leaveOneOut(x, xxi, e,
+                                                  leverage = leverage)
+
+        #### Calculate the Variance Inflation Factor ####
+        if k <= 2:
+            self.vifVal = ARCPY.GetIDMessage(84090)
+            self.vif = False
         else:
-            self.BPProb = NUM.nan
+            if self.design is None:
+                self.vifVal = RU.varianceInflation(x, xxi)
+            else:
+                self.vifVal = self.design.vifVal
+            if not NUM.all(NUM.isfinite(self.vifVal)):
+                #### Perfect multicollinearity, cannot proceed ####
+                ARCPY.AddIDMessage("ERROR", 639)
+                raise SystemExit()
+            self.vif = True
+
+        #### Set Attributes ####
+        self.xxi = xxi
+        self.yHat = yHat
+        self.yBar = yBar
+        self.residuals = e
+        self.seResiduals = seResiduals
+        self.stdRedisuals = e / self.seResiduals
+        self.ess = ess
+        self.tss = tss
+        self.r2 = r2
+        self.r2Adj = r2Adj
+        self.s2 = s2
+        self.s2mle = s2mle
+        self.varLabels = [ARCPY.GetIDMessage(84064)] + self.indVarNames
+
+    def testCoefficients(self, coef, xxi, s2, sHat):
+        """Sets the classic and White robust standard errors, t-statistics
+        and probabilities of the coefficients.
+
+        INPUTS:
+        coef (array): kx1 vector of beta coefficients
+        xxi (array): kxk inverse of X'X
+        s2 (float): OLS Estimate of the variance of residuals
+        sHat (array): kxk sum of u2 * x * x', scaled for dof
+        """
+
+        k = self.k
+        dof = self.dof
+
+        #### Variance-Covariance for Coefficients ####
+        varBeta = xxi * s2
+
+        #### Standard Errors / t-Statistics ####
+        seBeta = NUM.sqrt(varBeta.diagonal())
+        tStat = (coef.T / seBeta).flatten()
+
+        #### Bad Probabilities - Near Multicollinearity ####
+        badProbs = NUM.isnan(seBeta).sum() != 0
+
+        #### White's Robust Standard Errors ####
+        varBetaRob = NUM.dot(NUM.dot(xxi, sHat), xxi)
+        seBetaRob =  NUM.sqrt(varBetaRob.diagonal())
+        tStatRob = (coef.T / seBetaRob).flatten()
+
+        #### DOF Warning Once for t-Stats ####
+        if (2 <= dof <= 4) and not self.warnedTProb:
+            STATS.tProb(tStat[0], dof, type = 2, silent = False)
+            self.warnedTProb = True
+
+        #### Coefficient t-Tests, Classic and Robust in One Call ####
+        allProbs = VSTATS.tProb(NUM.concatenate([tStat, tStatRob]), dof,
+                                type = 2)
+        if NUM.isnan(allProbs).any():
             badProbs = True
 
+        #### Set Attributes ####
+        self.varCoef = varBeta
+        self.seCoef = seBeta
+        self.tStats = tStat
+        self.pVals = allProbs[0:k]
+        self.varCoefRob = varBetaRob
+        self.seCoefRob = seBetaRob
+        self.tStatsRob = tStatRob
+        self.pValsRob = allProbs[k:]
+        self.badProbs = badProbs
+
+    def testModel(self, n, k, r2, s2mle):
+        """Sets the joint F and Wald tests, the chi-square probabilities
+        of the Jarque-Bera and Breusch-Pagan statistics, and the
+        log-likelihood, AIC and AICc.  Runs after testCoefficients.
+
+        INPUTS:
+        n (int): # of observations
+        k (int): # of independent variables
+        r2 (float): R-Squared
+        s2mle (float): ML Estimate of the variance of residuals
+        """
+
+        fn = n * 1.0
+        badProbs = self.badProbs
+
         #### Classic Joint-Hypothesis F-Test ####
         q = k - 1
         fq = q * 1.0
         self.fStat = (r2/fq) / ((1 - r2) / (fn - k))
-        try:
-            self.fProb = abs(STATS.fProb(self.fStat, q,
-                                      (n-k), type = 1))
-        except:
-            self.fProb = NUM.nan
+        self.fProb = abs(float(VSTATS.fProb(self.fStat, q, (n-k), type = 1)))
+        if NUM.isnan(self.fProb):
             badProbs = True
 
         #### Wald Robust Joint Hypothesis Test ####
         R = NUM.zeros((q,k))
         R[0:,1:] = NUM.eye(q)
-        Rb = NUM.dot(R, coef)
+        Rb = NUM.dot(R, self.coef)
 
         try:
-            invRbR = LA.inv( NUM.dot(NUM.dot(R, varBetaRob), R.T) )
+            invRbR = LA.inv( NUM.dot(NUM.dot(R, self.varCoefRob), R.T) )
         except:
             #### Perfect multicollinearity, cannot proceed ####
             ARCPY.AddIDMessage("ERROR", 639)
             raise SystemExit()
 
         self.waldStat = ( NUM.dot(NUM.dot(Rb.T, invRbR), Rb) )[0][0]
-        if self.waldStat >= 0.0:
-            self.waldProb = STATS.chiProb(self.waldStat, q, type = 1)
-        else:
-            self.waldProb = NUM.nan
+
+        #### Chi-Square Tests in One Call, Undefined Below Zero ####
+        chiStats = NUM.array([self.JB, self.BP, self.waldStat])
+        valid = chiStats >= 0.0
+        chiProbs = VSTATS.chiProb(NUM.where(valid, chiStats, 0.0),
+                                  [2, k - 1, q], type = 1)
+        chiProbs[~valid] = NUM.nan
+        if not valid.all():
             badProbs = True
+        self.JBProb, self.BPProb, self.waldProb = [ float(p) for p in
+                                                    chiProbs ]
 
         #### Log-Likelihood ####
         self.logLik = -(n / 2.) * (1. + NUM.log(2. * NUM.pi)) - \
@@ -379,49 +755,139 @@ class OLS(object):
         self.aic = -2. * self.logLik + 2. * k1
         self.aicc = -2. * self.logLik + 2. * k1 * (fn / (fn - k1 - 1))
 
-        #### Calculate the Variance Inflation Factor ####
-        if k <= 2:
-            self.vifVal = ARCPY.GetIDMessage(84090)
-            self.vif = False
-        else:
-            xTemp = xt[1:]
-            corX = NUM.corrcoef(xTemp)
+        self.q = q
+        self.badProbs = badProbs
 
-            try:
-                ic = LA.inv(corX)
-            except:
-                #### Perfect multicollinearity, cannot proceed ####
-                ARCPY.AddIDMessage("ERROR", 639)
-                raise SystemExit()
+    def resample(self, method, numReps, numWorkers = 1, seed = 0):
+        """Adds resampled percentile intervals and probabilities of the
+        coefficients to the coefficient report.  Replicates are drawn in
+        batches, in parallel when numWorkers > 1.
 
-            self.vifVal = ic.diagonal()
-            self.vif = True
+        INPUTS:
+        method (str): PAIRS or WILD bootstrap, or PERMUTATION
+        numReps (int): # of replicates
+        numWorkers {int, 1}: # of processes drawing the batches
+        seed {int, 0}: seed of the random number generators
+        """
+
+        n, k = self.x.shape
+
+        #### Batch Size Bounds the Memory of a Batch ####
+        if method == "PAIRS":
+            cells = n * k
+        else:
+            cells = n
+        batchReps = max(1, min(numReps, resampleCells // cells))
+        tasks = [ (seed, batchIndex, min(batchReps, numReps - start))
+                  for batchIndex, start in
+                  enumerate(range(0, numReps, batchReps)) ]
+
+        #### Draw Replicates ####
+        state = self.resampleState(method)
+        if numWorkers > 1 and len(tasks) > 1:
+            import multiprocessing as MP
+            if SYS.platform == "win32":
+                #### Launch Python Rather Than the Host Application ####
+                MP.set_executable(OS.path.join(SYS.exec_prefix,
+                                               "pythonw.exe"))
+            sharedX = MP.RawArray('d', n * k)
+            NUM.frombuffer(sharedX, dtype = float).reshape((n, k))[:] = self.x
+            pool = MP.Pool(min(numWorkers, len(tasks)),
+                           initializer = initResampleWorker,
+                           initargs = (sharedX, (n, k), state))
+            try:
+                batches = pool.map(runResampleBatch, tasks)
+            finally:
+                pool.close()
+                pool.join()
+        else:
+            worker = Resampler(self.x, state)
+            batches = [ worker.runBatch(*task) for task in tasks ]
+        reps = NUM.concatenate(batches)
+
+        #### Singular Draws Are Dropped ####
+        reps = reps[NUM.isfinite(reps[:,1:]).all(1)]
+        numValid = len(reps)
+        if not numValid:
+            MSG.addMessage("ERROR", "resampleAllSingular")
+            raise SystemExit()
+        if numValid < numReps:
+            MSG.addMessage("WARNING", "resampleSingular",
+                           numReps - numValid, numReps)
+
+        if method == "PERMUTATION":
+            #### Share of |t| at Least as Large as Observed ####
+            lo = NUM.empty(k, dtype = float)
+            lo.fill(NUM.nan)
+            hi = lo.copy()
+            exceed = (NUM.abs(reps) >= NUM.abs(self.tStats)).sum(0)
+            pVals = (exceed + 1.0) / (numValid + 1.0)
+            pVals[0] = NUM.nan
+        else:
+            #### Percentile Interval, Two Sided Share Beyond Zero ####
+            tail = 50.0 * resampleAlpha
+            lo, hi = NUM.percentile(reps, [tail, 100.0 - tail], axis = 0)
+            beyond = NUM.minimum((reps <= 0.0).sum(0), (reps >= 0.0).sum(0))
+            pVals = NUM.minimum(2.0 * (beyond + 1.0) / (numValid + 1.0),
+                                1.0)
 
         #### Set Attributes ####
-        self.dof = dof
-        self.coef = coef
-        self.yHat = yHat
-        self.yBar = yBar
-        self.residuals = e
-        self.seResiduals = seResiduals
-        self.stdRedisuals = e / self.seResiduals
-        self.ess = ess
-        self.tss = tss
-        self.varCoef = varBeta
-        self.seCoef = seBeta
-        self.tStats = tStat
-        self.pVals = pVals
-        self.varCoefRob = varBetaRob
-        self.seCoefRob = seBetaRob
-        self.tStatsRob = tStatRob
-        self.pValsRob = pValsRob
-        self.r2 = r2
-        self.r2Adj = r2Adj
-        self.s2 = s2
-        self.s2mle = s2mle
-        self.q = q
-        self.badProbs = badProbs
-        self.varLabels = [ARCPY.GetIDMessage(84064)] + self.indVarNames
+        self.resampleMethod = method
+        self.numReps = numValid
+        self.resampleLo = lo
+        self.resampleHi = hi
+        self.resamplePVals = pVals
+
+        #### Update Coefficient Report ####
+        self.createCoefficientReport()
+
+    def saveModel(self, fileName):
+        """Saves the coefficients, variable order, covariance and
+        diagnostics of the model, so new data can be scored with
+        ScoreOLS without refitting.
+
+        INPUTS:
+        fileName (str): path to the model file (.npz)
+        """
+
+        diagValues = [self.n, self.r2, self.r2Adj, self.aicc, self.fStat,
+                      self.fProb, self.waldStat, self.waldProb, self.JB,
+                      self.JBProb, self.BP, self.BPProb, self.looRMSE]
+        diagnostics = dict(zip(olsModelDiagNames, diagValues))
+        model = RU.RegressionModel(self.depVarName, self.indVarNames,
+                                   self.coef, self.xxi, self.s2, self.dof,
+                                   self.varCoefRob,
+                                   diagnostics = diagnostics)
+        model.save(fileName)
+
+    def resampleState(self, method):
+        """Returns the attributes a Resampler needs besides the design
+        matrix.
+
+        INPUTS:
+        method (str): PAIRS or WILD bootstrap, or PERMUTATION
+        """
+
+        y = self.y.flatten()
+        state = {'method': method, 'xxi': self.xxi}
+        if method == "PAIRS":
+            state['y'] = y
+        elif method == "WILD":
+            state['coef'] = self.coef.flatten()
+            state['residuals'] = self.residuals.flatten()
+        else:
+            #### Fits Without Each Variable, Intercept Kept ####
+            reducedFit = [None]
+            reducedResiduals = [None]
+            for j in range(1, self.k):
+                xReduced = NUM.delete(self.x, j, 1)
+                coefReduced = LA.lstsq(xReduced, y)[0]
+                fit = NUM.dot(xReduced, coefReduced)
+                reducedFit.append(fit)
+                reducedResiduals.append(y - fit)
+            state['reducedFit'] = reducedFit
+            state['reducedResiduals'] = reducedResiduals
+        return state
 
     def createCoefficientReport(self):
         """Creates a formatted summary table of the OLS
@@ -443,7 +909,25 @@ class OLS(object):
                   probColLab, ARCPY.GetIDMessage(84097),
                   ARCPY.GetIDMessage(84101), robColLab]]
 
+        #### Resampled Columns Next to the Robust Columns ####
+        probCols = [4, 7]
+        clipCols = [0, 1, 2, 5]
+        resampled = self.resampleMethod is not None
+        bootstrap = resampled and self.resampleMethod != "PERMUTATION"
+        if bootstrap:
+            level = "%0.0f" % (100.0 * (1.0 - resampleAlpha))
+            clipCols += [8, 9]
+            total[0] += [MSG.getMessage("resampleLower", self.resampleMethod,
+                                        level),
+                         MSG.getMessage("resampleUpper", self.resampleMethod,
+                                        level)]
+        if resampled:
+            probCols.append(len(total[0]))
+            total[0].append(MSG.getMessage("resampleProb",
+                                           self.resampleMethod, bFoot))
+
         if self.vif:
+            clipCols.append(len(total[0]))
             total[0].append(vifColLab)
 
         #### Loop Through Explanatory Variables ####
@@ -463,6 +947,17 @@ class OLS(object):
             rowVals.append(UTILS.writePVal(self.pValsRob[row],
                                            padNonSig = True))
 
+            #### Resampled Values ####
+            if bootstrap:
+                rowVals.append(UTILS.formatValue(self.resampleLo[row]))
+                rowVals.append(UTILS.formatValue(self.resampleHi[row]))
+            if resampled:
+                if NUM.isnan(self.resamplePVals[row]):
+                    rowVals.append(ARCPY.GetIDMessage(84092))
+                else:
+                    rowVals.append(UTILS.writePVal(self.resamplePVals[row],
+                                                   padNonSig = True))
+
             #### VIF ####
             if self.vif:
                 if row == 0:
@@ -482,6 +977,8 @@ class OLS(object):
         self.coefTable = UTILS.outputTextTable(total, header = header,
                                                pad = 1, justify = "right")
         self.coefRaw = total
+        self.coefProbCols = probCols
+        self.coefClipCols = clipCols
 
     def createDiagnosticReport(self):
         """Creates a formatted summary table of the OLS
@@ -502,7 +999,7 @@ class OLS(object):
         dFoot = ARCPY.GetIDMessage(84104)
 
         row1 = [UTILS.addColon(ARCPY.GetIDMessage(84253)),
-                self.ssdo.inName,
+                self.inName,
                 '  ' + UTILS.addColon(ARCPY.GetIDMessage(84254)),
                 UTILS.padValue(self.depVarName, significant = signFlag)]
 
@@ -541,8 +1038,14 @@ class OLS(object):
                 '  '+ UTILS.addColon(chiMess.format(2)),
                 UTILS.writePVal(self.JBProb, padNonSig = True)]
 
+        row8 = [UTILS.addColon(MSG.getMessage("press")),
+                UTILS.formatValue(self.press),
+                '  ' + UTILS.addColon(MSG.getMessage("looRMSE")),
+                UTILS.padValue(UTILS.formatValue(self.looRMSE),
+                               significant = signFlag)]
+
         #### Finalize Diagnostic Table ####
-        diagTotal = [ row1, row2, row3, row4, row5, row6, row7 ]
+        diagTotal = [ row1, row2, row3, row4, row5, row6, row7, row8 ]
         diagJustify = ["left", "right", "left", "right"]
 
         self.diagTable = UTILS.outputTextTable(diagTotal,
@@ -601,17 +1104,25 @@ class OLS(object):
         inputTypes = ["TEXT", "DOUBLE", "DOUBLE",
                       "DOUBLE", "DOUBLE", "DOUBLE",
                       "DOUBLE", "DOUBLE", "DOUBLE"]
+        if self.resampleMethod is not None:
+            inputFields += UTILS.getFieldNames(olsResampleFieldNames,
+                                               outPath)
+            inputTypes += ["DOUBLE", "DOUBLE", "DOUBLE"]
 
         #### Set Up Input Data ####
         inputData = []
         coefList = list(self.coef.flatten())
         for rowInd, rowVal in enumerate(coefList):
-            inputData.append( (self.varLabels[rowInd], rowVal,
-                               self.seCoef[rowInd], self.tStats[rowInd],
-                               self.pVals[rowInd], self.seCoefRob[rowInd],
-                               self.tStatsRob[rowInd], self.pValsRob[rowInd],
-                               self.coefSTD[rowInd])
-                             )
+            rowData = (self.varLabels[rowInd], rowVal,
+                       self.seCoef[rowInd], self.tStats[rowInd],
+                       self.pVals[rowInd], self.seCoefRob[rowInd],
+                       self.tStatsRob[rowInd], self.pValsRob[rowInd],
+                       self.coefSTD[rowInd])
+            if self.resampleMethod is not None:
+                rowData += (self.resampleLo[rowInd],
+                            self.resampleHi[rowInd],
+                            self.resamplePVals[rowInd])
+            inputData.append(rowData)
 
         #### Write Coefficient Table ####
         UTILS.createOutputTable(tableName, inputFields,
@@ -644,9 +1155,14 @@ class OLS(object):
         diags = [ ARCPY.GetIDMessage(i) for i in diags ]
         desc = [ ARCPY.GetIDMessage(i) for i in desc ]
 
+        #### Leave-One-Out Prediction Error ####
+        diags += [MSG.getMessage("press"), MSG.getMessage("looRMSE")]
+        desc += [MSG.getMessage("pressDesc"), MSG.getMessage("looRMSEDesc")]
+
         stats = [self.aic, self.aicc, self.r2, self.r2Adj,
                  self.fStat, self.fProb, self.waldStat, self.waldProb,
-                 self.BP, self.BPProb, self.JB, self.JBProb, self.s2]
+                 self.BP, self.BPProb, self.JB, self.JBProb, self.s2,
+                 self.press, self.looRMSE]
 
         for rowInd, rowVal in enumerate(stats):
             inputData.append( (diags[rowInd], rowVal, desc[rowInd]) )
@@ -699,9 +1215,18 @@ class OLS(object):
                           fieldOrder = fieldOrder)
 
         #### Set Default Symbology ####
+        self.setSymbology(ssdo.shapeType)
+
+    def setSymbology(self, shapeType):
+        """Sets the standardized residual symbology of the output.
+
+        INPUTS:
+        shapeType (str): shape type of the output feature class
+        """
+
         params = ARCPY.gp.GetParameterInfo()
         try:
-            renderType = UTILS.renderType[ssdo.shapeType.upper()]
+            renderType = UTILS.renderType[shapeType.upper()]
             if renderType == 0:
                 renderLayerFile = "StdResidPoints.lyr"
             elif renderType == 1:
@@ -714,7 +1239,6 @@ class OLS(object):
         except:
             ARCPY.AddIDMessage("WARNING", 973)
 
-
     def createOutputGraphic(self, fileName):
         """Create OLS Output Report File.
 
@@ -722,6 +1246,11 @@ class OLS(object):
         fileName (str): path to output report file (*.pdf)
         """
 
+        #### Plotting and PDF Stack ####
+        import SSReport as REPORT
+        import pylab as PYLAB
+        import matplotlib.pyplot as PLT
+
         #### Set Progressor ####
         writeMSG = ARCPY.GetIDMessage(84186)
         ARCPY.SetProgressor("step", writeMSG, 0, 6, 1)
@@ -744,12 +1273,13 @@ class OLS(object):
         contStr = ARCPY.GetIDMessage(84377)
         varTitlePlus = title + " " + contStr
 
-        numCols = 9
-        report = REPORT.startNewReport(9, title = title, landscape = True,
-                                       titleFont = REPORT.ssTitleFont)
-        grid = report.grid
         colLabs = self.coefRaw[0]
         tabVals = self.coefRaw[1:]
+        numCols = len(colLabs)
+        report = REPORT.startNewReport(numCols, title = title,
+                                       landscape = True,
+                                       titleFont = REPORT.ssTitleFont)
+        grid = report.grid
 
         #### Create Column Labels ####
         writeVarColHeaders(grid, colLabs)
@@ -762,7 +1292,7 @@ class OLS(object):
                 report.write(pdfOutput)
 
                 #### New Page ####
-                report = REPORT.startNewReport(9, title = varTitlePlus,
+                report = REPORT.startNewReport(numCols, title = varTitlePlus,
                                                landscape = True,
                                                titleFont = REPORT.ssTitleFont)
                 grid = report.grid
@@ -774,7 +1304,7 @@ class OLS(object):
                 justify = "right"
                 gridCell = PLT.subplot2grid(grid.gridInfo,
                                             (grid.rowCount, ind))
-                if ind in [4, 7]:
+                if ind in self.coefProbCols:
                     if not val.count("*"):
                         x0 = .925
                 elif ind == 0:
@@ -784,7 +1314,7 @@ class OLS(object):
                     x0 = 1.0
 
                 #### Limit Col Value Length to 12 ####
-                if ind in [0, 1, 2, 5, 8]:
+                if ind in self.coefClipCols:
                     val = val[0:12]
 
                 PLT.text(x0, 0.5, val,
@@ -925,15 +1455,14 @@ class OLS(object):
                                fontproperties = REPORT.ssBoldFont)
             grid.stepRow()
 
+            yVals = self.y.flatten()
             for vInd, vName in enumerate(varNames):
                 xVals = values[:,vInd]
-                m = NUM.polyfit(xVals, self.y, 1)
-                yFit = NUM.polyval(m, xVals)
                 gridScat = PLT.subplot2grid(grid.gridInfo,
                                     (grid.rowCount, vInd))
-                PLT.scatter(xVals, self.y, s = 10, edgecolors = None,
-                            linewidths = 0.05)
-                PLT.plot(xVals, yFit, color='k', lw = 1, alpha = .7)
+                plotPoints(xVals, yVals, s = 10, edgecolors = None,
+                           linewidths = 0.05)
+                plotFitLine(xVals, yVals, color='k', lw = 1, alpha = .7)
                 gridScat.xaxis.set_visible(False)
                 gridScat.yaxis.set_ticks([])
                 if vInd == 0:
@@ -1052,17 +1581,12 @@ class OLS(object):
                                     rowspan = 20, colspan = numCols-2)
 
         #### Best Fit Line ####
-        sortedYHatInd = NUM.argsort(predicted)
-        sortedYHat = predicted[sortedYHatInd]
-        sortedSTDRes = stdRes[sortedYHatInd]
-        m = NUM.polyfit(sortedYHat, sortedSTDRes, 1)
-        yFit = NUM.polyval(m, sortedYHat)
-        PLT.plot(sortedYHat, yFit, color='k', lw = 2, alpha = .7)
-
-        #### Plot Values ####
+        plotFitLine(predicted, stdRes, color='k', lw = 2, alpha = .7)
+
+        #### Plot Values, a Density Beyond graphicMaxPoints ####
         binVals = NUM.digitize(stdRes, cutoffs)
         binColors = colors[binVals]
-        scat = PLT.scatter(predicted, stdRes, s = 30, c = binColors)
+        scat = plotPoints(predicted, stdRes, s = 30, c = binColors)
 
         #### Labels ####
         PYLAB.ylabel(ARCPY.GetIDMessage(84337),
@@ -1189,6 +1713,1391 @@ class OLS(object):
         ARCPY.AddMessage(fileName)
         pdfOutput.close()
 
+class Resampler(object):
+    """Draws batches of bootstrap or permutation replicates of an OLS fit.
+    A batch is seeded from the run seed and its own index, so results
+    do not depend on how batches are split among processes.
+
+    INPUTS:
+    x (array): nxk array of independent variable values
+    state (dict): from OLS.resampleState
+
+    METHODS:
+    runBatch
+    """
+
+    def __init__(self, x, state):
+        self.x = x
+        for name, value in state.items():
+            setattr(self, name, value)
+
+    def runBatch(self, seed, batchIndex, numReps):
+        """Returns a (numReps x k) array of replicate coefficients, or of
+        replicate t-statistics for PERMUTATION (intercept column NaN).
+
+        INPUTS:
+        seed (int): seed of the run
+        batchIndex (int): index of the batch in the run
+        numReps (int): # of replicates in the batch
+        """
+
+        rng = RAND.RandomState([seed, batchIndex])
+        if self.method == "PAIRS":
+            return self.pairs(rng, numReps)
+        elif self.method == "WILD":
+            return self.wild(rng, numReps)
+        else:
+            return self.permutation(rng, numReps)
+
+    def pairs(self, rng, numReps):
+        """Resamples observations with replacement.  A replicate is a
+        weighted fit, the weights being the counts of each row drawn."""
+
+        x = self.x
+        n, k = x.shape
+        weights = rng.multinomial(n, NUM.ones(n) / n, size = numReps)
+        xxW = NUM.tensordot(weights[:,:,None] * x, x, axes = ([1], [0]))
+        xyW = NUM.dot(weights, x * self.y[:,None])
+        try:
+            return LA.solve(xxW, xyW[:,:,None])[:,:,0]
+        except LA.LinAlgError:
+            #### A Singular Draw Only Voids Its Own Replicate ####
+            coefs = NUM.empty((numReps, k), dtype = float)
+            coefs.fill(NUM.nan)
+            for rep in range(numReps):
+                try:
+                    coefs[rep] = LA.solve(xxW[rep], xyW[rep])
+                except LA.LinAlgError:
+                    pass
+            return coefs
+
+    def wild(self, rng, numReps):
+        """Flips the sign of each residual at random (Rademacher).  The
+        design is fixed, so a replicate is coef + (X'X)^-1 X'(e * v)."""
+
+        n = len(self.residuals)
+        signs = rng.randint(0, 2, (numReps, n)) * 2.0 - 1.0
+        return self.coef + NUM.dot(NUM.dot(signs * self.residuals,
+                                           self.x), self.xxi)
+
+    def permutation(self, rng, numReps):
+        """Freedman-Lane: permutes the residuals of the model without
+        variable j, adds back its fitted values and refits the full model
+        for the t-statistic of variable j."""
+
+        x = self.x
+        n, k = x.shape
+        order = NUM.argsort(rng.random_sample((numReps, n)), axis = 1)
+        tStats = NUM.empty((numReps, k), dtype = float)
+        tStats[:,0] = NUM.nan
+        for j in range(1, k):
+            yStar = self.reducedFit[j] + self.reducedResiduals[j][order]
+            coefs = NUM.dot(NUM.dot(yStar, x), self.xxi)
+            eStar = yStar - NUM.dot(coefs, x.T)
+            s2 = (eStar * eStar).sum(1) / (n - k)
+            tStats[:,j] = coefs[:,j] / NUM.sqrt(s2 * self.xxi[j,j])
+        return tStats
+
+class DesignMatrix(object):
+    """Design matrix of a set of explanatory variables with the inverse of
+    X'X, computed once and shared by the OLS runs of several dependent
+    variables.  The coefficients of every response come from a single
+    product (X'X)^-1 X'Y.
+
+    INPUTS:
+    ssdo (obj): instance of SSDataObject
+    depVarNames (list): names of the dependent variable fields
+    indVarNames (list): name of independent variable field(s)
+
+    ATTRIBUTES:
+    k (int): # of independent variables, with the intercept
+    x (array): nxk array of independent variable values
+    xxi (array): kxk inverse of X'X
+    coef (dict): kx1 vector of beta coefficients per dependent variable
+    xSTD (array): k standard deviations of the columns of x
+    leverage (array): n diagonal elements of the hat matrix
+    vifVal {array, None}: VIF of each explanatory variable, None when
+        there is only one
+    """
+
+    def __init__(self, ssdo, depVarNames, indVarNames):
+
+        #### Create Design Matrix ####
+        n = ssdo.numObs
+        self.k = len(indVarNames) + 1
+        self.x = NUM.ones((n, self.k), dtype = float)
+        for column, variable in enumerate(indVarNames):
+            self.x[:,column + 1] = ssdo.fields[variable].data
+
+        try:
+            self.xxi = LA.inv(NUM.dot(self.x.T, self.x))
+        except:
+            #### Perfect multicollinearity, cannot proceed ####
+            ARCPY.AddIDMessage("ERROR", 639)
+            raise SystemExit()
+
+        #### All Right-Hand Sides in One Product ####
+        y = NUM.empty((n, len(depVarNames)), dtype = float)
+        for column, variable in enumerate(depVarNames):
+            y[:,column] = ssdo.fields[variable].returnDouble()
+        coef = NUM.dot(self.xxi, NUM.dot(self.x.T, y))
+        self.coef = {}
+        for column, variable in enumerate(depVarNames):
+            self.coef[variable] = coef[:,column:(column + 1)]
+
+        #### Diagnostics of X Alone, Shared by Every Response ####
+        self.xSTD = self.x.std(0)
+        self.leverage = RU.hatDiagonal(self.x, self.xxi)
+        if self.k <= 2:
+            self.vifVal = None
+        else:
+            self.vifVal = RU.varianceInflation(self.x, self.xxi)
+
+class MultiResponseOLS(object):
+    """Runs OLS on several dependent variables that share the same
+    explanatory variables.  The data are read and X'X is inverted once;
+    each dependent variable gets its own coefficient and diagnostic
+    tables, and one output feature class holds the predicted values and
+    residuals of all of them.
+
+    INPUTS:
+    ssdo (obj): instance of SSDataObject
+    depVarNames (list): names of the dependent variable fields
+    indVarNames (list): name of independent variable field(s)
+
+    ATTRIBUTES:
+    design (obj): instance of DesignMatrix
+    models (list): instance of OLS for each dependent variable
+    """
+
+    def __init__(self, ssdo, depVarNames, indVarNames):
+
+        #### Set Initial Attributes ####
+        UTILS.assignClassAttr(self, locals())
+
+        #### Responses Can Not Be Explanatory Variables ####
+        for depVarName in self.depVarNames:
+            if depVarName in self.indVarNames:
+                self.indVarNames.remove(depVarName)
+                ARCPY.AddIDMessage("WARNING", 850, depVarName)
+
+        #### MasterField Can Not Be Explanatory or Dependent ####
+        if ssdo.masterField in self.depVarNames:
+            ARCPY.AddIDMessage("ERROR", 945, ssdo.masterField,
+                               ARCPY.GetIDMessage(84112))
+            raise SystemExit()
+        if ssdo.masterField in self.indVarNames:
+            self.indVarNames.remove(ssdo.masterField)
+            ARCPY.AddIDMessage("WARNING", 736, ssdo.masterField)
+
+        #### Raise Error If No Independent Vars ####
+        if not len(self.indVarNames):
+            ARCPY.AddIDMessage("ERROR", 737)
+            raise SystemExit()
+
+        #### Factorize Once, Fit Each Response ####
+        self.design = DesignMatrix(ssdo, self.depVarNames, self.indVarNames)
+        self.models = [ OLS(ssdo, depVarName, self.indVarNames,
+                            design = self.design)
+                        for depVarName in self.depVarNames ]
+
+    def resample(self, method, numReps, numWorkers = 1, seed = 0):
+        """Resamples the coefficients of each dependent variable.  See
+        OLS.resample."""
+
+        for ols in self.models:
+            ols.resample(method, numReps, numWorkers = numWorkers,
+                         seed = seed)
+
+    def report(self, fileName = None):
+        """Reports the tables of each dependent variable in turn."""
+
+        if fileName:
+            f = UTILS.openFile(fileName, "w")
+            for ols in self.models:
+                UTILS.writeText(f, "{0}\n".format(ols.coefTable))
+                UTILS.writeText(f, "{0}\n".format(ols.diagTable))
+            UTILS.writeText(f, "{0}".format(self.models[0].interpretTable))
+            f.close()
+        else:
+            badProbs = False
+            for ols in self.models:
+                ARCPY.AddMessage(ols.coefTable)
+                ARCPY.AddMessage(ols.diagTable)
+                badProbs = badProbs or ols.badProbs
+            ARCPY.AddMessage(self.models[0].interpretTable)
+
+            #### Report if Bad Probabilities Found ####
+            if badProbs:
+                ARCPY.AddIDMessage("WARNING", 738)
+
+    def outputResults(self, outputFC):
+        """Creates one output feature class with the predicted values,
+        residuals and standardized residuals of every dependent
+        variable."""
+
+        #### Shorthand Attributes ####
+        ssdo = self.ssdo
+
+        #### Field Names Suffixed by the Dependent Variable ####
+        outPath, outName = OS.path.split(outputFC)
+        fieldNames = []
+        fieldData = []
+        for ols in self.models:
+            fieldNames += [ name + "_" + ols.depVarName
+                            for name in olsFCFieldNames ]
+            fieldData += [ols.yHat.flatten(), ols.residuals.flatten(),
+                          ols.stdRedisuals.flatten()]
+        fieldOrder = UTILS.getFieldNames(fieldNames, outPath)
+
+        #### Create/Populate Dictionary of Candidate Fields ####
+        candidateFields = {}
+        for fieldInd, fieldName in enumerate(fieldOrder):
+            candidateField = SSDO.CandidateField(fieldName, "DOUBLE",
+                                                 fieldData[fieldInd])
+            candidateFields[fieldName] = candidateField
+
+        #### Write Data to Output Feature Class ####
+        ssdo.output2NewFC(outputFC, candidateFields,
+                          appendFields = self.depVarNames + self.indVarNames,
+                          fieldOrder = fieldOrder)
+
+class GWRWorker(object):
+    """Fits the local regressions of Geographically Weighted Regression for
+    chunks of features.  Each feature's sample is itself and a prefix of
+    its nearest neighbor list, weighted by a bisquare kernel; the normal
+    equations of a chunk are stacked and solved together.
+
+    INPUTS:
+    x (array): nxk array of independent variable values
+    neighbors (array): n x m nearest neighbors of each feature
+    state (dict): from GWR.workerState
+
+    METHODS:
+    fit
+    """
+
+    def __init__(self, x, neighbors, state):
+        self.x = x
+        self.neighbors = neighbors
+        for name, value in state.items():
+            setattr(self, name, value)
+
+    def fit(self, start, stop, kernel, bandwidth, final = False):
+        """Fits the local regressions of features start to stop - 1.
+
+        INPUTS:
+        start (int): first feature
+        stop (int): feature after the last
+        kernel (str): ADAPTIVE (bandwidth is a # of neighbors) or FIXED
+        bandwidth (float): # of neighbors or distance
+        final {bool, False}: also return coefficients and variances?
+
+        RETURN:
+        result (dict): yHat and leverage (diagonal of the hat matrix) of
+                       each feature; coef, varCoef (diagonal of C W C',
+                       C = (X'WX)^-1 X'W) and localR2 when final
+        """
+
+        x = self.x
+        n, k = x.shape
+        features = NUM.arange(start, stop)
+
+        #### Sample: the Feature, Then Its Neighbors ####
+        if kernel == "ADAPTIVE":
+            numCols = int(bandwidth)
+        else:
+            numCols = self.neighbors.shape[1] + 1
+        sample = NUM.empty((len(features), numCols), dtype = int)
+        sample[:,0] = features
+        sample[:,1:] = self.neighbors[start:stop,0:(numCols - 1)]
+        diff = self.coords[sample] - self.coords[features][:,None,:]
+        dist = NUM.sqrt((diff * diff).sum(2))
+
+        #### Bisquare Kernel ####
+        if kernel == "ADAPTIVE":
+            #### Distance to the Next Nearest Neighbor ####
+            nextNeighbor = self.neighbors[start:stop,numCols - 1]
+            diff = self.coords[nextNeighbor] - self.coords[features]
+            band = NUM.sqrt((diff * diff).sum(1))[:,None]
+        else:
+            band = NUM.ones((len(features), 1)) * bandwidth
+            inside = (dist < band).sum(1).max()
+            sample = sample[:,0:inside]
+            dist = dist[:,0:inside]
+        ratio = NUM.where(band > 0.0, dist / NUM.where(band > 0.0, band,
+                                                       1.0), 0.0)
+        weights = NUM.where(ratio < 1.0, (1.0 - ratio * ratio)**2, 0.0)
+
+        #### Stacked Weighted Normal Equations ####
+        xLocal = x[sample]
+        yLocal = self.y[sample]
+        wx = weights[:,:,None] * xLocal
+        xwx = NUM.einsum('pmk,pmj->pkj', wx, xLocal)
+        xwy = NUM.einsum('pmk,pm->pk', wx, yLocal)
+        try:
+            xwxi = LA.inv(xwx)
+        except LA.LinAlgError:
+            #### A Singular Local Fit Only Voids Its Own Feature ####
+            xwxi = NUM.empty(xwx.shape, dtype = float)
+            xwxi.fill(NUM.nan)
+            for ind in range(len(features)):
+                try:
+                    xwxi[ind] = LA.inv(xwx[ind])
+                except LA.LinAlgError:
+                    pass
+        coef = NUM.einsum('pkj,pj->pk', xwxi, xwy)
+        xi = x[features]
+        result = {'yHat': (xi * coef).sum(1),
+                  'leverage': NUM.einsum('pk,pkj,pj->p', xi, xwxi, xi)}
+        if not final:
+            return result
+
+        #### Variance of the Local Coefficients, Up to sigma2 ####
+        xw2x = NUM.einsum('pmk,pmj->pkj', wx * weights[:,:,None], xLocal)
+        varCoef = NUM.einsum('pkj,pjl,plk->pk', xwxi, xw2x, xwxi)
+
+        #### Local R2 ####
+        eLocal = yLocal - NUM.einsum('pmk,pk->pm', xLocal, coef)
+        sumW = weights.sum(1)
+        yBarW = (weights * yLocal).sum(1) / sumW
+        dev = yLocal - yBarW[:,None]
+        essW = (weights * eLocal * eLocal).sum(1)
+        tssW = (weights * dev * dev).sum(1)
+        result['coef'] = coef
+        result['varCoef'] = varCoef
+        result['localR2'] = 1.0 - essW / tssW
+        return result
+
+class GWR(OLS):
+    """Geographically Weighted Regression.  The global OLS model is fit
+    first, then a weighted regression at every feature over its nearest
+    neighbors with a bisquare kernel.  Neighbor lists are found once and
+    shared by every bandwidth; unless given, the bandwidth minimizes the
+    AICc by golden section search.
+
+    INPUTS:
+    ssdo (obj): instance of SSDataObject
+    depVarName (str): name of dependent variable field
+    indVarNames (list): name of independent variable field(s)
+    kernel {str, ADAPTIVE}: ADAPTIVE (# of neighbors) or FIXED (distance)
+    bandwidth {float, None}: # of neighbors or distance, None to search
+    numWorkers {int, 1}: # of processes fitting the local regressions
+
+    ATTRIBUTES:
+    As OLS for the global model, and:
+    gwrCoef (array): nxk local coefficients
+    gwrSE (array): nxk standard errors of the local coefficients
+    localR2 (array): n local R-Squared values
+    gwrYHat (array): n predicted values
+    gwrResiduals (array): n residuals
+    traceS (float): effective # of parameters, the trace of the hat matrix
+    gwrAICc (float): AICc of the local model, over the fitted features
+    neighborLimit (int): # of neighbors the bandwidth was limited to, None
+                         when the limit did not apply
+    """
+
+    def __init__(self, ssdo, depVarName, indVarNames, kernel = "ADAPTIVE",
+                 bandwidth = None, numWorkers = 1):
+
+        #### Global Model ####
+        OLS.__init__(self, ssdo, depVarName, indVarNames)
+
+        #### Set Initial Attributes ####
+        self.kernel = kernel
+        self.bandwidth = bandwidth
+        self.numWorkers = numWorkers
+
+        #### Local Models ####
+        self.calculateGWR()
+        self.createGWRReport()
+
+    def calculateGWR(self):
+        """Finds the neighbor lists and the bandwidth, then fits the local
+        regressions."""
+
+        n = self.n
+        k = self.k
+        coords = self.ssdo.xyCoords[:,0:2]
+
+        #### Nearest Neighbors Once, Shared by Every Bandwidth ####
+        maxNeighs = min(n - 1, gwrMaxNeighbors)
+        if maxNeighs < k + 1:
+            MSG.addMessage("ERROR", "gwrTooFew", k + 1)
+            raise SystemExit()
+        neighbors = SW.nearestNeighbors(coords, maxNeighs)
+        self.neighbors = neighbors.astype(NUM.int32)
+        self.coords = coords
+
+        #### Bandwidth Range ####
+        if self.kernel == "ADAPTIVE":
+            lo, hi = k + 2, maxNeighs
+        else:
+            lo = self.neighborDistance(k).max()
+            hi = max(self.neighborDistance(maxNeighs - 1).min(), lo)
+
+        #### Is the Range Cut Short by the Neighbor Limit? ####
+        if self.bandwidth is None:
+            limited = maxNeighs < n - 1
+        else:
+            limited = self.bandwidth > hi and maxNeighs < n - 1
+        self.neighborLimit = None
+        if limited:
+            self.neighborLimit = maxNeighs
+            MSG.addMessage("WARNING", "gwrNeighborLimit", maxNeighs)
+
+        self.startGWR()
+        try:
+            if self.bandwidth is None:
+                #### Golden Section Search on AICc ####
+                best, values = goldenSection(self.evaluateAICc, lo, hi,
+                                             integer = (self.kernel ==
+                                                        "ADAPTIVE"))
+                self.bandwidth = best
+                self.numCandidates = len(values)
+            else:
+                if self.kernel == "ADAPTIVE":
+                    self.bandwidth = int(min(max(self.bandwidth, lo), hi))
+                self.numCandidates = 0
+            result = self.fitLocal(self.bandwidth, final = True)
+        finally:
+            self.stopGWR()
+
+        #### Fit Statistics ####
+        y = self.y.flatten()
+        e, fitted, ess, traceS, aicc = self.fitStatistics(result)
+        if not fitted.all():
+            MSG.addMessage("WARNING", "gwrSingular", n - fitted.sum())
+        fn = fitted.sum() * 1.0
+        sigma2 = ess / (fn - traceS)
+        tss = ((y[fitted] - y[fitted].mean())**2.0).sum()
+
+        #### Set Attributes ####
+        self.gwrYHat = result['yHat']
+        self.gwrResiduals = e
+        self.gwrStdResid = e / NUM.sqrt(sigma2)
+        self.gwrCoef = result['coef']
+        self.gwrSE = NUM.sqrt(sigma2 * result['varCoef'])
+        self.localR2 = result['localR2']
+        self.traceS = traceS
+        self.gwrSigma = NUM.sqrt(sigma2)
+        self.gwrAICc = aicc
+        self.gwrR2 = 1.0 - ess / tss
+        self.gwrR2Adj = 1.0 - (ess / (fn - traceS)) / (tss / (fn - 1.0))
+
+    def neighborDistance(self, column):
+        """Returns the distance from each feature to a column of its
+        neighbor list."""
+
+        diff = self.coords[self.neighbors[:,column]] - self.coords
+        return NUM.sqrt((diff * diff).sum(1))
+
+    def aiccGWR(self, ess, traceS, fn):
+        """Returns the AICc of a local model (Hurvich, Simonoff and Tsai).
+
+        INPUTS:
+        ess (float): Error Sum of Squares
+        traceS (float): trace of the hat matrix
+        fn (float): # of observations
+        """
+
+        return (fn * NUM.log(ess / fn) + fn * NUM.log(2.0 * NUM.pi) +
+                fn * (fn + traceS) / (fn - 2.0 - traceS))
+
+    def fitStatistics(self, result):
+        """Returns the residuals, the mask of fitted features, and the
+        ESS, trace of the hat matrix and AICc over the fitted features.
+
+        INPUTS:
+        result (dict): local fit from fitLocal
+        """
+
+        e = self.y.flatten() - result['yHat']
+        fitted = NUM.isfinite(e)
+        ess = (e[fitted]**2.0).sum()
+        traceS = result['leverage'][fitted].sum()
+        aicc = self.aiccGWR(ess, traceS, fitted.sum() * 1.0)
+        return e, fitted, ess, traceS, aicc
+
+    def evaluateAICc(self, bandwidth):
+        """Returns the AICc of the local model at a bandwidth, infinite
+        when a local regression is singular, so every bandwidth compared
+        is scored on the same features."""
+
+        e, fitted, ess, traceS, aicc = self.fitStatistics(
+                                                    self.fitLocal(bandwidth))
+        if not fitted.all():
+            return NUM.inf
+        return aicc
+
+    def workerState(self):
+        """Returns the attributes a GWRWorker needs besides the design
+        matrix and neighbor lists."""
+
+        return {'y': self.y.flatten(), 'coords': self.coords}
+
+    def startGWR(self):
+        """Starts the worker processes, which read the design matrix and
+        neighbor lists from shared memory, or a local worker."""
+
+        self.pool = None
+        state = self.workerState()
+        if self.numWorkers <= 1:
+            self.worker = GWRWorker(self.x, self.neighbors, state)
+            return
+
+        import multiprocessing as MP
+        if SYS.platform == "win32":
+            #### Launch Python Rather Than the Host Application ####
+            MP.set_executable(OS.path.join(SYS.exec_prefix, "pythonw.exe"))
+
+        n, k = self.x.shape
+        sharedX = MP.RawArray('d', n * k)
+        NUM.frombuffer(sharedX, dtype = float).reshape((n, k))[:] = self.x
+        shape = self.neighbors.shape
+        sharedNeighbors = MP.RawArray('i', shape[0] * shape[1])
+        NUM.frombuffer(sharedNeighbors,
+                       dtype = NUM.int32).reshape(shape)[:] = self.neighbors
+        self.pool = MP.Pool(self.numWorkers, initializer = initGWRWorker,
+                            initargs = (sharedX, (n, k), sharedNeighbors,
+                                        shape, state))
+
+    def stopGWR(self):
+        """Stops the worker processes."""
+
+        if self.pool is not None:
+            self.pool.close()
+            self.pool.join()
+            self.pool = None
+
+    def fitLocal(self, bandwidth, final = False):
+        """Fits the local regressions of every feature in chunks.
+
+        INPUTS:
+        bandwidth (float): # of neighbors or distance
+        final {bool, False}: also return coefficients and variances?
+        """
+
+        #### Chunk Size Bounds the Memory of a Chunk ####
+        if self.kernel == "ADAPTIVE":
+            numCols = int(bandwidth)
+        else:
+            numCols = self.neighbors.shape[1] + 1
+        chunkSize = max(1, gwrCells // (numCols * self.k))
+        tasks = [ (start, min(start + chunkSize, self.n), self.kernel,
+                   bandwidth, final)
+                  for start in range(0, self.n, chunkSize) ]
+
+        if self.pool is not None:
+            chunks = self.pool.map(runGWRChunk, tasks)
+        else:
+            chunks = [ self.worker.fit(*task) for task in tasks ]
+        return dict([ (name, NUM.concatenate([ chunk[name]
+                                               for chunk in chunks ]))
+                      for name in chunks[0] ])
+
+    def createGWRReport(self):
+        """Creates a formatted summary table of the local model."""
+
+        if self.kernel == "ADAPTIVE":
+            kernelLab = MSG.getMessage("gwrAdaptive")
+            bandLab = MSG.getMessage("gwrBandNeighbors")
+            bandVal = str(self.bandwidth)
+        else:
+            kernelLab = MSG.getMessage("gwrFixed")
+            bandLab = MSG.getMessage("gwrBandDistance")
+            bandVal = UTILS.formatValue(self.bandwidth)
+        rows = [[MSG.getMessage("gwrKernel"),
+                 MSG.getMessage("gwrBisquare", kernelLab)],
+                [bandLab, bandVal],
+                [MSG.getMessage("gwrBandsEvaluated"), str(self.numCandidates)],
+                [MSG.getMessage("gwrEffectiveParams"),
+                 UTILS.formatValue(self.traceS)],
+                [MSG.getMessage("gwrSigma"), UTILS.formatValue(self.gwrSigma)],
+                [ARCPY.GetIDMessage(84249), UTILS.formatValue(self.gwrAICc)],
+                [ARCPY.GetIDMessage(84018), UTILS.formatValue(self.gwrR2)],
+                [ARCPY.GetIDMessage(84021),
+                 UTILS.formatValue(self.gwrR2Adj)]]
+        if self.neighborLimit is not None:
+            #### Bandwidth Cut Short by the Neighbor Limit ####
+            rows.insert(2, [MSG.getMessage("gwrNeighborLimitLab"),
+                            str(self.neighborLimit)])
+        rows = [ [UTILS.addColon(label), value] for label, value in rows ]
+        self.gwrTable = UTILS.outputTextTable(rows,
+                            header = MSG.getMessage("gwrHeader"),
+                            pad = 1, justify = ["left", "right"])
+
+    def report(self, fileName = None):
+        """Generate Text Output for the global and local models."""
+
+        OLS.report(self, fileName = fileName)
+        if fileName:
+            f = UTILS.openFile(fileName, "a")
+            UTILS.writeText(f, "\n{0}".format(self.gwrTable))
+            f.close()
+        else:
+            ARCPY.AddMessage(self.gwrTable)
+
+    def outputResults(self, outputFC):
+        """Creates output feature class with the local predicted values,
+        residuals, coefficients and their standard errors."""
+
+        #### Shorthand Attributes ####
+        ssdo = self.ssdo
+
+        #### Local Fit, Then Coefficient and Standard Error Pairs ####
+        outPath, outName = OS.path.split(outputFC)
+        fieldNames = olsFCFieldNames + ["LocalR2"]
+        fieldData = [self.gwrYHat, self.gwrResiduals, self.gwrStdResid,
+                     self.localR2]
+        varNames = ["Intercept"] + self.indVarNames
+        for ind, varName in enumerate(varNames):
+            fieldNames += ["C_" + varName, "SE_" + varName]
+            fieldData += [self.gwrCoef[:,ind], self.gwrSE[:,ind]]
+        fieldOrder = UTILS.getFieldNames(fieldNames, outPath)
+
+        #### Create/Populate Dictionary of Candidate Fields ####
+        candidateFields = {}
+        for fieldInd, fieldName in enumerate(fieldOrder):
+            candidateField = SSDO.CandidateField(fieldName, "DOUBLE",
+                                                 fieldData[fieldInd])
+            candidateFields[fieldName] = candidateField
+
+        #### Write Data to Output Feature Class ####
+        ssdo.output2NewFC(outputFC, candidateFields,
+                          appendFields = self.allVars,
+                          fieldOrder = fieldOrder)
+
+        #### Set Default Symbology ####
+        self.setSymbology(ssdo.shapeType)
+
+class LogDeterminant(object):
+    """The log-determinant ln|I - rho W| of the spatial likelihoods.  Up
+    to spatialEigenMax features it is exact from the eigenvalues of W.
+    Beyond that it is the series -sum(rho^j tr(W^j) / j), with tr(W)
+    and tr(W^2) exact and the higher traces estimated from random probes
+    (Barry and Pace 1999), so only sparse products with W are needed.
+
+    INPUTS:
+    weights (obj): instance of SparseWeights
+    seed {int, 0}: seed of the random probes
+
+    ATTRIBUTES:
+    method (str): Eigenvalues or Monte Carlo
+    lo (float): lower bound of rho
+    hi (float): upper bound of rho
+    eigenvalues (array): n eigenvalues of W (Eigenvalues)
+    traces (array): tr(W^j), j = 1 .. logDetOrder (Monte Carlo)
+    """
+
+    def __init__(self, weights, seed = 0):
+
+        #### Set Initial Attributes ####
+        self.weights = weights
+        if weights.n <= spatialEigenMax:
+            self.calculateEigenvalues()
+        else:
+            self.calculateTraces(seed)
+
+    def calculateEigenvalues(self):
+        """Sets the eigenvalues of W and the bounds of rho from the
+        smallest and largest (real parts)."""
+
+        w = self.weights
+        n = w.n
+        dense = NUM.bincount(w.rows * n + w.indices, weights = w.weights,
+                             minlength = n * n).reshape(n, n)
+        eigenvalues = LA.eigvals(dense)
+        real = eigenvalues.real
+
+        self.method = "Eigenvalues"
+        self.eigenvalues = eigenvalues
+        self.hi = 1.0 / real.max()
+        if real.min() < 0.0:
+            self.lo = 1.0 / real.min()
+        else:
+            self.lo = -self.hi
+
+    def calculateTraces(self, seed):
+        """Sets the traces of the powers of W and the bounds of rho from
+        the spectral radius, found by power iteration."""
+
+        w = self.weights
+        n = w.n
+        traces = NUM.zeros(logDetOrder, dtype = float)
+
+        #### Exact tr(W) and tr(W^2), the Sum of w_ij * w_ji ####
+        traces[0] = w.weights[w.rows == w.indices].sum()
+        keys = w.rows * n + w.indices
+        if len(keys):
+            order = NUM.argsort(keys)
+            sortedKeys = keys[order]
+            transKeys = w.indices * n + w.rows
+            pos = NUM.minimum(NUM.searchsorted(sortedKeys, transKeys),
+                              len(keys) - 1)
+            match = sortedKeys[pos] == transKeys
+            traces[1] = (w.weights[match] *
+                         w.weights[order[pos[match]]]).sum()
+
+        #### Higher Traces From Probes u, as the Mean of u'(W^j)u ####
+        #### One Probe at a Time, the Fastest Sparse Product ####
+        rng = RAND.RandomState(seed)
+        probes = NUM.where(rng.rand(logDetProbes, n) < 0.5, -1.0, 1.0)
+        for probe in probes:
+            powered = probe
+            for j in range(1, logDetOrder + 1):
+                powered = NUM.bincount(w.rows,
+                                       weights = w.weights *
+                                                 powered[w.indices],
+                                       minlength = n)
+                if j >= 3:
+                    traces[j - 1] += NUM.dot(probe, powered)
+        traces[2:] /= logDetProbes
+
+        #### Spectral Radius ####
+        vector = NUM.ones((n, 1), dtype = float) / NUM.sqrt(n)
+        radius = 0.0
+        for i in range(100):
+            lagged = w.lag(vector)
+            norm = NUM.sqrt((lagged * lagged).sum())
+            if norm == 0.0:
+                break
+            converged = abs(norm - radius) <= 1.0e-8 * norm
+            radius = norm
+            vector = lagged / norm
+            if converged:
+                break
+        if radius == 0.0:
+            radius = 1.0
+
+        self.method = "Monte Carlo"
+        self.traces = traces
+        self.powers = NUM.arange(1, logDetOrder + 1)
+        self.hi = 1.0 / radius
+        self.lo = -self.hi
+
+    def value(self, rho):
+        """Returns ln|I - rho W|.
+
+        INPUTS:
+        rho (float): spatial parameter
+        """
+
+        if self.method == "Eigenvalues":
+            return NUM.log(NUM.abs(1.0 - rho * self.eigenvalues)).sum()
+        return -(rho**self.powers * self.traces / self.powers).sum()
+
+    def curvature(self, rho):
+        """Returns the second derivative of ln|I - rho W| in rho.
+
+        INPUTS:
+        rho (float): spatial parameter
+        """
+
+        if self.method == "Eigenvalues":
+            ratio = self.eigenvalues / (1.0 - rho * self.eigenvalues)
+            return -(ratio * ratio).real.sum()
+        powers = self.powers[1:]
+        return -((powers - 1) * rho**(powers - 2) * self.traces[1:]).sum()
+
+class SpatialRegression(OLS):
+    """Maximum likelihood spatial regression on sparse weights.  The
+    global OLS model is fit first, then the spatial parameter maximizes
+    the likelihood concentrated on it by golden section search, with the
+    log-determinant from LogDeterminant.  SpatialError and SpatialLag
+    give the model.
+
+    INPUTS:
+    ssdo (obj): instance of SSDataObject
+    depVarName (str): name of dependent variable field
+    indVarNames (list): name of independent variable field(s)
+    weights (obj): instance of SparseWeights
+
+    ATTRIBUTES:
+    As OLS for the global model, and:
+    logDet (obj): instance of LogDeterminant
+    rho (float): spatial parameter (lambda in the error model)
+    spatialCoef (array): k coefficients
+    spatialSE (array): k+1 standard errors, the last for rho
+    spatialZ (array): k+1 z-statistics
+    spatialP (array): k+1 pvalues for spatialZ (two sided test)
+    sigma2 (float): ML estimate of the variance of the innovations
+    spatialLogLik (float): log-likelihood
+    spatialAIC (float): AIC
+    lrStat (float): likelihood ratio test of rho = 0 (against OLS)
+    lrProb (float): probability for lrStat
+    spatialYHat (array): n predicted values, y less the innovations
+    spatialResiduals (array): n innovations
+    spatialStdResid (array): n standardized innovations
+    moranI (float): Moran's I of the innovations
+    moranZ (float): z-score for moranI
+    moranProb (float): probability for moranZ
+    """
+
+    modelName = MSG.getMessage("spatialRegression")
+    paramName = MSG.getMessage("rho")
+
+    def __init__(self, ssdo, depVarName, indVarNames, weights):
+
+        #### Global Model ####
+        OLS.__init__(self, ssdo, depVarName, indVarNames)
+
+        #### Set Initial Attributes ####
+        self.weights = weights
+
+        #### Spatial Model ####
+        self.calculateSpatial()
+        self.createSpatialReport()
+
+    def calculateSpatial(self):
+        """Finds the spatial parameter, then the coefficients, their
+        standard errors and the fit of the spatial model."""
+
+        n = self.n
+        fn = n * 1.0
+        y = self.y.flatten()
+
+        #### Log-Determinant and Spatial Lags ####
+        self.logDet = LogDeterminant(self.weights)
+        self.prepare()
+
+        #### Golden Section Search on the Concentrated Likelihood ####
+        negLogLik = lambda rho: -self.concentrated(rho)
+        rho, values = goldenSection(negLogLik, self.logDet.lo,
+                                    self.logDet.hi, tol = 1.0e-6)
+        coef, e = self.fitAt(rho)
+        sigma2 = (e * e).sum() / fn
+        varCoef = self.variance(rho, coef, e, sigma2)
+
+        #### Asymptotic z-Tests of the Coefficients and rho ####
+        estimates = NUM.append(coef, rho)
+        se = NUM.sqrt(NUM.diag(varCoef))
+        z = estimates / se
+        self.spatialP = VSTATS.zProb(z, type = 2)
+
+        #### Likelihood Ratio Test Against OLS ####
+        logLik = -values[rho]
+        lrStat = max(2.0 * (logLik - self.logLik), 0.0)
+        self.lrProb = float(VSTATS.chiProb(lrStat, 1, type = 1))
+
+        #### Moran's I of the Innovations ####
+        gi, ei, varI, zScore, pVal = self.weights.moransI(e)
+
+        #### Set Attributes ####
+        self.rho = rho
+        self.numCandidates = len(values)
+        self.spatialCoef = coef
+        self.spatialSE = se
+        self.spatialZ = z
+        self.sigma2 = sigma2
+        self.spatialLogLik = logLik
+        self.spatialAIC = -2.0 * logLik + 2.0 * (self.k + 2)
+        self.lrStat = lrStat
+        self.spatialYHat = y - e
+        self.spatialResiduals = e
+        self.spatialStdResid = e / NUM.sqrt(sigma2)
+        self.moranI = gi[0]
+        self.moranZ = zScore[0]
+        self.moranProb = pVal[0]
+
+    def concentrated(self, rho):
+        """Returns the log-likelihood concentrated on rho.
+
+        INPUTS:
+        rho (float): spatial parameter
+        """
+
+        fn = self.n * 1.0
+        coef, e = self.fitAt(rho)
+        return (-(fn / 2.0) * (1.0 + NUM.log(2.0 * NUM.pi)) -
+                (fn / 2.0) * NUM.log((e * e).sum() / fn) +
+                self.logDet.value(rho))
+
+    def createSpatialReport(self):
+        """Creates formatted summary tables of the spatial model."""
+
+        #### Coefficients and the Spatial Parameter ####
+        total = [[ARCPY.GetIDMessage(84068), ARCPY.GetIDMessage(84049),
+                  ARCPY.GetIDMessage(84051), MSG.getMessage("zStatistic"),
+                  ARCPY.GetIDMessage(84055)]]
+        labels = self.varLabels + [self.paramName]
+        estimates = NUM.append(self.spatialCoef, self.rho)
+        for row, label in enumerate(labels):
+            total.append([label, UTILS.formatValue(estimates[row]),
+                          UTILS.formatValue(self.spatialSE[row]),
+                          UTILS.formatValue(self.spatialZ[row]),
+                          UTILS.writePVal(self.spatialP[row],
+                                          padNonSig = True)])
+        header = MSG.getMessage("spatialHeader", self.modelName)
+        self.spatialCoefTable = UTILS.outputTextTable(total, header = header,
+                                                      pad = 1,
+                                                      justify = "right")
+
+        #### Diagnostics ####
+        logDet = self.logDet
+        if logDet.method == "Eigenvalues":
+            methodLab = MSG.getMessage("logDetEigen")
+        else:
+            methodLab = MSG.getMessage("logDetMonteCarlo")
+        rangeVal = MSG.getMessage("valueRange", UTILS.formatValue(logDet.lo),
+                                  UTILS.formatValue(logDet.hi))
+        rows = [[MSG.getMessage("logDet"), methodLab],
+                [MSG.getMessage("paramRange", self.paramName), rangeVal],
+                [MSG.getMessage("likelihoodEvals"), str(self.numCandidates)],
+                [MSG.getMessage("sigmaSquared"),
+                 UTILS.formatValue(self.sigma2)],
+                [MSG.getMessage("logLikelihood"),
+                 UTILS.formatValue(self.spatialLogLik)],
+                [ARCPY.GetIDMessage(84114),
+                 UTILS.formatValue(self.spatialAIC)],
+                [MSG.getMessage("olsAIC"), UTILS.formatValue(self.aic)],
+                [MSG.getMessage("lrTest"), UTILS.formatValue(self.lrStat)],
+                [MSG.getMessage("lrProb"), UTILS.writePVal(self.lrProb)],
+                [MSG.getMessage("residMoran"),
+                 UTILS.formatValue(self.moranI)],
+                [MSG.getMessage("residMoranZ"),
+                 UTILS.formatValue(self.moranZ)],
+                [MSG.getMessage("residMoranProb"),
+                 UTILS.writePVal(self.moranProb)]]
+        rows = [ [UTILS.addColon(label), value] for label, value in rows ]
+        diagHeader = MSG.getMessage("spatialDiagHeader", self.modelName)
+        self.spatialDiagTable = UTILS.outputTextTable(rows,
+                                    header = diagHeader,
+                                    pad = 1, justify = ["left", "right"])
+
+    def report(self, fileName = None):
+        """Generate Text Output for the global and spatial models."""
+
+        OLS.report(self, fileName = fileName)
+        tables = [self.spatialCoefTable, self.spatialDiagTable]
+        if fileName:
+            f = UTILS.openFile(fileName, "a")
+            for table in tables:
+                UTILS.writeText(f, "\n{0}".format(table))
+            f.close()
+        else:
+            for table in tables:
+                ARCPY.AddMessage(table)
+
+    def outputResults(self, outputFC):
+        """Creates output feature class with the predicted values and
+        innovations of the spatial model."""
+
+        #### Shorthand Attributes ####
+        ssdo = self.ssdo
+
+        #### Prepare Derived Variables for Output Feature Class ####
+        outPath, outName = OS.path.split(outputFC)
+        fieldOrder = UTILS.getFieldNames(olsFCFieldNames, outPath)
+        fieldData = [self.spatialYHat, self.spatialResiduals,
+                     self.spatialStdResid]
+
+        #### Create/Populate Dictionary of Candidate Fields ####
+        candidateFields = {}
+        for fieldInd, fieldName in enumerate(fieldOrder):
+            candidateField = SSDO.CandidateField(fieldName, "DOUBLE",
+                                                 fieldData[fieldInd])
+            candidateFields[fieldName] = candidateField
+
+        #### Write Data to Output Feature Class ####
+        ssdo.output2NewFC(outputFC, candidateFields,
+                          appendFields = self.allVars,
+                          fieldOrder = fieldOrder)
+
+        #### Set Default Symbology ####
+        self.setSymbology(ssdo.shapeType)
+
+class SpatialError(SpatialRegression):
+    """Spatial error model, y = X b + u with u = lambda W u + e.  The
+    coefficients at each lambda are the OLS fit of the spatially
+    filtered y - lambda W y on X - lambda W X.
+
+    INPUTS:
+    As SpatialRegression
+    """
+
+    modelName = MSG.getMessage("spatialError")
+    paramName = MSG.getMessage("lambda")
+
+    def prepare(self):
+        """Sets the spatial lags of y and X."""
+
+        self.wy = self.weights.lag(self.y).flatten()
+        self.wx = self.weights.lag(self.x)
+
+    def fitAt(self, rho):
+        """Returns the coefficients and innovations at lambda.
+
+        INPUTS:
+        rho (float): spatial parameter
+        """
+
+        yStar = self.y.flatten() - rho * self.wy
+        xStar = self.x - rho * self.wx
+        coef = LA.solve(NUM.dot(xStar.T, xStar), NUM.dot(xStar.T, yStar))
+        return coef, yStar - NUM.dot(xStar, coef)
+
+    def variance(self, rho, coef, e, sigma2):
+        """Returns the variance of the coefficients and lambda, which are
+        asymptotically independent.  That of lambda is from the curvature
+        of the concentrated likelihood.
+
+        INPUTS:
+        rho (float): spatial parameter
+        coef (array): k coefficients
+        e (array): n innovations
+        sigma2 (float): ML estimate of the variance of the innovations
+        """
+
+        k = self.k
+        xStar = self.x - rho * self.wx
+        varCoef = NUM.zeros((k + 1, k + 1), dtype = float)
+        varCoef[0:k,0:k] = sigma2 * LA.inv(NUM.dot(xStar.T, xStar))
+
+        #### Central Difference, Kept Inside the Bounds ####
+        step = 1.0e-4 * (self.logDet.hi - self.logDet.lo)
+        step = min(step, 0.5 * (self.logDet.hi - rho),
+                   0.5 * (rho - self.logDet.lo))
+        curve = (self.concentrated(rho + step) -
+                 2.0 * self.concentrated(rho) +
+                 self.concentrated(rho - step)) / (step * step)
+        varCoef[k,k] = -1.0 / curve
+        return varCoef
+
+class SpatialLag(SpatialRegression):
+    """Spatial lag model, y = rho W y + X b + e.  The coefficients at each
+    rho are b0 - rho bL, from the OLS fits of y and W y on X.
+
+    INPUTS:
+    As SpatialRegression
+    """
+
+    modelName = MSG.getMessage("spatialLag")
+    paramName = MSG.getMessage("rho")
+
+    def prepare(self):
+        """Sets the spatial lag of y and its OLS fit on X."""
+
+        self.wy = self.weights.lag(self.y).flatten()
+        self.lagCoef = NUM.dot(self.xxi, NUM.dot(self.x.T, self.wy))
+        self.lagResiduals = self.wy - NUM.dot(self.x, self.lagCoef)
+
+    def fitAt(self, rho):
+        """Returns the coefficients and innovations at rho.
+
+        INPUTS:
+        rho (float): spatial parameter
+        """
+
+        coef = self.coef.flatten() - rho * self.lagCoef
+        e = self.residuals.flatten() - rho * self.lagResiduals
+        return coef, e
+
+    def variance(self, rho, coef, e, sigma2):
+        """Returns the variance of the coefficients and rho from the
+        analytic Hessian of the log-likelihood in (b, rho, sigma2).
+
+        INPUTS:
+        rho (float): spatial parameter
+        coef (array): k coefficients
+        e (array): n innovations
+        sigma2 (float): ML estimate of the variance of the innovations
+        """
+
+        k = self.k
+        x = self.x
+        wy = self.wy
+        s4 = sigma2 * sigma2
+        hessian = NUM.empty((k + 2, k + 2), dtype = float)
+        hessian[0:k,0:k] = -NUM.dot(x.T, x) / sigma2
+        hessian[0:k,k] = -NUM.dot(x.T, wy) / sigma2
+        hessian[0:k,k+1] = -NUM.dot(x.T, e) / s4
+        hessian[k,k] = (self.logDet.curvature(rho) -
+                        NUM.dot(wy, wy) / sigma2)
+        hessian[k,k+1] = -NUM.dot(wy, e) / s4
+        hessian[k+1,k+1] = -(self.n * 1.0) / (2.0 * s4)
+        hessian[k:,0:k] = hessian[0:k,k:].T
+        hessian[k+1,k] = hessian[k,k+1]
+        return LA.inv(-hessian)[0:k+1,0:k+1]
+
+class StreamingOLS(OLS):
+    """Computes linear regression via Ordinary Least Squares out of core.
+    The input is copied to the output feature class and read back in
+    blocks of rows: the first pass accumulates the centred cross-products
+    of y and X, the second writes the predicted values and residuals while
+    gathering the residual moments for the robust standard errors and the
+    Jarque-Bera, Breusch-Pagan and leave-one-out diagnostics.  Peak memory
+    depends on the block size and the # of variables, not on n.
+
+    INPUTS:
+    inputFC (str): path to the input feature class
+    depVarName (str): name of dependent variable field
+    indVarNames (list): name of independent variable field(s)
+    outputFC (str): path to the output feature class
+    blockSize {int, 100000}: # of rows held in memory at once
+
+    ATTRIBUTES:
+    As OLS, without the n-length arrays y, x, yHat and residuals
+    """
+
+    def __init__(self, inputFC, depVarName, indVarNames, outputFC,
+                 blockSize = 100000):
+
+        #### Set Initial Attributes ####
+        UTILS.assignClassAttr(self, locals())
+        self.warnedTProb = False
+        self.resampleMethod = None
+
+        #### Initialize Data ####
+        self.initialize()
+
+        #### Calculate Statistic ####
+        self.calculate()
+
+        #### Create Reports ####
+        self.createCoefficientReport()
+        self.createDiagnosticReport()
+        self.createInterpretReport()
+
+    def initialize(self):
+        """Performs additional validation, copies the input to the output
+        feature class and accumulates the moments of the data."""
+
+        #### Remove the Dependent Variable from Independent Vars ####
+        if self.depVarName in self.indVarNames:
+            self.indVarNames.remove(self.depVarName)
+            ARCPY.AddIDMessage("WARNING", 850, self.depVarName)
+
+        #### Raise Error If No Independent Vars ####
+        if not len(self.indVarNames):
+            ARCPY.AddIDMessage("ERROR", 737)
+            raise SystemExit()
+
+        self.inName = OS.path.basename(self.inputFC)
+        self.allVars = [self.depVarName] + self.indVarNames
+        self.k = len(self.indVarNames) + 1
+
+        #### Both Passes Read the Copy, So They See the Same Rows ####
+        DM.CopyFeatures(self.inputFC, self.outputFC)
+        outPath, outName = OS.path.split(self.outputFC)
+        self.fieldOrder = UTILS.getFieldNames(olsFCFieldNames, outPath)
+        existing = [ f.name.upper() for f in ARCPY.ListFields(self.outputFC) ]
+        for fieldName in self.fieldOrder:
+            if fieldName.upper() in existing:
+                DM.DeleteField(self.outputFC, fieldName)
+            DM.AddField(self.outputFC, fieldName, "DOUBLE")
+
+        #### First Pass: Centred Cross-Products of [X, y] ####
+        moments = RU.MomentAccumulator(self.k)
+        numBad = 0
+        fieldNames = self.indVarNames + [self.depVarName]
+        with DA.SearchCursor(self.outputFC, fieldNames) as cursor:
+            while True:
+                rows = list(ITER.islice(cursor, self.blockSize))
+                if not rows:
+                    break
+                block = NUM.array([ [ NUM.nan if v is None else v
+                                      for v in row ] for row in rows ],
+                                  dtype = float)
+                valid = NUM.isfinite(block).all(1)
+                numBad += len(block) - valid.sum()
+                moments.add(block[valid])
+
+        if numBad:
+            MSG.addMessage("WARNING", "streamExcluded", numBad)
+
+        self.moments = moments
+        self.n = moments.n
+
+    def calculate(self):
+        """Performs OLS and related diagnostics from the accumulated
+        moments, then makes the second pass over the output."""
+
+        #### Shorthand Attributes ####
+        moments = self.moments
+        n = self.n
+        k = self.k
+
+        #### General Information ####
+        fn = n * 1.0
+        dof = n - k
+
+        #### Assure DOF is Larger than 1 ####
+        if dof <= 2:
+            ARCPY.AddIDMessage("ERROR", 1128, 2)
+            raise SystemExit()
+
+        fdof = dof * 1.0
+        xBar = moments.mean[:-1]
+        yBar = moments.mean[-1]
+        cxx = moments.cross[:-1,:-1]
+        cxy = moments.cross[:-1,-1]
+        tss = moments.cross[-1,-1]
+
+        #### Assure that Variance is Larger than Zero ####
+        if NUM.isnan(tss) or tss <= 0.0:
+            ARCPY.AddIDMessage("ERROR", 906)
+            raise SystemExit()
+
+        try:
+            cxxi = LA.inv(cxx)
+        except:
+            #### Perfect multicollinearity, cannot proceed ####
+            ARCPY.AddIDMessage("ERROR", 639)
+            raise SystemExit()
+
+        #### Compute Coefficients ####
+        slopes = NUM.dot(cxxi, cxy)
+        coef = NUM.empty((k, 1), dtype = float)
+        coef[0,0] = yBar - NUM.dot(xBar, slopes)
+        coef[1:,0] = slopes
+
+        #### (X'X)^-1 From the Centred Inverse (Partitioned Inverse) ####
+        cxxiBar = NUM.dot(cxxi, xBar)
+        xxi = NUM.empty((k, k), dtype = float)
+        xxi[0,0] = 1.0 / fn + NUM.dot(xBar, cxxiBar)
+        xxi[0,1:] = -cxxiBar
+        xxi[1:,0] = -cxxiBar
+        xxi[1:,1:] = cxxi
+
+        #### Compute Standardized Coefficients ####
+        ySTD = NUM.sqrt(tss / fn)
+        xSTD = NUM.zeros(k, dtype = float)
+        xSTD[1:] = NUM.sqrt(cxx.diagonal() / fn)
+        stdRatio = xSTD / ySTD
+        self.coefSTD = stdRatio * coef.flatten()
+
+        #### Sum Of Squares, R2, Etc. ####
+        ess = max(tss - NUM.dot(slopes, cxy), 0.0)
+        s2 = (ess / fdof)
+        s2mle = (ess / fn)
+        seResiduals = NUM.sqrt(s2)
+        r2 = 1.0 - (ess/tss)
+        r2Adj =  1.0 - ( (ess / (fdof)) / (tss / (fn-1)) )
+
+        #### Second Pass: Write Residuals, Gather Their Moments ####
+        self.writeResiduals(coef, xxi, seResiduals)
+
+        #### Coefficient Tests ####
+        self.dof = dof
+        self.coef = coef
+        dofScale =  (int( n / (n - k) )) * 1.0
+        self.testCoefficients(coef, xxi, s2, self.sHat * dofScale)
+
+        #### Jarque-Bera Test From the Residual Power Sums ####
+        s1, s2e, s3, s4 = self.eSums / fn
+        muE = s1
+        u3 = s3 - 3.0 * muE * s2e + 2.0 * muE**3.0
+        u4 = s4 - 4.0 * muE * s3 + 6.0 * muE**2.0 * s2e - 3.0 * muE**4.0
+        skew = u3 / s2mle**1.5
+        kurt = u4 / s2mle**2.0
+        self.JB = (n/6.) * ( skew**2. + ( (kurt - 3.)**2. / 4. ))
+
+        #### Breusch-Pagan Test From the Moments of [X, u2] ####
+        bp = self.bpMoments
+        cxu = bp.cross[:-1,-1]
+        tssU = bp.cross[-1,-1]
+        r2U = NUM.dot(cxu, NUM.dot(cxxi, cxu)) / tssU
+        self.BP = fn * r2U
+
+        #### Joint Tests, Likelihood and Information Criteria ####
+        self.testModel(n, k, r2, s2mle)
+
+        #### Leave-One-Out Prediction Error ####
+        self.looRMSE = NUM.sqrt(self.press / fn)
+
+        #### Calculate the Variance Inflation Factor ####
+        if k <= 2:
+            self.vifVal = ARCPY.GetIDMessage(84090)
+            self.vif = False
+        else:
+            self.vifVal = cxxi.diagonal() * cxx.diagonal()
+            if not NUM.all(NUM.isfinite(self.vifVal)):
+                #### Perfect multicollinearity, cannot proceed ####
+                ARCPY.AddIDMessage("ERROR", 639)
+                raise SystemExit()
+            self.vif = True
+
+        #### Set Attributes ####
+        self.yBar = yBar
+        self.seResiduals = seResiduals
+        self.ess = ess
+        self.tss = tss
+        self.r2 = r2
+        self.r2Adj = r2Adj
+        self.s2 = s2
+        self.s2mle = s2mle
+        self.varLabels = [ARCPY.GetIDMessage(84064)] + self.indVarNames
+
+    def writeResiduals(self, coef, xxi, seResiduals):
+        """Writes the predicted values, residuals and standardized
+        residuals to the output feature class, and accumulates the
+        residual moments in blocks of rows.
+
+        INPUTS:
+        coef (array): kx1 vector of beta coefficients
+        xxi (array): kxk inverse of X'X
+        seResiduals (float): standard error of the residuals
+        """
+
+        k = self.k
+        numVars = len(self.allVars)
+        coefList = list(coef.flatten())
+        self.xxi = xxi
+        self.eSums = NUM.zeros(4, dtype = float)
+        self.sHat = NUM.zeros((k, k), dtype = float)
+        self.bpMoments = RU.MomentAccumulator(k)
+        self.press = 0.0
+
+        #### Each Block Holds [1, X, e] ####
+        block = NUM.empty((self.blockSize, k + 1), dtype = float)
+        fill = 0
+        fieldNames = self.allVars + self.fieldOrder
+        with DA.UpdateCursor(self.outputFC, fieldNames) as cursor:
+            for row in cursor:
+                values = row[0:numVars]
+                if None in values:
+                    continue
+                xRow = [1.0] + [ float(v) for v in values[1:] ]
+                yHat = sum([ c * v for c, v in zip(coefList, xRow) ])
+                e = float(values[0]) - yHat
+
+                #### Non-Finite Input Gives a Non-Finite Residual ####
+                if e != e or abs(e) == NUM.inf:
+                    continue
+                row[numVars:] = [yHat, e, e / seResiduals]
+                cursor.updateRow(row)
+
+                block[fill,0:k] = xRow
+                block[fill,k] = e
+                fill += 1
+                if fill == self.blockSize:
+                    self.addResiduals(block)
+                    fill = 0
+        self.addResiduals(block[0:fill])
+
+    def addResiduals(self, block):
+        """Adds a block of [1, X, e] rows to the residual moments."""
+
+        if not len(block):
+            return
+        k = self.k
+        x = block[:,0:k]
+        e = block[:,k]
+        u2 = e * e
+        self.eSums += [e.sum(), u2.sum(), (u2 * e).sum(), (u2 * u2).sum()]
+        self.sHat += NUM.dot(x.T * u2, x)
+        self.bpMoments.add(NUM.column_stack([x[:,1:], u2]))
+        press, looRMSE = RU.leaveOneOut(x, self.xxi, e)
+        self.press += press
+
+    def outputResults(self, outputFC):
+        """Sets the symbology of the output feature class, already
+        written by the second pass."""
+
+        shapeType = ARCPY.Describe(outputFC).shapeType
+        self.setSymbology(shapeType)
+
 if __name__ == '__main__':
     ols = setupOLS()
 
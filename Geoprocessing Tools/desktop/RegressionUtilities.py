@@ -0,0 +1,997 @@
+# coding: utf-8
+"""
+Source Name:   RegressionUtilities.py
+Description:   Linear algebra helpers shared by the regression tools, the
+               top k lists of Exploratory Regression, and the file format
+               of a fitted model.
+"""
+
+################ Imports ####################
+import os as OS
+import itertools as ITER
+import heapq as HEAPQ
+import operator as OP
+import numpy as NUM
+import numpy.linalg as LA
+import VectorStats as VSTATS
+
+################ Constants ####################
+#### Schur Pivot (1 - R2 of the Added Variable) Forcing a Refactor ####
+pivotTolerance = 1.0e-8
+
+#### Diagonal of R, Relative to the First, Ending the Numerical Rank ####
+rankTolerance = 1.0e-10
+
+############## Helper Functions ##############
+
+def binomial(n, k):
+    """Returns the exact # of k-combinations of n items."""
+    if k < 0 or k > n:
+        return 0
+    k = min(k, n - k)
+    result = 1
+    for i in range(1, k + 1):
+        result = result * (n - k + i) // i
+    return result
+
+def unrankCombination(rank, n, k):
+    """Returns the indices of the k-combination of range(n) at a rank in
+    lexicographic order, the order of itertools.combinations.
+
+    INPUTS:
+    rank (int): 0 <= rank < binomial(n, k)
+    n (int): # of items
+    k (int): # of items in each combination
+    """
+
+    combo = []
+    first = 0
+    for need in range(k, 0, -1):
+        for ind in range(first, n):
+            #### Combinations Beginning With ind ####
+            count = binomial(n - ind - 1, need - 1)
+            if rank < count:
+                combo.append(ind)
+                first = ind + 1
+                break
+            rank -= count
+    return combo
+
+def combinations(items, k, start = 0, stop = None):
+    """Yields the k-combinations of items in lexicographic order from rank
+    start up to, not including, rank stop.  The first combination is
+    unranked directly.
+
+    INPUTS:
+    items (list): items to choose from
+    k (int): # of items in each combination
+    start {int, 0}: rank of the first combination
+    stop {int, None}: rank after the last combination, None for all
+    """
+
+    items = list(items)
+    n = len(items)
+    total = binomial(n, k)
+    if stop is None or stop > total:
+        stop = total
+    if k <= 0 or start >= stop:
+        return
+    if start == 0 and stop == total:
+        for combo in ITER.combinations(items, k):
+            yield combo
+        return
+
+    c = unrankCombination(start, n, k)
+    for rank in range(start, stop):
+        yield tuple([ items[ind] for ind in c ])
+
+        #### Advance the Rightmost Index That Can Move ####
+        j = k - 1
+        while j >= 0 and c[j] == n - k + j:
+            j -= 1
+        if j < 0:
+            return
+        c[j] += 1
+        for i in range(j + 1, k):
+            c[i] = c[i-1] + 1
+
+def unrankRevolvingDoor(rank, n, k):
+    """Returns the indices of the k-combination of range(n) at a rank in
+    revolving door order (Kreher and Stinson, Combinatorial Algorithms,
+    Algorithm 2.12), the order of revolvingDoor.
+
+    INPUTS:
+    rank (int): 0 <= rank < binomial(n, k)
+    n (int): # of items
+    k (int): # of items in each combination
+    """
+
+    combo = [0] * k
+    x = n
+    for i in range(k, 0, -1):
+        while binomial(x, i) > rank:
+            x -= 1
+        combo[i-1] = x
+        rank = binomial(x + 1, i) - rank - 1
+    return combo
+
+def revolvingDoor(items, k, start = 0, stop = None):
+    """Yields the k-combinations of items in revolving door order, where
+    consecutive combinations differ by swapping a single item (Knuth,
+    TAOCP 7.2.1.3, Algorithm R).  Each combination is in item order.
+    Combinations are yielded from rank start up to, not including, rank
+    stop; the first is unranked directly.
+
+    INPUTS:
+    items (list): items to choose from
+    k (int): # of items in each combination
+    start {int, 0}: rank of the first combination
+    stop {int, None}: rank after the last combination, None for all
+    """
+
+    items = list(items)
+    n = len(items)
+    if k <= 0 or k > n:
+        return
+    total = binomial(n, k)
+    if stop is None or stop > total:
+        stop = total
+    if k == 1 or k == n:
+        combos = [ (item,) for item in items ] if k == 1 else [items]
+        for combo in combos[start:stop]:
+            yield tuple(combo)
+        return
+
+    #### c[1..k] Current Indices, c[k+1] = n Sentinel ####
+    c = [0] + unrankRevolvingDoor(start, n, k) + [n]
+    for rank in range(start, stop):
+        yield tuple([ items[ind] for ind in c[1:k+1] ])
+
+        #### Easy Case, Move c[1] ####
+        if k % 2:
+            if c[1] + 1 < c[2]:
+                c[1] += 1
+                continue
+            j = 2
+            increase = False
+        else:
+            if c[1] > 0:
+                c[1] -= 1
+                continue
+            j = 2
+            increase = True
+
+        #### Find the Next Index to Move ####
+        while True:
+            if not increase:
+                if c[j] >= j:
+                    c[j] = c[j-1]
+                    c[j-1] = j - 2
+                    break
+                j += 1
+            if c[j] + 1 < c[j+1]:
+                c[j-1] = c[j]
+                c[j] += 1
+                break
+            j += 1
+            if j > k:
+                return
+            increase = False
+
+def pivotedQR(x, tol = rankTolerance):
+    """Returns the R factor of a Householder QR decomposition with column
+    pivoting (Businger and Golub), the column order and the numerical
+    rank.  The column with the largest remaining norm is brought forward
+    at each step, so the decomposition stops at the first diagonal below
+    tol times the first; columns from the rank on are, to that tolerance,
+    combinations of the columns before them.
+
+    INPUTS:
+    x (array): nxk matrix
+    tol {float, rankTolerance}: relative size of the diagonal ending the
+        numerical rank
+
+    RETURN:
+    r (array): (min(n, k) x k) upper triangular factor, columns in order
+    order (array): (k,) column indices of x in the order of r
+    rank (int): numerical rank of x
+    """
+
+    a = NUM.array(x, dtype = float)
+    n, k = a.shape
+    order = NUM.arange(k)
+    norms = (a * a).sum(0)
+    rank = 0
+    first = 0.0
+    for j in range(min(n, k)):
+        #### Bring the Column With the Largest Remaining Norm Forward ####
+        pivot = j + NUM.argmax(norms[j:])
+        if pivot != j:
+            a[:,[j, pivot]] = a[:,[pivot, j]]
+            order[[j, pivot]] = order[[pivot, j]]
+            norms[[j, pivot]] = norms[[pivot, j]]
+
+        #### Stop at the Numerical Rank ####
+        v = a[j:,j].copy()
+        alpha = NUM.sqrt(NUM.dot(v, v))
+        if j == 0:
+            first = alpha
+        if alpha <= tol * first or alpha == 0.0:
+            break
+
+        #### Householder Reflection Zeroing the Column Below j ####
+        if v[0] > 0.0:
+            alpha = -alpha
+        v[0] -= alpha
+        a[j:,j:] -= NUM.outer(v, NUM.dot(v, a[j:,j:]) * (2.0 / NUM.dot(v, v)))
+        rank += 1
+
+        #### Remaining Norms, Recomputed Rather Than Downdated ####
+        norms[j+1:] = (a[j+1:,j+1:] ** 2).sum(0)
+
+    r = NUM.triu(a[0:min(n, k)])
+    return r, order, rank
+
+def dependentGroups(x, tol = rankTolerance):
+    """Returns the groups of columns of x that are linearly dependent,
+    found by one QR decomposition with column pivoting.  Each column past
+    the numerical rank forms a group with the columns before it that it is
+    a combination of.  A matrix holding every column of a group is
+    singular.
+
+    INPUTS:
+    x (array): nxk matrix
+    tol {float, rankTolerance}: relative size of the diagonal ending the
+        numerical rank
+
+    RETURN:
+    groups (list): tuples of column indices of x, in increasing order
+    """
+
+    r, order, rank = pivotedQR(x, tol = tol)
+    k = len(order)
+    if rank == k:
+        return []
+
+    #### Coefficients of the Dependent Columns on the Basis Columns ####
+    groups = []
+    basis = order[0:rank]
+    if rank:
+        coef = LA.solve(r[0:rank,0:rank], r[0:rank,rank:k])
+    else:
+        coef = NUM.zeros((0, k - rank), dtype = float)
+    for ind in range(k - rank):
+        weights = NUM.abs(coef[:,ind])
+        if len(weights):
+            members = basis[weights > tol * weights.max()]
+        else:
+            members = basis[0:0]
+        group = [order[rank + ind]] + list(members)
+        groups.append(tuple(sorted([ int(col) for col in group ])))
+    return groups
+
+def hatDiagonal(x, xxi):
+    """Returns the n leverages h_i, the diagonal of the hat matrix
+    X(X'X)^-1X'.
+
+    INPUTS:
+    x (array): nxk design matrix
+    xxi (array): kxk inverse of X'X
+    """
+
+    return (NUM.dot(x, xxi) * x).sum(1)
+
+def varianceInflation(x, xxi):
+    """Returns the VIF of each explanatory variable.  The lower block of
+    (X'X)^-1 is the inverse of the centred cross-products, so only the
+    centred sums of squares are needed.
+
+    INPUTS:
+    x (array): nxk design matrix, intercept first
+    xxi (array): kxk inverse of X'X
+    """
+
+    xDev = x[:,1:] - x[:,1:].mean(0)
+    ssX = (xDev * xDev).sum(0)
+    return xxi.diagonal()[1:] * ssX
+
+def leaveOneOut(x, xxi, residuals, leverage = None):
+    """Returns the leave-one-out prediction error of an OLS fit without
+    refitting: the residual of observation i with it left out is
+    e_i / (1 - h_i), h_i the diagonal of the hat matrix X(X'X)^-1X'.
+    Undefined (NaN) when an observation has a leverage of one.
+
+    INPUTS:
+    x (array): nxk design matrix
+    xxi (array): kxk inverse of X'X
+    residuals (array): n residuals of the fit
+    leverage {array, None}: n leverages, when shared by several fits
+
+    RETURN:
+    press (float): Predicted Residual Error Sum of Squares
+    looRMSE (float): root mean squared leave-one-out residual
+    """
+
+    if leverage is None:
+        leverage = hatDiagonal(x, xxi)
+    left = 1.0 - leverage
+    if NUM.any(left <= rankTolerance):
+        return NUM.nan, NUM.nan
+    looResiduals = NUM.asarray(residuals, dtype = float).flatten() / left
+    press = NUM.dot(looResiduals, looResiduals)
+    return press, NUM.sqrt(press / len(looResiduals))
+
+def loadModel(fileName):
+    """Returns the RegressionModel saved to a file.
+
+    INPUTS:
+    fileName (str): path to the model file
+    """
+
+    stored = NUM.load(fileName)
+    try:
+        diagnostics = dict(zip([ str(name) for name in
+                                 stored['diagNames'] ],
+                               stored['diagValues'].tolist()))
+        model = RegressionModel(str(stored['depVarName'][0]),
+                                [ str(name) for name in
+                                  stored['indVarNames'] ],
+                                stored['coef'], stored['xxi'],
+                                float(stored['s2']), int(stored['dof']),
+                                stored['varCoefRob'],
+                                diagnostics = diagnostics)
+    finally:
+        stored.close()
+    return model
+
+################### Classes ###################
+
+class TopK(object):
+    """Keeps the k items with the largest values offered so far in a
+    min-heap, so each offer costs O(log k).  An item must exceed the
+    smallest value held to enter a full list, so ties are broken by
+    arrival: of two items with the same value the earlier one ranks
+    higher.  The items kept are the top k of everything offered under that
+    order, so offering the items kept from parts of a sequence, in
+    sequence order, gives the top k of the whole sequence.
+
+    INPUTS:
+    k (int): # of items to keep
+    """
+
+    def __init__(self, k):
+
+        #### Set Initial Attributes ####
+        self.k = k
+        self.heap = []
+        self.numOffers = 0
+
+    def __len__(self):
+        return len(self.heap)
+
+    def floor(self):
+        """Returns the value an item must exceed to enter the list."""
+        if len(self.heap) < self.k:
+            return -NUM.inf
+        if not self.k:
+            return NUM.inf
+        return self.heap[0][0]
+
+    def offer(self, value, item):
+        """Adds the item if it ranks in the top k, displacing the lowest
+        ranked item of a full list.  Returns whether it was added."""
+
+        entry = (value, -self.numOffers, item)
+        self.numOffers += 1
+        if len(self.heap) < self.k:
+            HEAPQ.heappush(self.heap, entry)
+            return True
+        if value > self.floor():
+            HEAPQ.heapreplace(self.heap, entry)
+            return True
+        return False
+
+    def ranked(self):
+        """Returns the (value, item) pairs held, highest ranked first."""
+        entries = sorted(self.heap, key = OP.itemgetter(0, 1),
+                         reverse = True)
+        return [ (value, item) for value, order, item in entries ]
+
+class ResultStore(object):
+    """Columnar store of the OLS results kept for one number of variables.
+    Each row holds a bitmask of the variables in the model, the
+    diagnostics as fixed-width numeric columns and a sign/significance
+    code per variable; the model string is only formatted when reported.
+    Indexed by model ID like a dictionary, returning the view of a row
+    (see view).
+
+    INPUTS:
+    allVarNames (list): names of all candidate variables
+    numChoose (int): # of variables in each model
+    allMIPass {bool, False}: Moran's I not evaluated?
+    size {int, 16}: initial # of rows, doubled as needed
+    """
+
+    def __init__(self, allVarNames, numChoose, allMIPass = False,
+                 size = 16):
+
+        #### Set Initial Attributes ####
+        self.allVarNames = allVarNames
+        self.numChoose = numChoose
+        self.allMIPass = allMIPass
+        self.varIndex = dict([ (varName, ind) for ind, varName
+                               in enumerate(allVarNames) ])
+        numWords = (len(allVarNames) + 63) // 64
+        self.dtype = NUM.dtype([('model', int),
+                                ('mask', NUM.uint64, (numWords,)),
+                                ('r2', float), ('aic', float),
+                                ('loo', float),
+                                ('jb', float), ('bp', float),
+                                ('maxVIF', float), ('mi', float),
+                                ('codes', NUM.int8, (max(numChoose, 1),))])
+        self.rows = NUM.zeros(size, dtype = self.dtype)
+        self.numRows = 0
+        self.rowIndex = {}
+
+    def __len__(self):
+        return self.numRows
+
+    def __contains__(self, olsID):
+        return olsID in self.rowIndex
+
+    def __getitem__(self, olsID):
+        return self.view(self.rowIndex[olsID], olsID)
+
+    def view(self, rowInd, olsID):
+        """Returns the view of a row, the row itself here.  Overridden
+        to view rows as results.
+
+        INPUTS:
+        rowInd (int): index of the row
+        olsID (str): identifier of the model, E.g. "3:12"
+        """
+
+        return self.rows[rowInd]
+
+    def __setitem__(self, olsID, olsResult):
+        """Adds a result, or updates the Moran's I of a stored one."""
+
+        if olsID in self.rowIndex:
+            row = self.rows[self.rowIndex[olsID]]
+        else:
+            if self.numRows == len(self.rows):
+                self.rows = NUM.resize(self.rows, 2 * len(self.rows))
+            self.rowIndex[olsID] = self.numRows
+            row = self.rows[self.numRows]
+            self.numRows += 1
+
+            #### Bitmask of Variables ####
+            mask = NUM.zeros(len(row['mask']), dtype = NUM.uint64)
+            for varName in olsResult.varNames:
+                word, bit = divmod(self.varIndex[varName], 64)
+                mask[word] |= NUM.uint64(1) << NUM.uint64(bit)
+            row['mask'] = mask
+            row['model'] = int(olsID.split(":")[-1])
+            row['r2'] = olsResult.r2
+            row['aic'] = olsResult.aic
+            row['loo'] = olsResult.looRMSE
+            row['jb'] = olsResult.jb
+            row['bp'] = olsResult.bp
+            row['maxVIF'] = olsResult.maxVIFValue
+            self.setCodes(row, olsResult)
+
+        if olsResult.miPVal is None:
+            row['mi'] = NUM.nan
+        else:
+            row['mi'] = olsResult.miPVal
+
+    def setCodes(self, row, olsResult):
+        """Sets the sign (4 if negative) plus # of significance stars of
+        each variable in a row."""
+
+        pVals = NUM.asarray(olsResult.pVals, dtype = float).flatten()
+        coef = NUM.asarray(olsResult.coef, dtype = float).flatten()
+        stars = (pVals <= .1) * 1 + (pVals <= .05) + (pVals <= .01)
+        row['codes'][0:len(coef)] = (coef < 0.0) * 4 + stars
+
+    def setDiagnostics(self, olsID, olsResult):
+        """Updates the residual diagnostics and significance codes of a
+        stored result given them after it was added."""
+
+        row = self.rows[self.rowIndex[olsID]]
+        row['loo'] = olsResult.looRMSE
+        row['jb'] = olsResult.jb
+        row['bp'] = olsResult.bp
+        self.setCodes(row, olsResult)
+
+    def extend(self, other, offset):
+        """Appends the rows of another store, adding offset to their model
+        numbers.
+
+        INPUTS:
+        other (obj): ResultStore for the same variables
+        offset (int): # added to the model numbers of other
+        """
+
+        numRows = self.numRows + other.numRows
+        if numRows > len(self.rows):
+            self.rows = NUM.resize(self.rows, max(numRows, 16))
+        newRows = self.rows[self.numRows:numRows]
+        newRows[:] = other.rows[0:other.numRows]
+        newRows['model'] += offset
+        K = self.numChoose + 1
+        for rowInd in range(self.numRows, numRows):
+            olsID = str(K) + ":" + str(self.rows['model'][rowInd])
+            self.rowIndex[olsID] = rowInd
+        self.numRows = numRows
+
+    def keys(self):
+        return list(self.rowIndex.keys())
+
+    def items(self):
+        return [ (olsID, self[olsID]) for olsID in self.rowIndex ]
+
+    iteritems = items
+
+    def column(self, name):
+        """Returns a column of the stored rows."""
+        return self.rows[name][0:self.numRows]
+
+    def resultAt(self, rowInd):
+        """Returns the view of a row."""
+        olsID = str(self.numChoose + 1) + ":" + str(self.rows['model'][rowInd])
+        return self.view(rowInd, olsID)
+
+    def varNames(self, rowInd):
+        """Returns the variable names of a row from its bitmask."""
+        mask = self.rows['mask'][rowInd]
+        return [ varName for ind, varName in enumerate(self.allVarNames)
+                 if (int(mask[ind // 64]) >> (ind % 64)) & 1 ]
+
+class GramMatrix(object):
+    """Cross-product matrices of a design matrix.  The n rows are passed
+    over once on construction, after which any subset of columns can be
+    fit from kxk submatrices.
+
+    INPUTS:
+    x (array): nxk design matrix, column 0 is the intercept
+    y (array): nx1 vector of dependent variable values
+
+    ATTRIBUTES:
+    n (int): # of observations
+    k (int): # of columns in the design matrix
+    xx (array): (kxk) X'X
+    xy (array): (k,) X'y
+    xBar (array): (k,) column means of X
+    yBar (float): mean of dependent variable
+    cxx (array): (k-1xk-1) centred cross-products of the variables
+    cxy (array): (k-1,) centred cross-products with the dependent variable
+    tss (float): Total Sum of Squares
+    """
+
+    def __init__(self, x, y):
+
+        #### Set Initial Attributes ####
+        self.x = x
+        self.y = y
+        self.n, self.k = NUM.shape(x)
+        fn = self.n * 1.0
+
+        #### Raw Cross-Products ####
+        self.xx = NUM.dot(x.T, x)
+        self.xy = NUM.dot(x.T, y).flatten()
+        self.xBar = self.xx[0] / fn
+        self.yBar = self.xy[0] / fn
+
+        #### Centred Cross-Products (Avoids Cancellation in ESS) ####
+        xc = x[:,1:] - self.xBar[1:]
+        yc = y.flatten() - self.yBar
+        self.cxx = NUM.dot(xc.T, xc)
+        self.cxy = NUM.dot(xc.T, yc)
+        self.tss = NUM.dot(yc, yc)
+        del xc, yc
+
+    def __getstate__(self):
+        """The data arrays are not pickled; worker processes attach their
+        own shared copies."""
+        state = self.__dict__.copy()
+        state['x'] = None
+        state['y'] = None
+        return state
+
+    def subset(self, columns):
+        """Returns X'X for the given design matrix columns.
+
+        INPUTS:
+        columns (list): column indices, intercept (0) first
+        """
+
+        return self.xx[NUM.ix_(columns, columns)]
+
+    def solve(self, columns):
+        """Fits the model for the given design matrix columns.  Raises
+        LA.LinAlgError when the centred cross-product matrix is singular.
+
+        INPUTS:
+        columns (list): column indices, intercept (0) first
+
+        RETURN:
+        coef (array): kx1 vector of beta coefficients
+        xxi (array): (kxk) inverse of X'X
+        ess (float): Error Sum of Squares
+        vif (array): (k-1,) variance inflation factors
+        """
+
+        columns = NUM.asarray(columns)
+        slopes = columns[1:] - 1
+
+        #### Invert the Centred System ####
+        cxx = self.cxx[NUM.ix_(slopes, slopes)]
+        cxxi = LA.inv(cxx)
+
+        return self.solveInverse(columns, cxxi)
+
+    def solveInverse(self, columns, cxxi):
+        """Fits the model for the given design matrix columns from the
+        inverse of their centred cross-products.
+
+        INPUTS:
+        columns (list): column indices, intercept (0) first
+        cxxi (array): (k-1xk-1) inverse of the centred cross-products
+
+        RETURN:
+        coef (array): kx1 vector of beta coefficients
+        xxi (array): (kxk) inverse of X'X
+        ess (float): Error Sum of Squares
+        vif (array): (k-1,) variance inflation factors
+        """
+
+        columns = NUM.asarray(columns)
+        slopes = columns[1:] - 1
+        k = len(columns)
+        cxx = self.cxx[NUM.ix_(slopes, slopes)]
+        cxy = self.cxy[slopes]
+        b = NUM.dot(cxxi, cxy)
+        ess = self.tss - NUM.dot(b, cxy)
+
+        #### Recover Intercept and Full Inverse ####
+        m = self.xBar[columns[1:]]
+        cm = NUM.dot(cxxi, m)
+        coef = NUM.empty((k, 1), dtype = float)
+        coef[0, 0] = self.yBar - NUM.dot(m, b)
+        coef[1:, 0] = b
+        xxi = NUM.empty((k, k), dtype = float)
+        xxi[0, 0] = (1.0 / self.n) + NUM.dot(m, cm)
+        xxi[0, 1:] = -cm
+        xxi[1:, 0] = -cm
+        xxi[1:, 1:] = cxxi
+
+        #### VIF is the Diagonal of the Inverse Correlation Matrix ####
+        vif = cxxi.diagonal() * cxx.diagonal()
+
+        return coef, xxi, ess, vif
+
+    def maxR2(self, columns):
+        """Returns the R2 of the least-squares fit on the given columns.
+        R2 never rises when columns are removed, so this bounds every
+        model on a subset of them.  The pseudo-inverse allows for
+        singular systems.
+
+        INPUTS:
+        columns (list): column indices, intercept (0) first
+        """
+
+        slopes = NUM.asarray(columns[1:]) - 1
+        if not len(slopes) or self.tss <= 0.0:
+            return 0.0
+        cxx = self.cxx[NUM.ix_(slopes, slopes)]
+        cxy = self.cxy[slopes]
+        regSS = NUM.dot(cxy, NUM.dot(LA.pinv(cxx), cxy))
+        return min(max(regSS / self.tss, 0.0), 1.0)
+
+    def solveBatch(self, combos):
+        """Fits all combinations of one size at once from stacked
+        submatrices of the centred cross-products.
+
+        INPUTS:
+        combos (array): (m x c) design matrix column indices of the
+                        variables, intercept excluded
+
+        RETURN:
+        solved (array): m bools, False where the system is singular
+        coef (array): (m x c+1) beta coefficients, intercept first
+        xxiDiag (array): (m x c+1) diagonal of the inverse of X'X
+        ess (array): m Error Sums of Squares
+        vif (array): (m x c) variance inflation factors
+        cxxi (array): (m x c x c) inverses of the centred cross-products,
+                      zero where singular
+        """
+
+        slopes = combos - 1
+        m, c = slopes.shape
+        cxx = self.cxx[slopes[:,:,None], slopes[:,None,:]]
+        cxy = self.cxy[slopes]
+
+        #### Batched Inverse, One at a Time if Any Are Singular ####
+        solved = NUM.ones(m, dtype = bool)
+        try:
+            cxxi = LA.inv(cxx)
+        except LA.LinAlgError:
+            cxxi = NUM.zeros_like(cxx)
+            for ind in range(m):
+                try:
+                    cxxi[ind] = LA.inv(cxx[ind])
+                except LA.LinAlgError:
+                    solved[ind] = False
+
+        #### Coefficients and Error Sum of Squares ####
+        b = NUM.einsum('mij,mj->mi', cxxi, cxy)
+        ess = self.tss - (b * cxy).sum(1)
+        means = self.xBar[combos]
+        cm = NUM.einsum('mij,mj->mi', cxxi, means)
+        coef = NUM.empty((m, c + 1), dtype = float)
+        coef[:,0] = self.yBar - (means * b).sum(1)
+        coef[:,1:] = b
+
+        #### Diagonal of (X'X)^-1 and VIF ####
+        cxxiDiag = NUM.diagonal(cxxi, axis1 = 1, axis2 = 2)
+        xxiDiag = NUM.empty((m, c + 1), dtype = float)
+        xxiDiag[:,0] = (1.0 / self.n) + (means * cm).sum(1)
+        xxiDiag[:,1:] = cxxiDiag
+        vif = cxxiDiag * NUM.diagonal(cxx, axis1 = 1, axis2 = 2)
+
+        return solved, coef, xxiDiag, ess, vif, cxxi
+
+    def residuals(self, columns, coef):
+        """Returns the nx1 residuals for a fitted set of columns.
+
+        INPUTS:
+        columns (list): column indices, intercept (0) first
+        coef (array): kx1 vector of beta coefficients
+        """
+
+        return self.y - NUM.dot(self.x[:,columns], coef)
+
+    def residualsBatch(self, combos, coef):
+        """Returns the n x m residuals for fitted combinations of one
+        size, from one product with the full design matrix.
+
+        INPUTS:
+        combos (array): (m x c) design matrix column indices of the
+                        variables, intercept excluded
+        coef (array): (m x c+1) beta coefficients, intercept first
+        """
+
+        m = len(combos)
+        allCoef = NUM.zeros((self.k, m), dtype = float)
+        allCoef[0] = coef[:,0]
+        allCoef[combos, NUM.arange(m)[:,None]] = coef[:,1:]
+        return self.y - NUM.dot(self.x, allCoef)
+
+class InverseUpdater(object):
+    """Keeps the inverse of the centred cross-products of a GramMatrix for
+    the current set of variables.  Moving to a set that differs by one
+    variable drops and adds it with rank-one updates; any other move, a
+    small pivot, or refreshInterval updates in a row refactors it.
+
+    INPUTS:
+    gram (obj): GramMatrix
+    refreshInterval {int, 50}: # of updates between refactorizations
+    """
+
+    def __init__(self, gram, refreshInterval = 50):
+
+        #### Set Initial Attributes ####
+        self.gram = gram
+        self.refreshInterval = refreshInterval
+        self.variables = []
+        self.cxxi = None
+        self.numUpdates = 0
+
+    def inverse(self, variables):
+        """Returns the inverse of the centred cross-products, rows in the
+        order given.  Raises LA.LinAlgError when singular.
+
+        INPUTS:
+        variables (list): design matrix column indices, intercept excluded
+        """
+
+        variables = list(variables)
+        drop = [ v for v in self.variables if v not in variables ]
+        add = [ v for v in variables if v not in self.variables ]
+        if self.cxxi is None or len(drop) != len(add) or len(add) > 1:
+            self.refactor(variables)
+        elif len(add) == 1:
+            if self.numUpdates < self.refreshInterval:
+                try:
+                    self.swap(drop[0], add[0])
+                except LA.LinAlgError:
+                    self.refactor(variables)
+            else:
+                self.refactor(variables)
+
+        order = [ self.variables.index(v) for v in variables ]
+        return self.cxxi[NUM.ix_(order, order)]
+
+    def refactor(self, variables):
+        """Inverts the centred cross-products from scratch."""
+
+        #### Leave No Stale Inverse if Singular ####
+        self.variables = []
+        self.cxxi = None
+        slopes = NUM.asarray(variables) - 1
+        cxx = self.gram.cxx[NUM.ix_(slopes, slopes)]
+        cxxi = LA.inv(cxx)
+        self.variables = variables
+        self.cxxi = cxxi
+        self.numUpdates = 0
+
+        #### Do Not Update From a Nearly Singular Inverse ####
+        vif = cxxi.diagonal() * cxx.diagonal()
+        if not NUM.all((vif > 0.0) & (vif * pivotTolerance < 1.0)):
+            self.numUpdates = self.refreshInterval
+
+    def swap(self, dropVar, addVar):
+        """Replaces one variable by a rank-one drop and a rank-one add."""
+
+        #### Drop: Schur Complement of the Partitioned Inverse ####
+        ind = self.variables.index(dropVar)
+        keep = [ i for i in range(len(self.variables)) if i != ind ]
+        f = self.cxxi[keep, ind]
+        inv = self.cxxi[NUM.ix_(keep, keep)] - NUM.outer(f, f) / \
+              self.cxxi[ind, ind]
+        variables = [ self.variables[i] for i in keep ]
+
+        #### Add: Border the Inverse ####
+        slopes = NUM.array(variables, dtype = int) - 1
+        addSlope = addVar - 1
+        b = self.gram.cxx[slopes, addSlope]
+        c = self.gram.cxx[addSlope, addSlope]
+        u = NUM.dot(inv, b)
+        pivot = c - NUM.dot(b, u)
+        if not pivot > c * pivotTolerance:
+            raise LA.LinAlgError("Singular matrix")
+        m = len(variables) + 1
+        cxxi = NUM.empty((m, m), dtype = float)
+        cxxi[:-1,:-1] = inv + NUM.outer(u, u) / pivot
+        cxxi[:-1,-1] = -u / pivot
+        cxxi[-1,:-1] = -u / pivot
+        cxxi[-1,-1] = 1.0 / pivot
+
+        self.variables = variables + [addVar]
+        self.cxxi = cxxi
+        self.numUpdates += 1
+
+class MomentAccumulator(object):
+    """Column means and centred cross-products of a table streamed in
+    blocks of rows.  Each block is centred on its own mean and merged by
+    the pairwise update of Chan, Golub and LeVeque, so memory does not
+    grow with the # of rows and no raw sums of squares are formed.
+
+    INPUTS:
+    numCols (int): # of columns in each block
+
+    ATTRIBUTES:
+    n (int): # of rows added
+    mean (array): column means
+    cross (array): centred cross-products, sum((z - mean)(z - mean)')
+    """
+
+    def __init__(self, numCols):
+        self.n = 0
+        self.mean = NUM.zeros(numCols, dtype = float)
+        self.cross = NUM.zeros((numCols, numCols), dtype = float)
+
+    def add(self, block):
+        """Merges an (m x numCols) block of rows."""
+
+        m = len(block)
+        if not m:
+            return
+        blockMean = block.mean(0)
+        dev = block - blockMean
+        delta = blockMean - self.mean
+        total = self.n + m
+        self.cross += NUM.dot(dev.T, dev) + \
+                      NUM.outer(delta, delta) * (self.n * m / float(total))
+        self.mean += delta * (m / float(total))
+        self.n = total
+
+class RegressionModel(object):
+    """A fitted linear model that is saved to file and applied to new
+    observations without refitting.  Prediction intervals are for a new
+    observation, yHat +/- t * sqrt(s2 * (1 + x'(X'X)^-1 x)).
+
+    INPUTS:
+    depVarName (str): name of dependent variable field
+    indVarNames (list): name of independent variable field(s), in the
+                        order of the coefficients after the intercept
+    coef (array): k coefficients, the intercept first
+    xxi (array): kxk inverse of X'X
+    s2 (float): OLS estimate of the variance of residuals
+    dof (int): degrees of freedom (n - k)
+    varCoefRob (array): kxk robust variance-covariance matrix
+    diagnostics {dict, None}: value of each fit diagnostic by name
+
+    ATTRIBUTES:
+    k (int): # of coefficients
+    varCoef (array): kxk variance-covariance matrix
+    """
+
+    def __init__(self, depVarName, indVarNames, coef, xxi, s2, dof,
+                 varCoefRob, diagnostics = None):
+
+        #### Set Initial Attributes ####
+        self.depVarName = depVarName
+        self.indVarNames = list(indVarNames)
+        self.coef = NUM.array(coef, dtype = float).flatten()
+        self.xxi = NUM.array(xxi, dtype = float)
+        self.s2 = s2
+        self.dof = dof
+        self.varCoefRob = NUM.array(varCoefRob, dtype = float)
+        if diagnostics is None:
+            diagnostics = {}
+        self.diagnostics = diagnostics
+        self.k = len(self.coef)
+        self.varCoef = s2 * self.xxi
+        self.criticalValues = {}
+
+    def save(self, fileName):
+        """Writes the model to a .npz file.
+
+        INPUTS:
+        fileName (str): path to the model file
+        """
+
+        diagNames = sorted(self.diagnostics)
+        diagValues = [ self.diagnostics[name] for name in diagNames ]
+
+        #### Write Then Rename So Readers Never See a Partial File ####
+        tempName = fileName + ".%i.tmp" % OS.getpid()
+        fo = open(tempName, "wb")
+        try:
+            NUM.savez(fo, depVarName = NUM.array([self.depVarName]),
+                      indVarNames = NUM.array(self.indVarNames),
+                      coef = self.coef, xxi = self.xxi,
+                      s2 = NUM.array(self.s2), dof = NUM.array(self.dof),
+                      varCoefRob = self.varCoefRob,
+                      diagNames = NUM.array(diagNames),
+                      diagValues = NUM.array(diagValues, dtype = float))
+        finally:
+            fo.close()
+        if OS.path.exists(fileName):
+            OS.remove(fileName)
+        OS.rename(tempName, fileName)
+
+    def predict(self, x, confidence = None):
+        """Returns the predicted values of rows of independent variables,
+        and the bounds of their prediction intervals.
+
+        INPUTS:
+        x (array): m x (k - 1) values, columns in the order of indVarNames
+        confidence {float, None}: level of the intervals, E.g. 0.95
+
+        RETURN:
+        yHat (array): m predicted values
+        lower (array): m lower bounds, None without a confidence level
+        upper (array): m upper bounds, None without a confidence level
+        """
+
+        x = NUM.asarray(x, dtype = float).reshape(-1, self.k - 1)
+        yHat = self.coef[0] + NUM.dot(x, self.coef[1:])
+        if confidence is None:
+            return yHat, None, None
+
+        #### x'(X'X)^-1 x With the Intercept Column Implied ####
+        xxi = self.xxi
+        quad = (xxi[0,0] + 2.0 * NUM.dot(x, xxi[1:,0]) +
+                (NUM.dot(x, xxi[1:,1:]) * x).sum(1))
+        se = NUM.sqrt(self.s2 * (1.0 + quad))
+
+        #### Critical Value Once per Confidence Level ####
+        if confidence not in self.criticalValues:
+            tProb = 0.5 + confidence / 2.0
+            self.criticalValues[confidence] = float(VSTATS.tInverse(tProb,
+                                                                    self.dof))
+        halfWidth = self.criticalValues[confidence] * se
+        return yHat, yHat - halfWidth, yHat + halfWidth
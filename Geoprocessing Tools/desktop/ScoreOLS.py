@@ -0,0 +1,274 @@
+# coding: utf-8
+"""
+Tool Name:     Score OLS Model
+Source Name:   ScoreOLS.py
+Description:   Applies a model saved by Ordinary Least Squares to new
+               features, tables or CSV files, reading and writing chunks
+               of rows, with optional prediction intervals.
+"""
+
+################ Imports ####################
+import sys as SYS
+import os as OS
+import csv as CSV
+import itertools as ITER
+import numpy as NUM
+import arcpy as ARCPY
+import arcpy.management as DM
+import arcpy.da as DA
+import SSUtilities as UTILS
+import RegressionUtilities as RU
+import RegressionMessages as MSG
+
+################ Output Field Names #################
+scoreFieldNames = ["Predicted", "PI_Lower", "PI_Upper"]
+
+############### Methods ###############
+
+def isCSV(fileName):
+    return fileName.lower().endswith(".csv")
+
+def openCSV(fileName, mode):
+    """Opens a CSV file for the csv module under Python 2 and 3.
+
+    INPUTS:
+    fileName (str): path to the CSV file
+    mode (str): r or w
+    """
+
+    if SYS.version_info[0] < 3:
+        return open(fileName, mode + "b")
+    return open(fileName, mode, newline = "")
+
+def toFloat(value):
+    """Returns a table or CSV value as a float, NaN when it is null or
+    not a number."""
+
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return NUM.nan
+
+################### GUI Interface ###################
+
+def setupScoreOLS():
+    """Retrieves the parameters from the User Interface and executes the
+    appropriate commands."""
+
+    #### Get User Provided Inputs ####
+    modelFile = ARCPY.GetParameterAsText(0)
+    inputTable = ARCPY.GetParameterAsText(1)
+    outputTable = ARCPY.GetParameterAsText(2)
+    chunkSize = UTILS.getNumericParameter(3)
+    if chunkSize is None:
+        chunkSize = 100000
+    confidence = UTILS.getNumericParameter(4)
+
+    #### Confidence Level as a Percentage or a Fraction ####
+    if confidence is not None:
+        if confidence >= 1.0:
+            confidence = confidence / 100.0
+        if not 0.0 < confidence < 1.0:
+            MSG.addMessage("ERROR", "confidenceRange")
+            raise SystemExit()
+
+    scorer = ModelScorer(modelFile, inputTable, outputTable,
+                         chunkSize = int(chunkSize), confidence = confidence)
+    scorer.report()
+
+class ModelScorer(object):
+    """Applies a saved regression model to the rows of a feature class,
+    table or CSV file.  Rows are read and written chunkSize at a time and
+    each chunk is predicted with array operations, so memory does not
+    grow with the # of rows.  Output to a CSV file keeps the attributes;
+    output to a feature class or table also keeps the geometry.
+
+    INPUTS:
+    modelFile (str): path to a model saved by Ordinary Least Squares
+    inputTable (str): feature class, table or CSV file to score
+    outputTable (str): output feature class, table or CSV file
+    chunkSize {int, 100000}: # of rows held in memory at once
+    confidence {float, None}: level of the prediction intervals, E.g.
+                              0.95, None for predicted values only
+
+    ATTRIBUTES:
+    model (obj): instance of RegressionUtilities.RegressionModel
+    numRows (int): # of rows written
+    numBad (int): # of rows with null or non-numeric variables
+    """
+
+    def __init__(self, modelFile, inputTable, outputTable,
+                 chunkSize = 100000, confidence = None):
+
+        #### Set Initial Attributes ####
+        UTILS.assignClassAttr(self, locals())
+        self.model = RU.loadModel(modelFile)
+        self.numRows = 0
+        self.numBad = 0
+        if confidence is None:
+            self.outFieldNames = scoreFieldNames[0:1]
+        else:
+            self.outFieldNames = scoreFieldNames
+
+        #### Open the Input, Then Score Into the Output ####
+        if isCSV(inputTable):
+            self.initializeCSV()
+        else:
+            self.initializeTable()
+        self.score()
+
+    def initializeCSV(self):
+        """Reads the header of a CSV input."""
+
+        if not isCSV(self.outputTable):
+            MSG.addMessage("ERROR", "scoreCSV")
+            raise SystemExit()
+        fi = openCSV(self.inputTable, "r")
+        try:
+            header = next(CSV.reader(fi))
+        finally:
+            fi.close()
+        self.hasShape = False
+        self.setFields([ name.strip() for name in header ])
+
+    def initializeTable(self):
+        """Lists the attributes of a feature class or table input."""
+
+        desc = ARCPY.Describe(self.inputTable)
+        self.hasShape = hasattr(desc, "shapeType")
+        self.desc = desc
+        fields = [ field.name for field in ARCPY.ListFields(self.inputTable)
+                   if field.type not in ["OID", "Geometry"] and
+                   field.editable ]
+
+        #### Predicted Values Replace Input Fields of the Same Name ####
+        outNames = [ name.upper() for name in self.outFieldNames ]
+        fields = [ name for name in fields if name.upper() not in outNames ]
+        self.setFields(fields)
+
+    def setFields(self, fields):
+        """Sets the attributes copied to the output and the position of
+        each independent variable among them.
+
+        INPUTS:
+        fields (list): attribute names of the input
+        """
+
+        upperFields = [ name.upper() for name in fields ]
+        positions = []
+        for varName in self.model.indVarNames:
+            if varName.upper() not in upperFields:
+                MSG.addMessage("ERROR", "scoreMissingVar", varName,
+                               self.inputTable)
+                raise SystemExit()
+            positions.append(upperFields.index(varName.upper()))
+        self.fields = fields
+        self.varPositions = positions
+
+    def readChunks(self):
+        """Yields chunks of input rows, each a list of attribute values
+        (after the geometry of a feature class)."""
+
+        if isCSV(self.inputTable):
+            fi = openCSV(self.inputTable, "r")
+            try:
+                reader = CSV.reader(fi)
+                next(reader)
+                while True:
+                    rows = list(ITER.islice(reader, self.chunkSize))
+                    if not rows:
+                        break
+                    yield rows
+            finally:
+                fi.close()
+        else:
+            fieldNames = list(self.fields)
+            if self.hasShape:
+                fieldNames = ["SHAPE@"] + fieldNames
+            with DA.SearchCursor(self.inputTable, fieldNames) as cursor:
+                while True:
+                    rows = list(ITER.islice(cursor, self.chunkSize))
+                    if not rows:
+                        break
+                    yield [ list(row) for row in rows ]
+
+    def createOutput(self):
+        """Creates an output feature class or table shaped like the input,
+        with fields for the predicted values, and returns the fields of
+        its rows."""
+
+        outPath, outName = OS.path.split(self.outputTable)
+        outFields = list(self.fields)
+        if self.hasShape:
+            DM.CreateFeatureclass(outPath, outName, self.desc.shapeType,
+                                  template = self.inputTable,
+                                  spatial_reference =
+                                  self.desc.spatialReference)
+            outFields = ["SHAPE@"] + outFields
+        else:
+            DM.CreateTable(outPath, outName, template = self.inputTable)
+
+        existing = [ f.name.upper() for f in
+                     ARCPY.ListFields(self.outputTable) ]
+        fieldOrder = UTILS.getFieldNames(self.outFieldNames, outPath)
+        for fieldName in fieldOrder:
+            if fieldName.upper() in existing:
+                DM.DeleteField(self.outputTable, fieldName)
+            DM.AddField(self.outputTable, fieldName, "DOUBLE")
+        return outFields + fieldOrder
+
+    def score(self):
+        """Writes the predicted rows to a CSV file, or inserts them into
+        a new feature class or table."""
+
+        if isCSV(self.outputTable):
+            skip = int(self.hasShape)
+            fo = openCSV(self.outputTable, "w")
+            try:
+                writer = CSV.writer(fo)
+                writer.writerow(self.fields + self.outFieldNames)
+                for rows in self.predictChunks():
+                    writer.writerows([ row[skip:] for row in rows ])
+            finally:
+                fo.close()
+        else:
+            outFields = self.createOutput()
+            with DA.InsertCursor(self.outputTable, outFields) as cursor:
+                for rows in self.predictChunks():
+                    for row in rows:
+                        cursor.insertRow(row)
+
+    def predictChunks(self):
+        """Yields each chunk of input rows with its predicted values, and
+        prediction intervals, appended."""
+
+        model = self.model
+        numOut = len(self.outFieldNames)
+        skip = int(self.hasShape)
+        positions = [ skip + pos for pos in self.varPositions ]
+        for rows in self.readChunks():
+            x = NUM.array([ [ toFloat(row[pos]) for pos in positions ]
+                            for row in rows ], dtype = float)
+            bad = ~NUM.isfinite(x).all(1)
+            x[bad] = 0.0
+            results = model.predict(x, confidence = self.confidence)
+            values = NUM.column_stack(results[0:numOut]).tolist()
+
+            #### Null Output Where an Input is Null or Not a Number ####
+            for ind in NUM.where(bad)[0]:
+                values[ind] = [None] * numOut
+            self.numRows += len(rows)
+            self.numBad += int(bad.sum())
+            yield [ row + value for row, value in zip(rows, values) ]
+
+    def report(self):
+        """Reports the model and the # of rows scored."""
+
+        model = self.model
+        MSG.addMessage("INFORMATIVE", "scoredRows", self.numRows,
+                       model.depVarName, ", ".join(model.indVarNames))
+        if self.numBad:
+            MSG.addMessage("WARNING", "scoreNullRows", self.numBad)
+
+if __name__ == '__main__':
+    setupScoreOLS()
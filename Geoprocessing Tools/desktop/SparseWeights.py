@@ -0,0 +1,705 @@
+# coding: utf-8
+"""
+Source Name:   SparseWeights.py
+Description:   Spatial weights held as a compressed sparse row (CSR) matrix,
+               with Global Moran's I for many variables at once, and an
+               on-disk cache of weights keyed by dataset fingerprint.
+"""
+
+################ Imports ####################
+import os as OS
+import hashlib as HASH
+import numpy as NUM
+import VectorStats as VSTATS
+
+################ Constants ####################
+#### Bump When the Stored Arrays Change ####
+cacheVersion = "1"
+
+#### Distances Held at Once by the Nearest Neighbor Searches ####
+neighborBlock = 2**20
+
+#### Relative Gap Below Which Two Distances May Be Tied ####
+tieTolerance = 1e-9
+
+#### Weighted Neighbor Values Held at Once by the Spatial Lag ####
+lagElements = 2**22
+
+############## Helper Functions ##############
+
+def fromNeighborLists(neighbors, weights = None, rowStandard = True):
+    """Returns SparseWeights from the neighbors of each feature.
+
+    INPUTS:
+    neighbors (list): n lists of neighbor indices
+    weights {list, None}: n lists of weights, None for binary weights
+    rowStandard {bool, True}: divide each row by its sum?
+    """
+
+    numNeighs = NUM.array([ len(nhs) for nhs in neighbors ], dtype = int)
+    indptr = NUM.zeros(len(neighbors) + 1, dtype = int)
+    indptr[1:] = NUM.cumsum(numNeighs)
+    indices = NUM.empty(indptr[-1], dtype = int)
+    values = NUM.ones(indptr[-1], dtype = float)
+    for ind, nhs in enumerate(neighbors):
+        start, stop = indptr[ind], indptr[ind + 1]
+        indices[start:stop] = nhs
+        if weights is not None:
+            values[start:stop] = weights[ind]
+
+    return SparseWeights(indptr, indices, values, rowStandard = rowStandard)
+
+def fingerprint(ids, coords, spec):
+    """Returns a hex digest identifying a set of features and a weights
+    specification.
+
+    INPUTS:
+    ids (array): unique IDs of the features, in data order
+    coords (array): n x 2 feature centroids, None if not used
+    spec (list): values describing the weights, E.g. ["GA", 8]
+    """
+
+    digest = HASH.sha1()
+    digest.update(cacheVersion.encode("utf-8"))
+    digest.update(NUM.ascontiguousarray(ids, dtype = float).tobytes())
+    if coords is not None:
+        digest.update(NUM.ascontiguousarray(coords, dtype = float).tobytes())
+    specStr = "|".join([ str(value) for value in spec ])
+    digest.update(specStr.encode("utf-8"))
+    return digest.hexdigest()
+
+def nearestNeighbors(coords, k):
+    """Returns the k nearest neighbors of every point, the point itself
+    excluded, nearest first with ties broken by index.  Searches a SciPy
+    cKDTree when SciPy is installed and the KDTree of this module
+    otherwise.  Both are balanced trees, built in O(n log n), whose
+    leaves hold a bounded number of points however the points are
+    clustered.  Points sharing a location are searched once.
+
+    INPUTS:
+    coords (array): n x 2 point coordinates
+    k (int): # of neighbors, at most n - 1
+
+    RETURN:
+    neighbors (array): n x k point indices
+    """
+
+    coords = NUM.asarray(coords, dtype = float)[:,0:2]
+    n = len(coords)
+    k = min(k, n - 1)
+    if k <= 0:
+        return NUM.empty((n, max(k, 0)), dtype = int)
+
+    #### Points Sorted by Location, Then Index ####
+    order = NUM.lexsort((NUM.arange(n), coords[:,1], coords[:,0]))
+    sortCoords = coords[order]
+    newLocation = NUM.ones(n, dtype = bool)
+    newLocation[1:] = (sortCoords[1:] != sortCoords[:-1]).any(1)
+    if not newLocation.all():
+        return sharedNeighbors(coords, k, order, newLocation)
+
+    return treeNeighbors(coords, k, buildTree(coords))
+
+def buildTree(coords):
+    """Returns a SciPy cKDTree of the points, or a KDTree when SciPy is
+    not installed.
+
+    INPUTS:
+    coords (array): n x 2 point coordinates
+    """
+
+    try:
+        from scipy.spatial import cKDTree
+    except ImportError:
+        return KDTree(coords)
+    return cKDTree(coords)
+
+def nearestCandidates(coords, rows, candidates, num):
+    """Returns the num nearest candidate neighbors of each row, nearest
+    first with ties broken by index, the point itself counted as farthest.
+    Squared distances are taken the same way by both searches so that they
+    agree on ties.
+
+    INPUTS:
+    coords (array): n x 2 point coordinates
+    rows (array): m point indices
+    candidates (array): m x c candidate indices, or c shared by all rows
+    num (int): # of candidates returned, at most c
+
+    RETURN:
+    candidates (array): m x num candidate indices
+    dist2 (array): m x num squared distances, inf for the point itself
+    """
+
+    #### Sorted by Index So Ties Keep the Lowest Index ####
+    if candidates.ndim == 1:
+        candidates = NUM.tile(NUM.sort(candidates), (len(rows), 1))
+    else:
+        candidates = NUM.sort(candidates, axis = 1)
+    diff = coords[candidates] - coords[rows][:,None,:]
+    dist2 = (diff * diff).sum(2)
+    dist2[candidates == rows[:,None]] = NUM.inf
+    rowInds = NUM.arange(len(rows))[:,None]
+
+    #### Select the num Nearest Before Sorting ####
+    if num < dist2.shape[1]:
+        kth = NUM.partition(dist2, num - 1, axis = 1)[:,num-1:num]
+        nearer = dist2 < kth
+        tied = dist2 == kth
+        numTied = num - nearer.sum(1)
+        keep = nearer | (tied & (NUM.cumsum(tied, axis = 1) <=
+                                 numTied[:,None]))
+        cols = NUM.nonzero(keep)[1].reshape(len(rows), num)
+        candidates = candidates[rowInds, cols]
+        dist2 = dist2[rowInds, cols]
+
+    order = NUM.argsort(dist2, axis = 1, kind = "mergesort")
+    return candidates[rowInds, order], dist2[rowInds, order]
+
+def treeNeighbors(coords, k, tree):
+    """Returns the k nearest neighbors of every point from a KD-tree.
+    Each point asks the tree for k + 2 points; when the next point is no
+    farther than the kth, so that a tie may have been cut by the tree,
+    the point asks again for twice as many.  Points are queried in tree
+    order, so each block of queries holds nearby points.
+
+    INPUTS:
+    coords (array): n x 2 point coordinates
+    k (int): # of neighbors, 0 < k < n
+    tree (obj): scipy.spatial.cKDTree or KDTree of coords
+
+    RETURN:
+    neighbors (array): n x k point indices
+    """
+
+    n = len(coords)
+    neighbors = NUM.empty((n, k), dtype = int)
+    pending = NUM.array(tree.indices, dtype = int)
+    numQuery = min(k + 2, n)
+    while len(pending):
+        unresolved = []
+        blockRows = max(neighborBlock // numQuery, 1)
+        for start in range(0, len(pending), blockRows):
+            rows = pending[start:start + blockRows]
+            dist, candidates = tree.query(coords[rows], k = numQuery)
+            candidates, dist2 = nearestCandidates(coords, rows, candidates,
+                                                  min(k + 1, numQuery))
+
+            #### Resolved When the Next Point is Clearly Farther ####
+            if numQuery == n:
+                resolved = NUM.ones(len(rows), dtype = bool)
+            else:
+                resolved = dist2[:,k] > dist2[:,k-1] * (1.0 + tieTolerance)
+            neighbors[rows[resolved]] = candidates[resolved,0:k]
+            unresolved.append(rows[~resolved])
+        pending = NUM.concatenate(unresolved)
+        numQuery = min(2 * numQuery, n)
+
+    return neighbors
+
+def sharedNeighbors(coords, k, order, newLocation):
+    """Returns the k nearest neighbors of every point when some points
+    share a location.  Points at one location are all tied, so rather
+    than resolve those ties point by point, the distinct locations are
+    searched, numbered by their lowest point index so that their ties are
+    broken the same way.  Each location then ranks the points of its
+    nearest locations, at most k + 1 from each, and the k + 1 nearest
+    serve every point at the location.
+
+    INPUTS:
+    coords (array): n x 2 point coordinates
+    k (int): # of neighbors, 0 < k < n
+    order (array): point indices sorted by location, then index
+    newLocation (array): n bools, True where order starts a location
+
+    RETURN:
+    neighbors (array): n x k point indices
+    """
+
+    n = len(coords)
+
+    #### Locations Numbered by Their Lowest Point Index ####
+    groupStarts = NUM.nonzero(newLocation)[0]
+    groupCounts = NUM.diff(NUM.append(groupStarts, n))
+    locOrder = NUM.argsort(order[groupStarts])
+    starts = groupStarts[locOrder]
+    counts = groupCounts[locOrder]
+    numLocs = len(starts)
+    locRank = NUM.empty(numLocs, dtype = int)
+    locRank[locOrder] = NUM.arange(numLocs)
+    pointLocs = NUM.empty(n, dtype = int)
+    pointLocs[order] = locRank[NUM.cumsum(newLocation) - 1]
+    locCoords = coords[order[starts]]
+
+    #### Each Location First, Then Its Nearest Locations ####
+    numNear = min(k, numLocs - 1)
+    candLocs = NUM.arange(numLocs)[:,None]
+    if numNear:
+        nearLocs = treeNeighbors(locCoords, numNear, buildTree(locCoords))
+        candLocs = NUM.hstack((candLocs, nearLocs))
+    diff = locCoords[candLocs] - locCoords[:,None,:]
+    dist2 = (diff * diff).sum(2)
+
+    #### Locations Up to the One Reaching k + 1 Points, With Ties ####
+    take = NUM.minimum(counts[candLocs], k + 1)
+    reach = NUM.argmax(NUM.cumsum(take, axis = 1) >= k + 1, axis = 1)
+    cutoff = dist2[NUM.arange(numLocs), reach]
+    pairRows, pairCols = NUM.nonzero(dist2 <= cutoff[:,None])
+    pairLocs = candLocs[pairRows, pairCols]
+    pairTake = take[pairRows, pairCols]
+
+    #### Points of the Kept Locations, Lowest Indices First ####
+    pairStarts = NUM.cumsum(pairTake) - pairTake
+    within = NUM.arange(pairTake.sum()) - NUM.repeat(pairStarts, pairTake)
+    points = order[NUM.repeat(starts[pairLocs], pairTake) + within]
+    owners = NUM.repeat(pairRows, pairTake)
+    pointDist2 = NUM.repeat(dist2[pairRows, pairCols], pairTake)
+
+    #### k + 1 Nearest of Each Location, Ties Broken by Index ####
+    sortInds = NUM.lexsort((points, pointDist2, owners))
+    ownerStarts = NUM.searchsorted(owners[sortInds], NUM.arange(numLocs))
+    nearest = points[sortInds][ownerStarts[:,None] + NUM.arange(k + 1)]
+
+    #### Each Point Drops Itself, Else the Farthest ####
+    nearest = nearest[pointLocs]
+    isSelf = nearest == NUM.arange(n)[:,None]
+    cols = NUM.argsort(isSelf, axis = 1, kind = "mergesort")[:,0:k]
+    return nearest[NUM.arange(n)[:,None], cols]
+
+def nearestNeighborWeights(coords, k):
+    """Returns row standardized k nearest neighbor SparseWeights.
+
+    INPUTS:
+    coords (array): n x 2 point coordinates
+    k (int): # of neighbors
+    """
+
+    neighbors = nearestNeighbors(coords, k)
+    n, k = neighbors.shape
+    indptr = NUM.arange(0, n * k + 1, k) if k else NUM.zeros(n + 1)
+    return SparseWeights(indptr, neighbors.flatten(), NUM.ones(n * k),
+                         rowStandard = True)
+
+################### Classes ###################
+
+class SparseWeights(object):
+    """n x n spatial weights in compressed sparse row form.  The sums S0,
+    S1 and S2 used by the variance of Moran's I are calculated once.
+
+    INPUTS:
+    indptr (array): n+1 offsets of each row into indices and weights
+    indices (array): column (neighbor) index of each weight
+    weights (array): nonzero weights
+    rowStandard {bool, False}: divide each row by its sum?
+    blockSize {int, 64}: # of variables per sparse-dense product
+    """
+
+    def __init__(self, indptr, indices, weights, rowStandard = False,
+                 blockSize = 64):
+
+        #### Set Initial Attributes ####
+        self.indptr = NUM.asarray(indptr, dtype = int)
+        self.indices = NUM.asarray(indices, dtype = int)
+        self.weights = NUM.array(weights, dtype = float)
+        self.blockSize = blockSize
+        self.n = len(self.indptr) - 1
+        self.numNeighs = NUM.diff(self.indptr)
+        self.rows = NUM.repeat(NUM.arange(self.n), self.numNeighs)
+
+        #### Row Standardize ####
+        if rowStandard:
+            rowSums = NUM.bincount(self.rows, weights = self.weights,
+                                   minlength = self.n)
+            rowSums[rowSums == 0.0] = 1.0
+            self.weights /= rowSums[self.rows]
+
+        self.calculateSums()
+
+    def calculateSums(self):
+        """Calculates S0, S1 and S2 of the weights."""
+
+        n = self.n
+        w = self.weights
+        self.s0 = w.sum()
+
+        #### S1: Squares of w_ij + w_ji ####
+        keys = NUM.concatenate((self.rows * n + self.indices,
+                                self.indices * n + self.rows))
+        uniqueKeys, inverse = NUM.unique(keys, return_inverse = True)
+        pairSums = NUM.bincount(inverse.flatten(),
+                                weights = NUM.concatenate((w, w)))
+        self.s1 = 0.5 * (pairSums**2).sum()
+
+        #### S2: Squares of Row Plus Column Sums ####
+        rowSums = NUM.bincount(self.rows, weights = w, minlength = n)
+        colSums = NUM.bincount(self.indices, weights = w, minlength = n)
+        self.s2 = ((rowSums + colSums)**2).sum()
+
+    def lag(self, values):
+        """Returns the spatial lag W * values.  Columns are lagged in
+        blocks of at most lagElements weighted neighbor values, so memory
+        stays bounded for many neighbors or many variables.
+
+        INPUTS:
+        values (array): n x m values, one variable per column, or n values
+        """
+
+        lagged = NUM.zeros(values.shape, dtype = float)
+        nonEmpty = self.numNeighs > 0
+        if not nonEmpty.any():
+            return lagged
+
+        #### Blocks of Columns Sized by the # of Weights ####
+        columns = values.reshape(self.n, -1)
+        lagColumns = lagged.reshape(self.n, -1)
+        starts = self.indptr[:-1][nonEmpty]
+        blockCols = max(lagElements // len(self.indices), 1)
+        for start in range(0, columns.shape[1], blockCols):
+            block = slice(start, start + blockCols)
+            products = columns[self.indices, block]
+            products *= self.weights[:,None]
+            lagColumns[nonEmpty, block] = NUM.add.reduceat(products, starts,
+                                                           axis = 0)
+        return lagged
+
+    def moransI(self, values):
+        """Global Moran's I under the randomization null hypothesis for
+        each column of values.
+
+        INPUTS:
+        values (array): n x m values (E.g. residuals), or n values
+
+        RETURN:
+        gi (array): m Moran's I indices
+        ei (float): expected index
+        varI (array): m variances of the index
+        zScore (array): m z-scores
+        pVal (array): m two-sided p-values
+        """
+
+        values = NUM.asarray(values, dtype = float)
+        if values.ndim == 1:
+            values = values.reshape(self.n, 1)
+        m = values.shape[1]
+        n = self.n * 1.0
+
+        #### Deviations and Cross-Products, in Blocks of Variables ####
+        z = values - values.mean(0)
+        zz = (z * z).sum(0)
+        z4 = (z**4).sum(0)
+        zwz = NUM.empty(m, dtype = float)
+        for start in range(0, m, self.blockSize):
+            block = z[:,start:start + self.blockSize]
+            zwz[start:start + self.blockSize] = (block *
+                                                 self.lag(block)).sum(0)
+
+        #### Index and Moments ####
+        s0, s1, s2 = self.s0, self.s1, self.s2
+        gi = (n / s0) * (zwz / zz)
+        ei = -1.0 / (n - 1.0)
+        b2 = n * z4 / (zz * zz)
+        A = n * ((n * n - 3.0 * n + 3.0) * s1 - n * s2 + 3.0 * s0 * s0)
+        B = b2 * ((n * n - n) * s1 - 2.0 * n * s2 + 6.0 * s0 * s0)
+        C = (n - 1.0) * (n - 2.0) * (n - 3.0) * s0 * s0
+        varI = (A - B) / C - ei * ei
+
+        #### Significance ####
+        zScore = (gi - ei) / NUM.sqrt(varI)
+        pVal = VSTATS.zProb(zScore, type = 2)
+
+        return gi, ei, varI, zScore, pVal
+
+class KDTree(object):
+    """KD-tree of points in the plane, searched for nearest neighbors
+    when SciPy is not installed.  Each node splits its points at the
+    median along the longer side of their bounding box, so every leaf
+    holds from leafSize / 2 to leafSize points however the points are
+    clustered.  Queries follow scipy.spatial.cKDTree and search all query
+    points at once, level by level, rather than point by point.
+
+    INPUTS:
+    coords (array): n x 2 point coordinates
+    leafSize {int, 16}: most points held by a leaf
+
+    ATTRIBUTES:
+    indices (array): point indices in tree order, each node contiguous
+    """
+
+    def __init__(self, coords, leafSize = 16):
+
+        #### Set Initial Attributes ####
+        self.data = NUM.asarray(coords, dtype = float)
+        self.n = len(self.data)
+        self.leafSize = leafSize
+        self.indices = NUM.arange(self.n)
+
+        #### Nodes in Breadth First Order, Children Next to Each Other ####
+        ranges = [(0, self.n)]
+        lows, highs, axes, splits, children = [], [], [], [], []
+        node = 0
+        while node < len(ranges):
+            start, stop = ranges[node]
+            nodeInds = self.indices[start:stop]
+            points = self.data[nodeInds]
+            low, high = points.min(0), points.max(0)
+            axis = int(NUM.argmax(high - low))
+            lows.append(low)
+            highs.append(high)
+            axes.append(axis)
+            if stop - start > leafSize:
+                half = (stop - start) // 2
+                part = NUM.argpartition(points[:,axis], half)
+                self.indices[start:stop] = nodeInds[part]
+                splits.append(points[part[half], axis])
+                children.append(len(ranges))
+                ranges += [(start, start + half), (start + half, stop)]
+            else:
+                splits.append(0.0)
+                children.append(-1)
+            node += 1
+
+        ranges = NUM.array(ranges, dtype = int)
+        self.sizes = ranges[:,1] - ranges[:,0]
+        self.lows = NUM.array(lows, dtype = float)
+        self.highs = NUM.array(highs, dtype = float)
+        self.axes = NUM.array(axes, dtype = int)
+        self.splits = NUM.array(splits, dtype = float)
+        self.children = NUM.array(children, dtype = int)
+        inner = NUM.nonzero(self.children >= 0)[0]
+        self.parents = NUM.zeros(len(ranges), dtype = int)
+        self.parents[self.children[inner]] = inner
+        self.parents[self.children[inner] + 1] = inner
+
+        #### Points of Each Leaf, Padded With -1, Last Row All Padding ####
+        leaves = NUM.nonzero(self.children < 0)[0]
+        self.leafRows = NUM.empty(len(ranges), dtype = int)
+        self.leafRows[leaves] = NUM.arange(len(leaves))
+        self.leafPoints = NUM.empty((len(leaves) + 1, leafSize), dtype = int)
+        self.leafPoints.fill(-1)
+        counts = self.sizes[leaves]
+        offsets = NUM.cumsum(counts) - counts
+        within = NUM.arange(counts.sum()) - NUM.repeat(offsets, counts)
+        rows = NUM.repeat(NUM.arange(len(leaves)), counts)
+        self.leafPoints[rows, within] = \
+                self.indices[NUM.repeat(ranges[leaves,0], counts) + within]
+
+    def query(self, points, k = 1):
+        """Returns the k nearest points to each query point, nearest
+        first, ties in any order.  Query points are grouped by the leaf
+        they fall in.  Each group reaches as far as the farthest corner of
+        the smallest node around its leaf holding k points, so it searches
+        the points of the leaves within that reach.
+
+        INPUTS:
+        points (array): m x 2 query coordinates
+        k {int, 1}: # of points, at most n
+
+        RETURN:
+        dist (array): m x k distances
+        inds (array): m x k point indices
+        """
+
+        points = NUM.asarray(points, dtype = float)
+        m = len(points)
+        dist2 = NUM.empty((m, k), dtype = float)
+        inds = NUM.empty((m, k), dtype = int)
+        if not m:
+            return dist2, inds
+
+        #### Leaf Holding Each Query Point ####
+        leaves = NUM.zeros(m, dtype = int)
+        rows = NUM.arange(m)
+        while len(rows):
+            nodes = leaves[rows]
+            right = points[rows, self.axes[nodes]] >= self.splits[nodes]
+            leaves[rows] = self.children[nodes] + right
+            rows = rows[self.children[leaves[rows]] >= 0]
+
+        #### Query Points Grouped by Leaf, With Their Bounding Boxes ####
+        order = NUM.argsort(leaves, kind = "mergesort")
+        groupStarts = NUM.nonzero(NUM.diff(leaves[order]))[0] + 1
+        groupStarts = NUM.append(0, groupStarts)
+        groupSizes = NUM.diff(NUM.append(groupStarts, m))
+        numGroups = len(groupStarts)
+        sortPoints = points[order]
+        low = NUM.minimum.reduceat(sortPoints, groupStarts, axis = 0)
+        high = NUM.maximum.reduceat(sortPoints, groupStarts, axis = 0)
+
+        #### Reach: Farthest Corner of the Smallest Node Holding k ####
+        anchors = leaves[order][groupStarts]
+        small = self.sizes[anchors] < k
+        while small.any():
+            anchors[small] = self.parents[anchors[small]]
+            small = self.sizes[anchors] < k
+        far = NUM.maximum(high - self.lows[anchors],
+                          self.highs[anchors] - low)
+        reach2 = (far * far).sum(1) * (1.0 + tieTolerance)
+
+        #### Leaves Within Reach of Each Group, Level by Level ####
+        pairGroups = NUM.arange(numGroups)
+        pairNodes = NUM.zeros(numGroups, dtype = int)
+        leafGroups, leafNodes = [], []
+        while len(pairNodes):
+            gap = NUM.maximum(self.lows[pairNodes] - high[pairGroups],
+                              low[pairGroups] - self.highs[pairNodes])
+            gap = NUM.maximum(gap, 0.0)
+            near = (gap * gap).sum(1) <= reach2[pairGroups]
+            pairGroups, pairNodes = pairGroups[near], pairNodes[near]
+            isLeaf = self.children[pairNodes] < 0
+            leafGroups.append(pairGroups[isLeaf])
+            leafNodes.append(pairNodes[isLeaf])
+            pairGroups = NUM.repeat(pairGroups[~isLeaf], 2)
+            pairNodes = self.children[pairNodes[~isLeaf]][:,None] + [0, 1]
+            pairNodes = pairNodes.flatten()
+        leafGroups = NUM.concatenate(leafGroups)
+        leafNodes = NUM.concatenate(leafNodes)
+        pairOrder = NUM.argsort(leafGroups, kind = "mergesort")
+        groupLeaves = self.leafRows[leafNodes[pairOrder]]
+        numLeaves = NUM.bincount(leafGroups, minlength = numGroups)
+        leafOffsets = NUM.cumsum(numLeaves) - numLeaves
+
+        #### Groups by # of Leaves, in Blocks of neighborBlock Distances ####
+        groupOrder = NUM.argsort(numLeaves, kind = "mergesort")
+        start = 0
+        while start < numGroups:
+            stop = start
+            numPoints = 0
+            while stop < numGroups:
+                numNext = numPoints + groupSizes[groupOrder[stop]]
+                width = numLeaves[groupOrder[stop]] * self.leafSize
+                if stop > start and numNext * width > neighborBlock:
+                    break
+                numPoints = numNext
+                stop += 1
+            blockGroups = groupOrder[start:stop]
+            start = stop
+
+            #### Candidate Points of Each Group, Padded With -1 ####
+            blockLeaves = numLeaves[blockGroups]
+            cols = NUM.arange(blockLeaves.max())
+            valid = cols < blockLeaves[:,None]
+            candLeaves = NUM.empty(valid.shape, dtype = int)
+            candLeaves.fill(len(self.leafPoints) - 1)
+            positions = leafOffsets[blockGroups][:,None] + cols
+            candLeaves[valid] = groupLeaves[positions[valid]]
+            candidates = self.leafPoints[candLeaves].reshape(len(valid), -1)
+
+            #### Query Points of the Block ####
+            sizes = groupSizes[blockGroups]
+            offsets = NUM.cumsum(sizes) - sizes
+            within = NUM.arange(sizes.sum()) - NUM.repeat(offsets, sizes)
+            rows = order[NUM.repeat(groupStarts[blockGroups], sizes) + within]
+            candidates = candidates[NUM.repeat(NUM.arange(len(sizes)), sizes)]
+
+            #### k Nearest Candidates ####
+            diffX = self.data[:,0][candidates] - points[rows,0][:,None]
+            diffY = self.data[:,1][candidates] - points[rows,1][:,None]
+            candDist2 = diffX * diffX + diffY * diffY
+            candDist2[candidates < 0] = NUM.inf
+            rowInds = NUM.arange(len(rows))[:,None]
+            if candDist2.shape[1] > k:
+                keep = NUM.argpartition(candDist2, k - 1, axis = 1)[:,0:k]
+                candidates = candidates[rowInds, keep]
+                candDist2 = candDist2[rowInds, keep]
+            nearest = NUM.argsort(candDist2, axis = 1)
+            dist2[rows] = candDist2[rowInds, nearest]
+            inds[rows] = candidates[rowInds, nearest]
+
+        return NUM.sqrt(dist2), inds
+
+class WeightsCache(object):
+    """Directory of SparseWeights stored as .npz files named by their
+    fingerprint.  Loading a file marks it as recently used; saving evicts
+    the least recently used files once the directory exceeds maxBytes.
+
+    INPUTS:
+    cacheDir (str): path to the cache directory, created when needed
+    maxBytes {int, 512MB}: size bound of the cache directory
+    """
+
+    def __init__(self, cacheDir, maxBytes = 512 * 1024 * 1024):
+
+        #### Set Initial Attributes ####
+        self.cacheDir = cacheDir
+        self.maxBytes = maxBytes
+
+    def filePath(self, key):
+        return OS.path.join(self.cacheDir, key + ".npz")
+
+    def load(self, key):
+        """Returns the cached SparseWeights for key, or None.
+
+        INPUTS:
+        key (str): from fingerprint
+        """
+
+        path = self.filePath(key)
+        if not OS.path.exists(path):
+            return None
+        try:
+            stored = NUM.load(path)
+            try:
+                weights = SparseWeights(stored['indptr'], stored['indices'],
+                                        stored['weights'])
+            finally:
+                stored.close()
+        except Exception:
+            #### Unreadable Entry ####
+            self.remove(path)
+            return None
+
+        #### Most Recently Used ####
+        try:
+            OS.utime(path, None)
+        except OSError:
+            pass
+        return weights
+
+    def save(self, key, weights):
+        """Stores SparseWeights under key and evicts old entries.
+
+        INPUTS:
+        key (str): from fingerprint
+        weights (obj): SparseWeights
+        """
+
+        if not OS.path.isdir(self.cacheDir):
+            OS.makedirs(self.cacheDir)
+
+        #### Write Then Rename So Readers Never See a Partial File ####
+        path = self.filePath(key)
+        tempPath = path + ".%i.tmp" % OS.getpid()
+        fo = open(tempPath, "wb")
+        try:
+            NUM.savez(fo, indptr = weights.indptr, indices = weights.indices,
+                      weights = weights.weights)
+        finally:
+            fo.close()
+        self.remove(path)
+        OS.rename(tempPath, path)
+
+        self.evict()
+
+    def evict(self):
+        """Removes least recently used entries beyond maxBytes."""
+
+        entries = []
+        for fileName in OS.listdir(self.cacheDir):
+            if fileName.endswith(".npz"):
+                path = OS.path.join(self.cacheDir, fileName)
+                info = OS.stat(path)
+                entries.append( (info.st_mtime, info.st_size, path) )
+        entries.sort()
+
+        totalBytes = sum([ size for mtime, size, path in entries ])
+        for mtime, size, path in entries[:-1]:
+            if totalBytes <= self.maxBytes:
+                break
+            self.remove(path)
+            totalBytes -= size
+
+    def remove(self, path):
+        try:
+            OS.remove(path)
+        except OSError:
+            pass
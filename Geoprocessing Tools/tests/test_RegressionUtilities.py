@@ -0,0 +1,372 @@
+# coding: utf-8
+"""
+Source Name:   test_RegressionUtilities.py
+Description:   Tests of the helpers of RegressionUtilities used by the
+               regression tools.  Runs against the desktop tools, or the
+               web tools when REGRESSION_TOOLS is set to web.
+
+Usage:         python -m pytest tests
+"""
+
+################ Imports ####################
+import sys as SYS
+import os as OS
+import itertools as ITER
+import pickle as PICKLE
+import unittest as UNIT
+import numpy as NUM
+import numpy.linalg as LA
+
+here = OS.path.dirname(OS.path.abspath(__file__))
+SYS.path.insert(0, OS.path.join(OS.path.dirname(here),
+                                OS.environ.get("REGRESSION_TOOLS",
+                                               "desktop")))
+import RegressionUtilities as RU
+
+############### Methods ###############
+
+def topItems(values, k):
+    """Returns the k largest values with their positions, ties broken by
+    the earliest position, by sorting the whole sequence."""
+
+    order = NUM.lexsort((NUM.arange(len(values)), -NUM.asarray(values)))
+    return [ (values[ind], ind) for ind in order[0:k] ]
+
+class Result(object):
+    """Stand-in for the OLSResult of a model, with the attributes read by
+    ResultStore."""
+
+    def __init__(self, varNames, rng):
+        k = len(varNames)
+        self.varNames = varNames
+        self.coef = rng.randn(k)
+        self.pVals = rng.rand(k) * .2
+        self.r2 = rng.randint(0, 20) / 20.0
+        self.aic = rng.rand() * 100.0
+        self.looRMSE = rng.rand()
+        self.jb = rng.rand()
+        self.bp = rng.rand()
+        self.maxVIFValue = rng.rand() * 10.0
+        self.miPVal = None
+
+class TopKTest(UNIT.TestCase):
+    """The list kept matches a full sort, and replaying the lists kept
+    for chunks of a sequence, in order, gives the list of the whole."""
+
+    def setUp(self):
+        self.rng = NUM.random.RandomState(3)
+
+    def offerAll(self, values, k, start = 0):
+        top = RU.TopK(k)
+        for ind, value in enumerate(values):
+            top.offer(value, start + ind)
+        return top
+
+    def testRanked(self):
+        for k in [1, 3, 10]:
+            #### Few Distinct Values, So Many Ties ####
+            values = list(self.rng.randint(0, 5, 200) * 1.0)
+            top = self.offerAll(values, k)
+            self.assertEqual(top.ranked(), topItems(values, k))
+            self.assertEqual(top.floor(), top.ranked()[-1][0])
+
+    def testFloor(self):
+        top = RU.TopK(2)
+        self.assertEqual(top.floor(), -NUM.inf)
+        self.assertTrue(top.offer(1.0, "a"))
+        self.assertTrue(top.offer(1.0, "b"))
+        self.assertEqual(top.floor(), 1.0)
+        self.assertFalse(top.offer(1.0, "c"))
+        self.assertTrue(top.offer(2.0, "d"))
+        self.assertEqual(top.ranked(), [(2.0, "d"), (1.0, "a")])
+        self.assertEqual(RU.TopK(0).floor(), NUM.inf)
+        self.assertFalse(RU.TopK(0).offer(1.0, "a"))
+
+    def testChunkReplay(self):
+        values = list(self.rng.randint(0, 8, 500) * 0.5)
+        for k in [1, 3, 7]:
+            for chunkSize in [1, 9, 64, 500]:
+                #### Kept Items of Each Chunk, Offered in Sequence Order ####
+                merged = RU.TopK(k)
+                for start in range(0, len(values), chunkSize):
+                    chunk = values[start:start + chunkSize]
+                    kept = self.offerAll(chunk, k, start = start).ranked()
+                    kept.sort(key = lambda pair: pair[1])
+                    for value, ind in kept:
+                        merged.offer(value, ind)
+                self.assertEqual(merged.ranked(), topItems(values, k))
+
+class RevolvingDoorTest(UNIT.TestCase):
+    """Every combination is visited once, consecutive combinations differ
+    by one item, and any range of ranks starts where it should."""
+
+    def testOrder(self):
+        for n in range(1, 9):
+            for k in range(1, n + 1):
+                combos = list(RU.revolvingDoor(range(n), k))
+                self.assertEqual(sorted(combos),
+                                 list(ITER.combinations(range(n), k)))
+                for prev, combo in zip(combos[0:-1], combos[1:]):
+                    self.assertEqual(len(set(prev) - set(combo)), 1)
+
+    def testRanks(self):
+        items = [ "X%i" % ind for ind in range(9) ]
+        for k in [1, 2, 4, 9]:
+            combos = list(RU.revolvingDoor(items, k))
+            for rank, combo in enumerate(combos):
+                inds = RU.unrankRevolvingDoor(rank, len(items), k)
+                self.assertEqual(tuple([ items[ind] for ind in inds ]),
+                                 combo)
+            for start, stop in [(0, 1), (3, 17), (5, None), (40, 1000)]:
+                self.assertEqual(list(RU.revolvingDoor(items, k, start,
+                                                       stop)),
+                                 combos[start:stop])
+
+class InverseUpdaterTest(UNIT.TestCase):
+    """Inverses reached by rank-one swaps match a fresh inverse, and a
+    singular move leaves no stale inverse behind."""
+
+    def setUp(self):
+        rng = NUM.random.RandomState(7)
+        n = 80
+        x = NUM.ones((n, 9), dtype = float)
+        x[:,1:] = rng.randn(n, 8)
+        x[:,8] = x[:,2] - x[:,5]
+        y = rng.randn(n, 1)
+        self.gram = RU.GramMatrix(x, y)
+
+    def assertInverse(self, updater, variables):
+        slopes = NUM.asarray(variables) - 1
+        cxx = self.gram.cxx[NUM.ix_(slopes, slopes)]
+        self.assertTrue(NUM.allclose(updater.inverse(variables),
+                                     LA.inv(cxx)))
+
+    def testRevolvingDoor(self):
+        for refreshInterval in [3, 50]:
+            updater = RU.InverseUpdater(self.gram,
+                                        refreshInterval = refreshInterval)
+            for combo in RU.revolvingDoor(range(1, 8), 3):
+                self.assertInverse(updater, list(combo))
+
+    def testOtherMoves(self):
+        updater = RU.InverseUpdater(self.gram)
+        for variables in [[1, 2], [2, 1], [2, 3], [1, 4, 6], [4, 6, 7],
+                          [7], [3, 7]]:
+            self.assertInverse(updater, variables)
+
+    def testSingular(self):
+        updater = RU.InverseUpdater(self.gram)
+        self.assertInverse(updater, [1, 2, 5])
+
+        #### Raised, or Left to the Trace Check of the Caller ####
+        try:
+            cxxi = updater.inverse([8, 2, 5])
+            self.assertFalse(0.0 < cxxi.trace() < 1.0e6)
+        except LA.LinAlgError:
+            pass
+
+        #### The Next Swap Does Not Start From It ####
+        self.assertInverse(updater, [1, 2, 5])
+        self.assertInverse(updater, [1, 2, 8])
+
+class ResumeTest(UNIT.TestCase):
+    """Enumeration resumed at any rank, and the search state restored
+    from a pickle, continue as if never stopped."""
+
+    def testCombinations(self):
+        items = [ "X%i" % ind for ind in range(8) ]
+        for k in [1, 3, 8]:
+            combos = list(ITER.combinations(items, k))
+            for start in range(len(combos) + 1):
+                self.assertEqual(list(RU.combinations(items, k, start)),
+                                 combos[start:])
+
+    def testUpdaterPickle(self):
+        rng = NUM.random.RandomState(2)
+        x = NUM.ones((50, 8), dtype = float)
+        x[:,1:] = rng.randn(50, 7)
+        gram = RU.GramMatrix(x, rng.randn(50, 1))
+        combos = [ list(combo) for combo in
+                   RU.revolvingDoor(range(1, 8), 3) ]
+        expected = RU.InverseUpdater(gram, refreshInterval = 4)
+        inverses = [ expected.inverse(combo) for combo in combos ]
+
+        for stop in [1, 6, 20]:
+            updater = RU.InverseUpdater(gram, refreshInterval = 4)
+            for combo in combos[0:stop]:
+                updater.inverse(combo)
+
+            #### Data Arrays Are Not Pickled, the Gram Is Reattached ####
+            restored = PICKLE.loads(PICKLE.dumps(updater))
+            self.assertTrue(restored.gram.x is None)
+            restored.gram = gram
+            for combo, cxxi in zip(combos[stop:], inverses[stop:]):
+                self.assertTrue(NUM.array_equal(restored.inverse(combo),
+                                                cxxi))
+
+    def testTopKPickle(self):
+        rng = NUM.random.RandomState(4)
+        values = list(rng.randint(0, 6, 100) * 1.0)
+        expected = RU.TopK(5)
+        top = RU.TopK(5)
+        for ind, value in enumerate(values):
+            expected.offer(value, ind)
+            if ind == 40:
+                top = PICKLE.loads(PICKLE.dumps(top))
+            top.offer(value, ind)
+        self.assertEqual(top.ranked(), expected.ranked())
+
+class ShardTest(UNIT.TestCase):
+    """Shards are contiguous rank ranges covering every combination once,
+    and merging their result stores and best lists in shard order gives
+    those of a single search."""
+
+    def setUp(self):
+        rng = NUM.random.RandomState(6)
+        self.varNames = [ "X%i" % ind for ind in range(70) ]
+        self.k = 2
+        self.combos = list(ITER.combinations(self.varNames[0:9], self.k))
+        self.results = [ Result(list(combo), rng) for combo in self.combos ]
+
+    def testUnrank(self):
+        for n, k in [(6, 1), (6, 3), (9, 4), (7, 7)]:
+            combos = list(ITER.combinations(range(n), k))
+            for rank, combo in enumerate(combos):
+                self.assertEqual(tuple(RU.unrankCombination(rank, n, k)),
+                                 combo)
+            for numShards in range(1, 8):
+                total = RU.binomial(n, k)
+                sharded = []
+                for shard in range(numShards):
+                    sharded += list(RU.combinations(range(n), k,
+                                        start = total * shard // numShards,
+                                        stop = total * (shard + 1) //
+                                               numShards))
+                self.assertEqual(sharded, combos)
+
+    def fillStore(self, results):
+        store = RU.ResultStore(self.varNames, self.k, size = 2)
+        best = RU.TopK(3)
+        for ind, result in enumerate(results):
+            olsID = str(self.k + 1) + ":" + str(ind)
+            store[olsID] = result
+            best.offer(result.r2, olsID)
+        return store, best
+
+    def testMerge(self):
+        expected, expectedBest = self.fillStore(self.results)
+        numRows = len(expected)
+        for numShards in [1, 2, 5]:
+            merged = RU.ResultStore(self.varNames, self.k)
+            best = RU.TopK(3)
+            offset = 0
+            for shard in range(numShards):
+                start = numRows * shard // numShards
+                stop = numRows * (shard + 1) // numShards
+                store, shardBest = self.fillStore(self.results[start:stop])
+                merged.extend(store, offset)
+
+                #### Best Lists Offered in Model Order, Renumbered ####
+                kept = [ (int(olsID.split(":")[-1]), r2Value)
+                         for r2Value, olsID in shardBest.ranked() ]
+                for modelInd, r2Value in sorted(kept):
+                    best.offer(r2Value, str(self.k + 1) + ":" +
+                               str(offset + modelInd))
+                offset += len(store)
+
+            self.assertEqual(len(merged), numRows)
+            self.assertTrue(NUM.array_equal(merged.column('model'),
+                                            NUM.arange(numRows)))
+            for name in ['mask', 'r2', 'aic', 'loo', 'jb', 'bp', 'maxVIF',
+                         'codes']:
+                self.assertTrue(NUM.array_equal(merged.column(name),
+                                                expected.column(name)))
+            for ind, combo in enumerate(self.combos):
+                olsID = str(self.k + 1) + ":" + str(ind)
+                self.assertEqual(merged.varNames(merged.rowIndex[olsID]),
+                                 list(combo))
+            self.assertEqual(best.ranked(), expectedBest.ranked())
+
+class VarianceInflationTest(UNIT.TestCase):
+    """VIF from the inverse of X'X, and from the Gram matrix for one
+    model or a batch, is 1 / (1 - R2) of each variable regressed on the
+    others."""
+
+    def testAuxiliaryR2(self):
+        rng = NUM.random.RandomState(8)
+        n = 60
+        x = NUM.ones((n, 6), dtype = float)
+        x[:,1:] = rng.randn(n, 5) * [1.0, 100.0, 0.01, 1.0, 1.0] + 50.0
+        x[:,4] = 3.0 * x[:,1] + 0.05 * rng.randn(n)
+        gram = RU.GramMatrix(x, rng.randn(n, 1))
+
+        expected = []
+        for j in range(1, 6):
+            others = [ col for col in range(6) if col != j ]
+            coef = LA.lstsq(x[:,others], x[:,j], rcond = None)[0]
+            e = x[:,j] - NUM.dot(x[:,others], coef)
+            dev = x[:,j] - x[:,j].mean()
+            expected.append(NUM.dot(dev, dev) / NUM.dot(e, e))
+        expected = NUM.array(expected)
+        self.assertTrue(expected[3] > 100.0)
+
+        xxi = LA.inv(NUM.dot(x.T, x))
+        self.assertTrue(NUM.allclose(RU.varianceInflation(x, xxi),
+                                     expected))
+        columns = list(range(6))
+        self.assertTrue(NUM.allclose(gram.solve(columns)[-1], expected))
+        combos = NUM.array([[1, 2, 3, 4, 5], [2, 4, 1, 5, 3]])
+        vif = gram.solveBatch(combos)[4]
+        self.assertTrue(NUM.allclose(vif[0], expected))
+        self.assertTrue(NUM.allclose(vif[1], expected[combos[1] - 1]))
+
+class LeaveOneOutTest(UNIT.TestCase):
+    """Leverages and leave-one-out residuals from one fit match n
+    refits, each leaving one observation out."""
+
+    def setUp(self):
+        rng = NUM.random.RandomState(9)
+        n = 30
+        self.x = NUM.ones((n, 4), dtype = float)
+        self.x[:,1:] = rng.randn(n, 3)
+        self.x[0,1] = 25.0
+        self.y = NUM.dot(self.x, [1.0, 2.0, 0.0, -1.0]) + rng.randn(n)
+
+    def fit(self, x, y):
+        xxi = LA.inv(NUM.dot(x.T, x))
+        return xxi, y - NUM.dot(x, NUM.dot(xxi, NUM.dot(x.T, y)))
+
+    def testRefits(self):
+        x, y = self.x, self.y
+        n = len(y)
+        xxi, residuals = self.fit(x, y)
+        leverage = RU.hatDiagonal(x, xxi)
+        self.assertTrue(NUM.allclose(leverage,
+                                     NUM.dot(x, NUM.dot(xxi, x.T)).diagonal()))
+        self.assertTrue(NUM.allclose(leverage.sum(), x.shape[1]))
+
+        looResiduals = []
+        for ind in range(n):
+            keep = NUM.arange(n) != ind
+            coef = LA.lstsq(x[keep], y[keep], rcond = None)[0]
+            looResiduals.append(y[ind] - NUM.dot(x[ind], coef))
+        looResiduals = NUM.array(looResiduals)
+        press = NUM.dot(looResiduals, looResiduals)
+
+        for shared in [None, leverage]:
+            result = RU.leaveOneOut(x, xxi, residuals.reshape(n, 1),
+                                    leverage = shared)
+            self.assertTrue(NUM.allclose(result,
+                                         [press, NUM.sqrt(press / n)]))
+
+    def testLeverageOne(self):
+        #### An Indicator Column Fits Its Observation Exactly ####
+        x = NUM.column_stack((self.x, NUM.zeros(len(self.y))))
+        x[4,-1] = 1.0
+        xxi, residuals = self.fit(x, self.y)
+        self.assertTrue(NUM.allclose(RU.hatDiagonal(x, xxi)[4], 1.0))
+        press, looRMSE = RU.leaveOneOut(x, xxi, residuals)
+        self.assertTrue(NUM.isnan(press) and NUM.isnan(looRMSE))
+
+if __name__ == '__main__':
+    UNIT.main()
@@ -0,0 +1,185 @@
+# coding: utf-8
+"""
+Source Name:   test_SparseWeights.py
+Description:   Tests of the nearest neighbor searches, spatial lag and
+               Moran's I of SparseWeights.
+               Runs against the desktop tools, or the web tools when
+               REGRESSION_TOOLS is set to web.
+
+Usage:         python -m pytest tests
+"""
+
+################ Imports ####################
+import sys as SYS
+import os as OS
+import itertools as ITER
+import unittest as UNIT
+import numpy as NUM
+
+here = OS.path.dirname(OS.path.abspath(__file__))
+SYS.path.insert(0, OS.path.join(OS.path.dirname(here),
+                                OS.environ.get("REGRESSION_TOOLS",
+                                               "desktop")))
+import SparseWeights as SW
+
+try:
+    from scipy.spatial import cKDTree
+except ImportError:
+    cKDTree = None
+
+############### Methods ###############
+
+def bruteNeighbors(coords, k):
+    """Returns the k nearest neighbors of every point, nearest first with
+    ties broken by index, from all n x n distances."""
+
+    n = len(coords)
+    diff = coords[:,None,:] - coords[None,:,:]
+    dist2 = (diff * diff).sum(2)
+    NUM.fill_diagonal(dist2, NUM.inf)
+    inds = NUM.tile(NUM.arange(n), (n, 1))
+    return NUM.lexsort((inds, dist2))[:,0:k]
+
+class NearestNeighborsTest(UNIT.TestCase):
+    """The full search and each tree alone agree with brute force."""
+
+    def setUp(self):
+        self.rng = NUM.random.RandomState(5)
+
+    def assertNeighbors(self, coords, k):
+        expected = bruteNeighbors(coords, k)
+        found = [SW.nearestNeighbors(coords, k),
+                 SW.treeNeighbors(coords, k, SW.KDTree(coords)),
+                 SW.treeNeighbors(coords, k, SW.KDTree(coords,
+                                                       leafSize = 4))]
+        if cKDTree is not None:
+            found.append(SW.treeNeighbors(coords, k, cKDTree(coords)))
+        for neighbors in found:
+            self.assertTrue(NUM.array_equal(neighbors, expected))
+
+    def testRandom(self):
+        for n, k in [(50, 1), (300, 8), (1000, 12)]:
+            self.assertNeighbors(self.rng.rand(n, 2), k)
+
+    def testClustered(self):
+        #### Tight Cluster Plus Far Points, and Several Clusters ####
+        coords = NUM.vstack((self.rng.rand(495, 2) * 1e-6,
+                             self.rng.rand(5, 2) * 1e4))
+        self.assertNeighbors(coords, 8)
+        centers = self.rng.rand(6, 2) * 100.0
+        coords = centers[self.rng.randint(0, 6, 400)] + \
+                 self.rng.randn(400, 2) * 1e-3
+        self.assertNeighbors(coords, 10)
+
+    def testSkewed(self):
+        self.assertNeighbors(self.rng.rand(400, 2) * [1e6, 1e-3], 6)
+        x = self.rng.rand(300)
+        self.assertNeighbors(NUM.column_stack((x, 2.0 * x + 1.0)), 5)
+
+    def testDuplicate(self):
+        #### Few Locations Shared by Many Points ####
+        for n, k in [(200, 3), (300, 30), (60, 59)]:
+            coords = NUM.round(self.rng.rand(n, 2) * 3.0)
+            self.assertNeighbors(coords, k)
+        self.assertNeighbors(NUM.zeros((40, 2)) + 3.0, 7)
+
+    def testGridded(self):
+        inds = NUM.arange(300)
+        coords = NUM.column_stack((inds % 17, inds // 17)).astype(float)
+        self.assertNeighbors(coords, 8)
+
+    def testSmall(self):
+        for n in range(2, 10):
+            for k in range(1, n):
+                self.assertNeighbors(self.rng.rand(n, 2), k)
+                self.assertNeighbors(NUM.round(self.rng.rand(n, 2)), k)
+
+    def testTooMany(self):
+        #### k Above n - 1 is Reduced, n = 1 Has No Neighbors ####
+        coords = self.rng.rand(5, 2)
+        self.assertEqual(SW.nearestNeighbors(coords, 9).shape, (5, 4))
+        self.assertEqual(SW.nearestNeighbors(coords[0:1], 3).shape, (1, 0))
+
+    def testWeights(self):
+        coords = self.rng.rand(60, 2)
+        weights = SW.nearestNeighborWeights(coords, 4)
+        self.assertTrue(NUM.array_equal(weights.indices,
+                                        bruteNeighbors(coords, 4).flatten()))
+        self.assertTrue(NUM.allclose(weights.weights, 0.25))
+
+def denseWeights(weights):
+    """Returns the n x n matrix of SparseWeights."""
+
+    dense = NUM.zeros((weights.n, weights.n), dtype = float)
+    NUM.add.at(dense, (weights.rows, weights.indices), weights.weights)
+    return dense
+
+class MoransITest(UNIT.TestCase):
+    """The spatial lag matches the dense product, and the moments of
+    Moran's I match those over every permutation of the values."""
+
+    def setUp(self):
+        self.rng = NUM.random.RandomState(11)
+
+    def randomWeights(self, n, rowStandard = True):
+        #### Asymmetric Weights, Some Features Without Neighbors ####
+        neighbors = []
+        values = []
+        for ind in range(n):
+            numNeighs = self.rng.randint(0, 4) if ind % 5 else 0
+            others = [ other for other in range(n) if other != ind ]
+            nhs = list(self.rng.permutation(others)[0:numNeighs])
+            neighbors.append(nhs)
+            values.append(list(self.rng.rand(len(nhs)) + 0.5))
+        return SW.fromNeighborLists(neighbors, values,
+                                    rowStandard = rowStandard)
+
+    def testLag(self):
+        weights = self.randomWeights(40)
+        dense = denseWeights(weights)
+        values = self.rng.randn(40, 7)
+        self.assertTrue(NUM.allclose(weights.lag(values),
+                                     NUM.dot(dense, values)))
+        self.assertTrue(NUM.allclose(weights.lag(values[:,0]),
+                                     NUM.dot(dense, values[:,0])))
+
+        #### Columns Lagged a Few at a Time ####
+        lagElements = SW.lagElements
+        try:
+            SW.lagElements = 2 * len(weights.indices)
+            self.assertTrue(NUM.allclose(weights.lag(values),
+                                         NUM.dot(dense, values)))
+        finally:
+            SW.lagElements = lagElements
+
+    def testPermutationMoments(self):
+        #### Randomization Moments Are Those Over All n! Orders ####
+        n = 7
+        for rowStandard in [True, False]:
+            weights = self.randomWeights(n, rowStandard = rowStandard)
+            values = self.rng.randn(n)
+            perms = NUM.array(list(ITER.permutations(range(n))))
+            gi, ei, varI, zScore, pVal = weights.moransI(values[perms].T)
+            self.assertTrue(NUM.allclose(gi.mean(), ei))
+            self.assertTrue(NUM.allclose(gi.var(), varI[0]))
+            self.assertTrue(NUM.allclose(varI, varI[0]))
+
+    def testColumns(self):
+        weights = self.randomWeights(60)
+        values = self.rng.randn(60, 10)
+        values[:,3] += NUM.dot(denseWeights(weights), values[:,3]) * 3.0
+        together = weights.moransI(values)
+        weights.blockSize = 3
+        blocked = weights.moransI(values)
+        for col in range(10):
+            gi, ei, varI, zScore, pVal = weights.moransI(values[:,col])
+            single = [gi[0], ei, varI[0], zScore[0], pVal[0]]
+            for stats in [together, blocked]:
+                gi, ei, varI, zScore, pVal = stats
+                self.assertTrue(NUM.allclose([gi[col], ei, varI[col],
+                                              zScore[col], pVal[col]],
+                                             single))
+        self.assertTrue(together[0][3] > 0.0 and together[-1][3] < .01)
+
+if __name__ == '__main__':
+    UNIT.main()
@@ -0,0 +1,145 @@
+# coding: utf-8
+"""
+Source Name:   test_VectorStats.py
+Description:   Tests of the tail probabilities of VectorStats against closed
+               forms, and against SciPy when it is installed.  Runs
+               against the desktop tools, or the web tools when
+               REGRESSION_TOOLS is set to web.
+
+Usage:         python -m pytest tests
+"""
+
+################ Imports ####################
+import sys as SYS
+import os as OS
+import math as MATH
+import unittest as UNIT
+import numpy as NUM
+
+here = OS.path.dirname(OS.path.abspath(__file__))
+SYS.path.insert(0, OS.path.join(OS.path.dirname(here),
+                                OS.environ.get("REGRESSION_TOOLS",
+                                               "desktop")))
+import VectorStats as VSTATS
+
+try:
+    import scipy.stats as SSTATS
+except ImportError:
+    SSTATS = None
+
+############### Methods ###############
+
+def chiUpperEven(chi, dof):
+    """Returns the right tail of the chi-square distribution for an even
+    dof, exp(-x) * sum(x**j / j!) for j < dof / 2 and x = chi / 2."""
+
+    x = chi / 2.0
+    return sum([ NUM.exp(-x) * x**j / MATH.factorial(j)
+                 for j in range(dof // 2) ])
+
+class DistributionTest(UNIT.TestCase):
+    """Each tail matches a closed form to a relative tolerance, far into
+    the tails where an absolute one would pass anything."""
+
+    def setUp(self):
+        self.stats = NUM.array([0.0, 1e-8, 0.3, 1.0, 2.5, 7.0, 40.0, 1e3,
+                                1e6])
+
+    def assertRelative(self, values, expected, rTol = 1e-10):
+        values = NUM.asarray(values, dtype = float)
+        expected = NUM.asarray(expected, dtype = float)
+        self.assertEqual(values.shape, expected.shape)
+        self.assertTrue(NUM.allclose(values, expected, rtol = rTol,
+                                     atol = 0.0), (values, expected))
+
+    def testT(self):
+        t = NUM.concatenate((-self.stats[::-1], self.stats))
+
+        #### Cauchy (1 dof) and 2 dof Have Closed Forms ####
+        right1 = 0.5 - NUM.arctan(t) / NUM.pi
+        right1[t > 0.0] = NUM.arctan(1.0 / t[t > 0.0]) / NUM.pi
+        right2 = 0.5 - t / (2.0 * NUM.sqrt(2.0 + t * t))
+        right2[t > 0.0] = 1.0 / (NUM.sqrt(2.0 + t[t > 0.0]**2) *
+                                 (NUM.sqrt(2.0 + t[t > 0.0]**2) +
+                                  t[t > 0.0]))
+        for dof, right in [(1, right1), (2, right2)]:
+            self.assertRelative(VSTATS.tProb(t, dof, type = 1), right)
+            self.assertRelative(VSTATS.tProb(t, dof), right[::-1])
+            twoSided = 2.0 * NUM.minimum(right, right[::-1])
+            self.assertRelative(VSTATS.tProb(t, dof, type = 2), twoSided)
+
+        #### Tends to the Normal ####
+        z = NUM.linspace(-5.0, 5.0, 21)
+        self.assertRelative(VSTATS.tProb(z, 1e8, type = 2),
+                            VSTATS.zProb(z, type = 2), rTol = 1e-5)
+
+    def testChi(self):
+        chi = self.stats[self.stats < 1e3]
+        for dof in [2, 4, 10, 30]:
+            upper = chiUpperEven(chi, dof)
+            self.assertRelative(VSTATS.chiProb(chi, dof, type = 1), upper)
+            self.assertRelative(VSTATS.chiProb(chi, dof)[upper < .5],
+                                1.0 - upper[upper < .5])
+
+        #### 1 dof Is the Square of a Normal ####
+        z = NUM.array([0.1, 1.0, 3.0, 8.0, 20.0])
+        self.assertRelative(VSTATS.chiProb(z * z, 1, type = 1),
+                            VSTATS.zProb(z, type = 2))
+
+    def testF(self):
+        f = self.stats
+        for dof2 in [1, 3, 20, 500]:
+            #### 2 Numerator dof Has a Closed Form ####
+            right = (1.0 + 2.0 * f / dof2) ** (-dof2 / 2.0)
+            self.assertRelative(VSTATS.fProb(f, 2, dof2, type = 1), right)
+            self.assertRelative(VSTATS.fProb(f, 2, dof2)[right < .5],
+                                1.0 - right[right < .5])
+
+            #### 1 Numerator dof Is the Square of a t ####
+            t = NUM.sqrt(f)
+            self.assertRelative(VSTATS.fProb(f, 1, dof2, type = 1),
+                                VSTATS.tProb(t, dof2, type = 2))
+
+    def testZ(self):
+        z = NUM.concatenate((-self.stats[::-1], self.stats))
+        right = NUM.array([ 0.5 * MATH.erfc(v / MATH.sqrt(2.0))
+                            for v in z ])
+        self.assertRelative(VSTATS.zProb(z, type = 1), right)
+        self.assertRelative(VSTATS.zProb(z), right[::-1])
+        self.assertRelative(VSTATS.zProb(z.reshape(2, -1), type = 2),
+                            2.0 * NUM.minimum(right,
+                                              right[::-1]).reshape(2, -1))
+
+    def testBroadcastAndNaN(self):
+        t = NUM.array([[0.5, NUM.nan], [2.0, 3.0]])
+        dof = NUM.array([3.0, 12.0])
+        probs = VSTATS.tProb(t, dof, type = 2)
+        self.assertEqual(probs.shape, (2, 2))
+        self.assertTrue(NUM.isnan(probs[0, 1]))
+        self.assertRelative(probs[1], [VSTATS.tProb(2.0, 3.0, type = 2),
+                                       VSTATS.tProb(3.0, 12.0, type = 2)])
+        self.assertTrue(NUM.isnan(VSTATS.chiProb(NUM.nan, 3.0)))
+        self.assertTrue(NUM.isnan(VSTATS.fProb(NUM.nan, 2.0, 3.0)))
+        self.assertTrue(NUM.isnan(VSTATS.zProb(NUM.nan)))
+
+    def testTInverse(self):
+        probs = NUM.array([1e-12, 1e-4, .025, .5, .9, .999999])
+        for dof in [1, 3, 30, 1000]:
+            t = VSTATS.tInverse(probs, dof)
+            self.assertRelative(VSTATS.tProb(t, dof), probs, rTol = 1e-9)
+
+    @UNIT.skipIf(SSTATS is None, "SciPy is not installed")
+    def testSciPy(self):
+        rng = NUM.random.RandomState(1)
+        stats = NUM.exp(rng.uniform(-6.0, 5.0, 200))
+        dof1 = rng.randint(1, 40, 200) * 1.0
+        dof2 = NUM.exp(rng.uniform(0.0, 9.0, 200)).round() + 1.0
+        self.assertRelative(VSTATS.tProb(stats, dof2, type = 1),
+                            SSTATS.t.sf(stats, dof2), rTol = 1e-9)
+        self.assertRelative(VSTATS.chiProb(stats, dof1, type = 1),
+                            SSTATS.chi2.sf(stats, dof1), rTol = 1e-9)
+        self.assertRelative(VSTATS.fProb(stats, dof1, dof2, type = 1),
+                            SSTATS.f.sf(stats, dof1, dof2), rTol = 1e-9)
+
+if __name__ == '__main__':
+    UNIT.main()
@@ -10,6 +10,9 @@ Author:        Environmental Systems Research Institute Inc.
 import sys as SYS
 import copy as COPY
 import os as OS
+import time as TIME
+import pickle as PICKLE
+import hashlib as HASH
 import collections as COLL
 import operator as OP
 import locale as LOCALE
@@ -23,20 +26,62 @@ import ErrorUtils as ERROR
 import SSDataObject as SSDO
 import SSUtilities as UTILS
 import Stats as STATS
-import MoransI_Step as GI
-import WeightsUtilities as WU
-import gapy as GAPY
+import VectorStats as VSTATS
+import RegressionUtilities as RU
+import SparseWeights as SW
+import RegressionMessages as MSG
 import itertools as ITER
 import locale as LOCALE
 LOCALE.setlocale(LOCALE.LC_ALL, '')
 
+#### MoransI_Step, WeightsUtilities and multiprocessing Are Imported ####
+#### Where Used, Keeping Tool Start Fast ####
+
 ################ Output Field Names #################
 erFieldNames = ["RunID", "AdjR2", "AICc", "JB",
                 "K_BP", "MaxVIF", "SA", "NumVars"]
 
+#### Slack on R2 Bounds for Rounding in the Pruned Search ####
+pruneTolerance = 1.0e-10
+
+#### Seeds of the Pruning Floor Stay Well Clear of Multicollinearity ####
+seedMinSV = 1.0e-6
+seedMaxVIF = 100.0
+
+#### Largest trace((X'X)^-1) Skipping the Singular Value Check ####
+maxInverseTrace = 1.0e6
+
+#### # of Queued Residual Vectors Triggering a Bulk Moran's I ####
+moranQueueSize = 256
+
+#### Residual Values Held at Once by the Batched Diagnostics ####
+batchElements = 2**22
+
+#### Size Bound of the Spatial Weights Cache ####
+weightsCacheBytes = 512 * 1024 * 1024
+
+#### Seconds Between Checkpoints of the Search ####
+checkpointInterval = 300.0
+
+#### Bump When the Checkpointed State Changes ####
+checkpointVersion = "5"
+
+#### Accumulated Search Results Saved in a Checkpoint ####
+checkpointNames = ["sumRuns", "sumDiagRuns", "sumSkipped", "sumGI",
+                   "boolGI", "boolResults", "globalVifVals", "vifVarCount",
+                   "bestJB", "perfectMultiWarnBool", "neighborWarn",
+                   "warnedTProb", "resultDict", "reportParts",
+                   "modelCounts", "perfectMultiDict"]
+
+#### Settings a Shard Merge Needs to Report ####
+shardSettingNames = ["dependentVar", "independentVars", "minIndVars",
+                     "maxIndVars", "minR2", "maxCoef", "maxVIF", "minJB",
+                     "minMI", "allMIPass", "weightsType", "engine",
+                     "prune", "numBest", "printVIF"]
+
 ############## Helper Functions ##############
 
-masterJustify = ["right"] * 6 + ["left"]
+masterJustify = ["right"] * 7 + ["left"]
 
 def returnPerc(numer, denom):
     if numer == 0:
@@ -46,11 +91,56 @@ def returnPerc(numer, denom):
 
 def runMoransI(ssdo, residuals, weightsMatrix, weightsType = "SWM",
                silent = True):
+    import MoransI_Step as GI
     mi = GI.GlobalI_Step(ssdo, residuals, weightsMatrix,
                          weightsType = weightsType,
                          silent = silent)
     return mi
 
+def buildMoranWeights(ssdo, weightsMatrix, weightsType = "SWM",
+                      numNeighs = 8):
+    """Reads the spatial weights used for Moran's I once into a sparse
+    matrix, from an SWM file or a text weights dictionary, or builds
+    k nearest neighbor weights from the feature centroids.
+
+    INPUTS:
+    ssdo (obj): instance of SSDataObject
+    weightsMatrix (obj): SWM path, text weights dictionary or None
+    weightsType {str, SWM}: SWM, GWT or GA
+    numNeighs {int, 8}: # of nearest neighbors for GA
+    """
+
+    if weightsType == "GA":
+        return SW.nearestNeighborWeights(ssdo.xyCoords, numNeighs)
+
+    n = ssdo.numObs
+    neighbors = [ [] for i in UTILS.ssRange(n) ]
+    weights = [ [] for i in UTILS.ssRange(n) ]
+    if weightsType == "SWM":
+        #### Stored Weights Are Already Standardized ####
+        rowStandard = False
+        master2Order = ssdo.master2Order
+        import WeightsUtilities as WU
+        swm = WU.SWMReader(weightsMatrix)
+        for row in UTILS.ssRange(swm.numObs):
+            masterID, nn, nhs, nhWeights, sumUnstandard = swm.swm.readEntry()
+            if masterID in master2Order:
+                orderID = master2Order[masterID]
+                for nh, weight in zip(nhs, nhWeights):
+                    if nh in master2Order:
+                        neighbors[orderID].append(master2Order[nh])
+                        weights[orderID].append(weight)
+        swm.close()
+    else:
+        rowStandard = True
+        for orderID, nhWeights in UTILS.iteritems(weightsMatrix):
+            for nh, weight in UTILS.iteritems(nhWeights):
+                neighbors[orderID].append(nh)
+                weights[orderID].append(weight)
+
+    return SW.fromNeighborLists(neighbors, weights = weights,
+                                rowStandard = rowStandard)
+
 def nChooseK(n, k):
     top = MATH.factorial(n)
     left = MATH.factorial(k)
@@ -63,6 +153,27 @@ def inSameCombo(n, k):
     right = MATH.factorial(n - k)
     return (top * 1.0) / (left * right)
 
+def comboChunks(comboGenerator, chunkSize):
+    """Yields (m x c) arrays of consecutive combinations."""
+    while True:
+        chunk = list(ITER.islice(comboGenerator, chunkSize))
+        if not len(chunk):
+            break
+        yield NUM.array(chunk, dtype = int)
+
+################ Parallel Workers ################
+
+def initSearchWorker(sharedX, shape, state):
+    """Sets up a worker process with a read-only view of the shared
+    design matrix."""
+    global searchWorker
+    searchWorker = SearchWorker(sharedX, shape, state)
+
+def runSearchChunk(task):
+    """Fits a chunk of combinations in a worker process."""
+    choose, combos = task
+    return searchWorker.runChunk(choose, combos)
+
 ################ Interfaces ##################
 
 def runExploratoryRegression():
@@ -89,6 +200,38 @@ def runExploratoryRegression():
     minJB = UTILS.getNumericParameter(10)
     minMI = UTILS.getNumericParameter(11)
 
+    #### Model Fitting Engine (STANDARD, GRAM, BATCH or UPDATE) ####
+    engine = UTILS.getTextParameter(12)
+    if engine is None:
+        engine = "STANDARD"
+
+    #### Number of Worker Processes ####
+    numWorkers = UTILS.getNumericParameter(13)
+    if numWorkers is None:
+        numWorkers = 1
+
+    #### Skip Combinations That Can Not Reach Min R2 ####
+    prune = ARCPY.GetParameter(14) == True
+
+    #### Checkpoint File, Resume an Interrupted Search From It ####
+    checkpointFile = UTILS.getTextParameter(15)
+    resume = ARCPY.GetParameter(16) == True
+
+    #### Search One Shard of the Combinations ####
+    numShards = UTILS.getNumericParameter(17)
+    if numShards is None:
+        numShards = 1
+    shardIndex = UTILS.getNumericParameter(18)
+    if shardIndex is None:
+        shardIndex = 0
+    shardFile = UTILS.getTextParameter(19)
+
+    #### Search Budget in Seconds or Models, Most Promising First ####
+    maxSeconds = UTILS.getNumericParameter(20)
+    maxModels = UTILS.getNumericParameter(21)
+    if maxModels is not None:
+        maxModels = int(maxModels)
+
     #### Create a Spatial Stats Data Object (SSDO) ####
     ssdo = SSDO.SSDataObject(inputFC)
 
@@ -116,6 +259,13 @@ def runExploratoryRegression():
         ARCPY.AddIDMessage("ERROR", 737)
         raise SystemExit()
 
+    #### A Budget Replaces the Range of the # of Variables ####
+    if maxSeconds is not None or maxModels is not None:
+        if maxIndVars is None:
+            maxIndVars = len(independentVars)
+        if minIndVars is None:
+            minIndVars = 1
+
     #### Obtain Data ####
     allVars = [dependentVar] + independentVars
 
@@ -135,7 +285,16 @@ def runExploratoryRegression():
                       minIndVars = minIndVars,
              minR2 = minR2, maxCoef = maxCoef,
                maxVIF = maxVIF, minJB = minJB,
-                                minMI = minMI)
+                  minMI = minMI, engine = engine,
+                                numWorkers = int(numWorkers),
+                                                prune = prune,
+                              checkpointFile = checkpointFile,
+                                              resume = resume,
+                                   numShards = int(numShards),
+                                  shardIndex = int(shardIndex),
+                                        shardFile = shardFile,
+                                      maxSeconds = maxSeconds,
+                                        maxModels = maxModels)
 
     #### Send Derived Output back to the tool ####
     ARCPY.SetParameterAsText(4, outputReportFile)
@@ -143,15 +302,19 @@ def runExploratoryRegression():
 ################## Classes ###################
 
 class ResultHandler(object):
-    """Handles result information for Exploratory Regression."""
+    """Handles result information for Exploratory Regression.  Residuals
+    are not kept for the best R2 models; residualFunc recomputes them for
+    the final list when Moran's I is run."""
 
     def __init__(self, allVarNames, numChoose, ssdo,
                  weightMatrix, weightsType = "SWM",
                  minR2 = .5, maxCoef = .01, maxVIF = 5.0,
-                 minJB = .1, minMI = .1, silent = False):
+                 minJB = .1, minMI = .1, silent = False,
+                 moranWeights = None, numBest = 3, residualFunc = None):
 
         #### Set Initial Attributes ####
         UTILS.assignClassAttr(self, locals())
+        self.moranQueue = []
 
         #### Set Label ####
         self.numVars = len(self.allVarNames)
@@ -163,23 +326,102 @@ class ResultHandler(object):
             self.eachAppears = nChooseK(self.numVars - 2, numChoose - 2)
 
         #### Set Result Structures ####
+        self.createTallies()
+        self.allMIPass = UTILS.compareFloat(0.0, self.minMI, rTol = .00000001)
+        self.olsResults = ResultStore(self.allVarNames, numChoose,
+                                      allMIPass = self.allMIPass)
+        self.bestR2 = RU.TopK(numBest)
+        self.passBools = []
+        self.miVals = []
+
+        #### Models Given Moran's I Only for Being in the Best R2 List ####
+        self.survivorMI = []
+
+    def __getstate__(self):
+        """Drops the data object, spatial weights and residual function;
+        they are reattached when a checkpoint is loaded."""
+        state = self.__dict__.copy()
+        for name in ["ssdo", "weightMatrix", "moranWeights", "residualFunc"]:
+            state[name] = None
+        return state
+
+    def createTallies(self):
+        """Creates the order independent result structures."""
+
         self.varSignDict = {}
         self.signDict = {}
         self.vifDict = {}
-        for varName in self.allVarNames:
+        self.varIndex = {}
+        for ind, varName in enumerate(self.allVarNames):
             self.varSignDict[varName] = [0, 0]
             self.signDict[varName] = [0, 0]
-            self.vifDict[varName] = [0, []]
+            self.vifDict[varName] = [0]
+            self.varIndex[varName] = ind
+
+        #### Times Each Pair of Variables Violated VIF Together ####
+        self.vifPairs = NUM.zeros((self.numVars, self.numVars), dtype = int)
 
-        self.olsResults = {}
-        self.bestR2Vals = []
-        self.bestR2Res = []
         self.passTable = []
-        self.passBools = []
-        self.r2Residuals = NUM.empty((self.ssdo.numObs, 3), dtype = float)
         self.allJBPass = UTILS.compareFloat(0.0, self.minJB, rTol = .00000001)
-        self.allMIPass = UTILS.compareFloat(0.0, self.minMI, rTol = .00000001)
-        self.miVals = []
+
+    def mergeTallies(self, tallies, offset):
+        """Adds the order independent results of a chunk of models.
+
+        INPUTS:
+        tallies (dict): from ChunkResultHandler.returnTallies
+        offset (int): # of models ran before the chunk
+        """
+
+        for varName in self.allVarNames:
+            for ind in [0, 1]:
+                self.signDict[varName][ind] += tallies['sign'][varName][ind]
+                self.varSignDict[varName][ind] += \
+                            tallies['varSign'][varName][ind]
+            self.vifDict[varName][0] += tallies['vif'][varName][0]
+        self.vifPairs += tallies['vifPairs']
+        K = self.numChoose + 1
+        for modelInd in tallies['passTable']:
+            self.passTable.append(str(K) + ":" + str(offset + modelInd))
+
+    def returnTallies(self):
+        """Returns the order independent results as a dictionary."""
+        passTable = [ int(olsID.split(":")[-1]) for olsID in self.passTable ]
+        return {'sign': self.signDict, 'varSign': self.varSignDict,
+                'vif': self.vifDict, 'vifPairs': self.vifPairs,
+                'passTable': passTable}
+
+    def mergeShard(self, shardRH, offset):
+        """Adds the results of a shard of the combinations, renumbering its
+        models to follow the models of earlier shards.
+
+        INPUTS:
+        shardRH (obj): ResultHandler of the shard
+        offset (int): # of models ran by earlier shards
+        """
+
+        K = self.numChoose + 1
+        def renumber(olsID):
+            return str(K) + ":" + str(offset + int(olsID.split(":")[-1]))
+
+        self.mergeTallies(shardRH.returnTallies(), offset)
+        self.olsResults.extend(shardRH.olsResults, offset)
+        self.passBools += [ renumber(olsID) for olsID in shardRH.passBools ]
+        self.miVals += shardRH.miVals
+        self.survivorMI += [ renumber(olsID)
+                             for olsID in shardRH.survivorMI ]
+
+        #### Offered in Model Order to Rebuild the Best R2 List ####
+        shardBest = [ (int(olsRes.id.split(":")[-1]), r2Value, olsRes)
+                      for r2Value, olsRes in shardRH.bestR2.ranked() ]
+        shardBest.sort(key = OP.itemgetter(0))
+        for modelInd, r2Value, olsRes in shardBest:
+            olsRes = COPY.copy(olsRes)
+            olsRes.id = renumber(olsRes.id)
+            self.bestR2.offer(r2Value, olsRes)
+
+    def entersBestR2(self, r2Value):
+        """Returns whether a model would be added to the best R2 list."""
+        return r2Value > self.bestR2Floor()
 
     def returnSilentBool(self):
         """Returns whether SWM neighbor warnings should be printed."""
@@ -192,14 +434,34 @@ class ResultHandler(object):
 
     def runR2Moran(self):
         """Runs Moran's I for highest R2 Models."""
+
+        #### Best R2 Models Without Moran's I ####
+        if self.moranWeights is not None and not self.allMIPass:
+            self.flushMoran()
+        survivors = [ olsRes for r2Value, olsRes in self.bestR2.ranked() ]
+        missing = [ olsRes for olsRes in survivors
+                    if self.olsResults[olsRes.id].miPVal is None ]
+        self.survivorMI = [ olsRes.id for olsRes in missing ]
+        if len(missing) and not self.allMIPass:
+            allResiduals = self.residualFunc(missing)
+        else:
+            allResiduals = None
+
+        #### Bulk Moran's I for Best R2 ####
+        if self.moranWeights is not None and allResiduals is not None:
+            pVals = self.moranWeights.moransI(allResiduals)[-1]
+            for olsRes, pVal in zip(missing, pVals):
+                self.olsResults[olsRes.id].setMoransI(pVal)
+                self.miVals.append(pVal)
+
         resultList = []
-        for ind, olsID in enumerate(self.bestR2Res):
-            olsRes = self.olsResults[olsID]
-            if olsRes.miPVal is None:
+        for olsRes in survivors:
+            stored = self.olsResults[olsRes.id]
+            if stored.miPVal is None:
                 silentBool = self.returnSilentBool()
-                residuals = self.r2Residuals[:,ind].flatten()
                 if not self.allMIPass:
-                    mi = runMoransI(self.ssdo, residuals,
+                    residuals = allResiduals[:,missing.index(olsRes)]
+                    mi = runMoransI(self.ssdo, residuals.flatten(),
                                     self.weightMatrix,
                                     weightsType = self.weightsType,
                                     silent = silentBool)
@@ -207,39 +469,32 @@ class ResultHandler(object):
                 else:
                     miPVal = 1.0
 
-                olsRes.setMoransI(miPVal)
+                stored.setMoransI(miPVal)
                 self.miVals.append(miPVal)
 
             #### Allows the Update of Output Table ####
-            resultList.append( (olsID, olsRes.miPVal) )
+            resultList.append( (olsRes.id, stored.miPVal) )
 
         return resultList
 
+    def bestR2Floor(self):
+        """Returns the value a model must exceed to enter the best R2
+        list."""
+        return self.bestR2.floor()
+
     def evaluateResult(self, olsResult, residuals, keep = False):
         """Evaluates an OLS result in the context of search criteria."""
 
-        #### Evaluate R2 ####
-        r2Value = olsResult.r2
-        lenR2 = len(self.bestR2Vals)
-        inR2 = False
-        if lenR2 < 3:
-            self.bestR2Vals.append(r2Value)
-            self.bestR2Res.append(olsResult.id)
-            self.r2Residuals[:,lenR2] = residuals
-            inR2 = True
-        else:
-            minIndex = NUM.argsort(self.bestR2Vals)[0]
-            minValue = self.bestR2Vals[minIndex]
-            if r2Value > minValue:
-                self.bestR2Vals[minIndex] = r2Value
-                self.bestR2Res[minIndex] = olsResult.id
-                self.r2Residuals[:,minIndex] = residuals
-                inR2 = True
+        r2Bool, pvBool, vifBool, jbBool = self.tallyResult(olsResult)
+        allBool = pvBool and vifBool and r2Bool and jbBool
+        miBool, keepBool = self.rankResult(olsResult, residuals, allBool,
+                                           keep = keep)
 
-        #### Add to Master List of OLS Results ####
-        keepBool = (keep or inR2)
-        if keepBool:
-            self.olsResults[olsResult.id] = olsResult
+        return r2Bool, pvBool, vifBool, jbBool, miBool, keepBool
+
+    def tallyResult(self, olsResult):
+        """Adds an OLS result to the sign, significance and VIF counts and
+        returns the search criteria booleans."""
 
         #### Evaluate p-values ####
         pValVars = olsResult.evaluatePVals(maxCoef = self.maxCoef)
@@ -256,9 +511,11 @@ class ResultHandler(object):
                 self.varSignDict[varName][1] += 1
         for varName in pValVars:
             self.signDict[varName][1] += 1
+        vifInds = [ self.varIndex[varName] for varName in vifVars ]
         for varName in vifVars:
             self.vifDict[varName][0] += 1
-            self.vifDict[varName][1] += list(vifVars)
+        if len(vifInds):
+            self.vifPairs[NUM.ix_(vifInds, vifInds)] += 1
 
         #### Obtain Bools ####
         pvBool = len(pValVars) == self.numChoose
@@ -274,9 +531,30 @@ class ResultHandler(object):
         if tableBool:
             self.passTable.append(olsResult.id)
 
-        allBool = pvBool and vifBool and r2Bool and jbBool
+        return r2Bool, pvBool, vifBool, jbBool
+
+    def rankResult(self, olsResult, residuals, allBool, keep = False):
+        """Updates the best R2 list and runs Moran's I for models passing
+        all other search criteria.  Order dependent, so results must be
+        ranked in the order the models were fit."""
+
+        #### Evaluate R2 ####
+        inR2 = self.bestR2.offer(olsResult.r2, olsResult)
+
+        #### Add to Master List of OLS Results ####
+        keepBool = (keep or inR2)
+        if keepBool:
+            self.olsResults[olsResult.id] = olsResult
+
         miBool = False
         if allBool:
+            if self.moranWeights is not None and not self.allMIPass:
+                #### Tested in Bulk, Passing Models Added in Order ####
+                self.moranQueue.append( (olsResult, residuals) )
+                if len(self.moranQueue) >= moranQueueSize:
+                    self.flushMoran()
+                return miBool, keepBool
+
             silentBool = self.returnSilentBool()
             if not self.allMIPass:
                 mi = runMoransI(self.ssdo, residuals, self.weightMatrix,
@@ -286,14 +564,78 @@ class ResultHandler(object):
             else:
                 miPVal = 1.0
 
-            olsResult.setMoransI(miPVal)
-            self.miVals.append(miPVal)
-            if miPVal > self.minMI:
-                self.passBools.append(olsResult.id)
-                self.olsResults[olsResult.id] = olsResult
-                miBool = True
+            miBool = self.setMoranResult(olsResult, miPVal)
 
-        return r2Bool, pvBool, vifBool, jbBool, miBool, keepBool
+        return miBool, keepBool
+
+    def setMoranResult(self, olsResult, miPVal):
+        """Records the Moran's I p-value of a model passing all other
+        search criteria.  Returns whether it passes Moran's I."""
+
+        olsResult.setMoransI(miPVal)
+        self.miVals.append(miPVal)
+        if miPVal > self.minMI:
+            self.passBools.append(olsResult.id)
+            self.olsResults[olsResult.id] = olsResult
+            return True
+        if olsResult.id in self.olsResults:
+            #### Update Stored Copy ####
+            self.olsResults[olsResult.id] = olsResult
+        return False
+
+    def flushMoran(self):
+        """Runs Moran's I for the queued residuals in one sparse product
+        and records the results in the order they were queued."""
+
+        if not len(self.moranQueue):
+            return
+        residuals = NUM.column_stack([ res for olsRes, res in
+                                       self.moranQueue ])
+        pVals = self.moranWeights.moransI(residuals)[-1]
+        for ind, (olsRes, res) in enumerate(self.moranQueue):
+            self.setMoranResult(olsRes, pVals[ind])
+        self.moranQueue = []
+
+    def recordBatch(self, modelInds, r2Values):
+        """Hook for handlers that track the R2 of bulk tallied models."""
+        pass
+
+    def tallyBatch(self, varInds, coef, pVals, vifFail = None):
+        """Adds the sign, significance and VIF counts for a batch of
+        models that can neither pass nor reach the best R2 list.
+
+        INPUTS:
+        varInds (array): (m x c) indices into allVarNames
+        coef (array): (m x c) coefficients, intercept excluded
+        pVals (array): (m x c) coefficient p-values
+        vifFail {array, None}: (m x c) bools for VIF violations
+        """
+
+        numVars = self.numVars
+        flatInds = varInds.flatten()
+        numRan = NUM.bincount(flatInds, minlength = numVars)
+        numNeg = NUM.bincount(flatInds, weights = (coef < 0.0).flatten(),
+                              minlength = numVars)
+        numSign = NUM.bincount(flatInds,
+                               weights = (pVals <= self.maxCoef).flatten(),
+                               minlength = numVars)
+        if vifFail is not None:
+            numViolate = NUM.bincount(flatInds, weights = vifFail.flatten(),
+                                      minlength = numVars)
+            indicator = NUM.zeros((len(varInds), numVars), dtype = int)
+            rows = NUM.arange(len(varInds))[:,None]
+            indicator[rows, varInds] = vifFail
+            self.vifPairs += NUM.dot(indicator.T, indicator)
+        else:
+            numViolate = NUM.zeros(numVars)
+
+        for ind, varName in enumerate(self.allVarNames):
+            neg = int(numNeg[ind])
+            self.signDict[varName][0] += int(numRan[ind])
+            self.signDict[varName][1] += int(numSign[ind])
+            self.varSignDict[varName][0] += neg
+            self.varSignDict[varName][1] += int(numRan[ind]) - neg
+            self.vifDict[varName][0] += int(numViolate[ind])
 
     def report(self):
         """Reports the results from exploratory regression analysis."""
@@ -303,6 +645,7 @@ class ResultHandler(object):
 
         #### Column Labels ####
         labs = [ARCPY.GetIDMessage(84021), ARCPY.GetIDMessage(84249),
+                MSG.getMessage("looRMSE"),
                 ARCPY.GetIDMessage(84042), ARCPY.GetIDMessage(84036),
                 ARCPY.GetIDMessage(84284), ARCPY.GetIDMessage(84292),
                 ARCPY.GetIDMessage(84286)]
@@ -310,17 +653,10 @@ class ResultHandler(object):
 
         #### Adjusted R2, Sorted Highest to Lowest with ID Tie Breaks ####
         header = ARCPY.GetIDMessage(84287)
-        numRes = UTILS.ssRange(len(self.bestR2Res))
-        r2Data = []
-        for i in numRes:
-            r2Val = self.bestR2Vals[i]
-            idVal = int(self.bestR2Res[i].split(":")[-1])
-            r2Data.append((r2Val, idVal))
-        r2Data = NUM.array(r2Data, dtype = [('r2', float), ('ids', int)])
-        r2SortedInds = r2Data.argsort(order = ('r2', 'ids'))
-        sortIndex = reversed(r2SortedInds)
-        for ind in sortIndex:
-            olsID = self.bestR2Res[ind]
+        r2Data = [ (r2Value, int(olsRes.id.split(":")[-1]), olsRes.id)
+                   for r2Value, olsRes in self.bestR2.ranked() ]
+        r2Data.sort(key = OP.itemgetter(0, 1), reverse = True)
+        for r2Value, idVal, olsID in r2Data:
             olsRes = self.olsResults[olsID]
             olsOut = olsRes.report(formatStr = "%0.2f")
             r2Info.append(olsOut)
@@ -356,20 +692,68 @@ class ResultHandler(object):
 
         return finalReport
 
+class ChunkResultHandler(ResultHandler):
+    """Collects the results for a chunk of models in a worker process.
+    Order independent counts are tallied as usual; the values needed to
+    replay the order dependent rankings are recorded for the parent."""
+
+    def __init__(self, allVarNames, numChoose, numCombos,
+                 minR2 = .5, maxCoef = .01, maxVIF = 5.0,
+                 minJB = .1):
+
+        #### Set Initial Attributes ####
+        UTILS.assignClassAttr(self, locals())
+        self.numVars = len(self.allVarNames)
+        self.createTallies()
+
+        #### Values for Replay, Indexed by Model Order in Chunk ####
+        self.r2Values = NUM.empty(numCombos, dtype = float)
+        self.r2Values.fill(NUM.nan)
+        self.allBools = NUM.zeros(numCombos, dtype = bool)
+
+    def bestR2Floor(self):
+        """Best R2 list is replayed by the parent."""
+        return NUM.inf
+
+    def rankResult(self, olsResult, residuals, allBool, keep = False):
+        """Records the values needed to rank the result in the parent."""
+        modelInd = int(olsResult.id.split(":")[-1])
+        self.r2Values[modelInd] = olsResult.r2
+        self.allBools[modelInd] = allBool
+        return False, False
+
+    def recordBatch(self, modelInds, r2Values):
+        """Records the R2 of bulk tallied models."""
+        self.r2Values[modelInds] = r2Values
+
 class OLSResult(object):
-    """Holds OLS Result Info for Exploratory Regression."""
+    """Holds OLS Result Info for Exploratory Regression.  The design matrix
+    columns and full coefficient vector, when given, allow the residuals
+    to be recomputed.  looRMSE is NaN when the residuals were not
+    computed."""
     def __init__(self, id, varNames, coef, pVals, vifVals,
-                 r2, aic, jb, bp, allMIPass = False):
+                 r2, aic, jb, bp, allMIPass = False, columns = None,
+                 betas = None, looRMSE = NUM.nan):
 
         #### Set Initial Attributes ####
-        UTILS.assignClassAttr(self, locals())
+        self.id = id
+        self.varNames = varNames
+        self.coef = coef
         self.pVals = NUM.array(pVals)
-        self.varNameArray = NUM.array(self.varNames)
+        self.vifVals = vifVals
+        self.r2 = r2
+        self.aic = aic
+        self.looRMSE = looRMSE
+        self.jb = jb
+        self.bp = bp
+        self.allMIPass = allMIPass
         self.miPVal = None
         self.k = len(varNames)
+        self.columns = columns
+        self.betas = betas
 
-        #### Create Model to Print ####
-        self.createModel()
+        #### Model to Print is Created When Reported ####
+        self.model = None
 
     def evaluateVIF(self, maxVIF = 5.0):
         """Evaluates VIF values."""
@@ -377,7 +761,7 @@ class OLSResult(object):
         if self.k >= 2:
             self.maxVIFValue = self.vifVals.max()
             overIndices = NUM.where(self.vifVals >= maxVIF)
-            return self.varNameArray[overIndices]
+            return NUM.array(self.varNames)[overIndices]
         else:
             self.maxVIFValue = 1.0
             return NUM.array([])
@@ -386,7 +770,7 @@ class OLSResult(object):
         """Evaluates coefficient p-values."""
 
         overIndices = NUM.where(self.pVals <= maxCoef)
-        return self.varNameArray[overIndices]
+        return NUM.array(self.varNames)[overIndices]
 
     def createModel(self):
         model = []
@@ -419,6 +803,15 @@ class OLSResult(object):
     def setMoransI(self, value):
         self.miPVal = value
 
+    def setDiagnostics(self, jb, bp, looRMSE, pVals):
+        """Sets the residual diagnostics of a model fit without them."""
+
+        self.jb = jb
+        self.bp = bp
+        self.looRMSE = looRMSE
+        self.pVals = NUM.array(pVals)
+        self.model = None
+
     def report(self, orderType = 0, formatStr = "%0.6f", addModel = True):
         """Reports the results of the OLS run.
 
@@ -440,14 +833,14 @@ class OLSResult(object):
 
         vifInd = -2
         if orderType == 0:
-            resultList = [ self.r2, self.aic, self.jb, self.bp,
+            resultList = [ self.r2, self.aic, self.looRMSE, self.jb, self.bp,
                            self.maxVIFValue, miVal ]
         elif orderType == 1:
-            resultList = [ self.jb, self.r2, self.aic, self.bp,
+            resultList = [ self.jb, self.r2, self.aic, self.looRMSE, self.bp,
                            self.maxVIFValue, miVal ]
         else:
-            resultList = [ miVal, self.r2, self.aic, self.jb, self.bp,
-                           self.maxVIFValue ]
+            resultList = [ miVal, self.r2, self.aic, self.looRMSE, self.jb,
+                           self.bp, self.maxVIFValue ]
             vifInd = -1
 
         resultListVals = []
@@ -461,27 +854,161 @@ class OLSResult(object):
         if self.maxVIFValue >= 1000:
             resultListVals[vifInd] = ">" + LOCALE.format("%0.2f", 1000.)
         if addModel:
+            if self.model is None:
+                self.createModel()
             resultListVals.append(self.model)
 
         return resultListVals
 
+class StoredResult(OLSResult):
+    """View of a ResultStore row with the interface of OLSResult."""
+
+    def __init__(self, store, rowInd, olsID):
+
+        #### Set Initial Attributes ####
+        self.store = store
+        self.rowInd = rowInd
+        self.id = olsID
+        self.allMIPass = store.allMIPass
+        self.model = None
+
+    def __getattr__(self, name):
+        #### Numeric Columns Read Through to the Store ####
+        columns = {'r2': 'r2', 'aic': 'aic', 'looRMSE': 'loo', 'jb': 'jb',
+                   'bp': 'bp', 'maxVIFValue': 'maxVIF'}
+        if name in columns:
+            return float(self.store.rows[columns[name]][self.rowInd])
+        raise AttributeError(name)
+
+    @property
+    def miPVal(self):
+        miPVal = self.store.rows['mi'][self.rowInd]
+        if NUM.isnan(miPVal):
+            return None
+        return float(miPVal)
+
+    def setMoransI(self, value):
+        self.store.rows['mi'][self.rowInd] = value
+
+    @property
+    def varNames(self):
+        return self.store.varNames(self.rowInd)
+
+    def createModel(self):
+        """Formats the model string from the stored codes."""
+        codes = self.store.rows['codes'][self.rowInd]
+        model = []
+        for ind, varName in enumerate(self.varNames):
+            sign, stars = divmod(int(codes[ind]), 4)
+            model.append((" -" if sign else " +") + varName + "*" * stars)
+        self.model = " ".join(model)
+
+class ResultStore(RU.ResultStore):
+    """ResultStore whose rows are viewed as StoredResult."""
+
+    def view(self, rowInd, olsID):
+        return StoredResult(self, rowInd, olsID)
+
 
 class ExploratoryRegression(object):
     """Computes linear regression via Ordinary Least Squares,
     Psuedo-Step-Wise
+
+    The engine keyword selects how each combination is fit:
+        STANDARD: builds and solves the design matrix for every model
+        GRAM: fits every model from submatrices of X'X computed once;
+              the residual diagnostics (JB, BP, Robust SE, LOO) are only
+              run for models passing the R2 and VIF criteria, and for the
+              best R2 models once the search is done
+        BATCH: as GRAM, but all combinations of the same size are fit
+               together in chunks of batchSize models, and the residual
+               diagnostics of models that can not be reported are
+               computed for blocks of models at once
+        UPDATE: as GRAM, but combinations are visited in revolving door
+                order, so consecutive models differ by one variable and
+                the inverse is updated rather than refactored; model IDs
+                follow that order.  Residual diagnostics as GRAM
+
+    With numWorkers > 1 chunks of batchSize combinations are fit across a
+    pool of worker processes sharing one copy of the design matrix.
+
+    With prune = True combinations are enumerated as a tree and a branch
+    is skipped when the R2 of all its variables together, adjusted for the
+    model size, is below both the minimum R2 and the best R2 list.  R2 can
+    only fall as variables are removed, so no skipped model could pass or
+    rank.  Before the first combination the floor is seeded from numBest
+    models found by forward selection (see seedR2Floor), so the first
+    chunks generated ahead of their fits with BATCH or numWorkers > 1 are
+    pruned too.  Counts and the Jarque-Bera list cover only the models
+    fit; the number skipped is reported.
+
+    The numBest models with the highest adjusted R2 (for each number of
+    variables), Jarque-Bera p-value and Moran's I p-value are reported.
+    Each reported model shows its leave-one-out RMSE, taken from the hat
+    diagonal of the fit rather than n refits.  With GRAM and UPDATE, the
+    models failing the R2 or VIF criteria have no Breusch-Pagan test, so
+    their coefficients are counted as significant from the classic
+    p-values; the Jarque-Bera summary and list cover the models given the
+    residual diagnostics.
+
+    With a checkpointFile the cursor into the combinations and every
+    accumulated result are saved every checkpointInterval seconds.  With
+    resume = True a search interrupted after its last checkpoint continues
+    from it, producing the report of an uninterrupted run.  (With prune and
+    numWorkers > 1 the # of models skipped already depends on how far
+    ahead chunks are queued, so only the models reported are certain to
+    match.)
+
+    With numShards > 1 only shard shardIndex of the combinations is
+    searched: for each number of variables, a contiguous range of ranks
+    whose first combination is unranked directly.  Instead of a report the
+    partial results are written to shardFile; ShardMerge rebuilds the
+    report of a single run from the files of all shards.  (With prune each
+    shard prunes against its own best R2 list, so fewer models may be
+    skipped.)
+
+    With maxSeconds or maxModels the search is budgeted: combinations of
+    every size are fit together, most promising first (see runBudgeted),
+    until the time or # of models runs out.  The best models found are
+    reported with the fraction of the combinations covered.  A budgeted
+    search is fit in this process, without pruning, shards or checkpoints.
     """
 
     def __init__(self, ssdo, dependentVar, independentVars, weightsFile,
                  outputReportFile = None, maxIndVars = 5, minIndVars = 1, minR2 = .5,
-                 maxCoef = .01, maxVIF = 5.0, minJB = .1, minMI = .1):
+                 maxCoef = .01, maxVIF = 5.0, minJB = .1, minMI = .1,
+                 engine = "STANDARD", batchSize = 4096, numWorkers = 1,
+                 prune = False, numBest = 3, checkpointFile = None,
+                 resume = False, numShards = 1, shardIndex = 0,
+                 shardFile = None, maxSeconds = None, maxModels = None):
 
         ARCPY.env.overwriteOutput = True
 
         #### Set Initial Attributes ####
         UTILS.assignClassAttr(self, locals())
+        self.engine = engine.upper()
+        self.useGram = self.engine in ["GRAM", "BATCH", "UPDATE"]
+        self.useBatch = self.engine == "BATCH"
+        self.useUpdate = self.engine == "UPDATE"
+        self.gateDiagnostics = self.engine in ["GRAM", "UPDATE"]
         self.masterField = self.ssdo.masterField
         self.warnedTProb = False
 
+        #### Shard of the Combinations Searched ####
+        if not (0 <= shardIndex < numShards):
+            MSG.addMessage("ERROR", "shardIndexRange")
+            raise SystemExit()
+        if numShards > 1 and not shardFile:
+            shardName = "ModelSelectionOLS_%i_of_%i.shard" % (shardIndex + 1,
+                                                            numShards)
+            self.shardFile = OS.path.join(ARCPY.env.scratchFolder, shardName)
+
+        #### Stop the Search Once Out of Time or Models ####
+        self.budgeted = maxSeconds is not None or maxModels is not None
+        if self.budgeted and (numShards > 1 or checkpointFile):
+            MSG.addMessage("ERROR", "budgetExclusive")
+            raise SystemExit()
+
         #### Set Boolean For Passing All Moran's I ####
         self.allMIPass = UTILS.compareFloat(0.0, self.minMI, rTol = .00000001)
 
@@ -490,11 +1017,11 @@ class ExploratoryRegression(object):
             weightSuffix = weightsFile.split(".")[-1].lower()
             if weightSuffix == "swm":
                 self.weightsType = "SWM"
-                self.weightsMatrix = self.weightsFile
             else:
                 self.weightsType = "GWT"
-                self.weightsMatrix = WU.buildTextWeightDict(weightsFile,
-                                                 self.ssdo.master2Order)
+            fileInfo = OS.stat(weightsFile)
+            weightsSpec = [self.weightsType, OS.path.abspath(weightsFile),
+                           fileInfo.st_size, fileInfo.st_mtime]
         else:
             #### If No Weightsfile Provided, Use 8 Nearest Neighbors ####
             if ssdo.numObs <= 9:
@@ -503,13 +1030,78 @@ class ExploratoryRegression(object):
             else:
                 nn = 8
             self.weightsType = "GA"
-            gaSearch = GAPY.ga_nsearch(self.ssdo.gaTable)
-            gaSearch.init_nearest(0.0, nn, "euclidean")
-            self.weightsMatrix = gaSearch
+            self.numNeighs = nn
+            weightsSpec = [self.weightsType, nn, "euclidean"]
+
+        #### Cached Sparse Weights for Bulk Moran's I ####
+        self.moranWeights = None
+        if not self.allMIPass:
+            self.openWeightsCache(weightsSpec)
+
+        #### Build Weights, Not Needed With Cached Sparse Weights ####
+        #### Nearest Neighbors Are Only Held as Sparse Weights ####
+        if self.moranWeights is not None or self.weightsType == "GA":
+            self.weightsMatrix = None
+        elif self.weightsType == "SWM":
+            self.weightsMatrix = self.weightsFile
+        else:
+            import WeightsUtilities as WU
+            self.weightsMatrix = WU.buildTextWeightDict(weightsFile,
+                                                 self.ssdo.master2Order)
+
+        #### Sparse Weights for Bulk Moran's I ####
+        if not self.allMIPass and self.moranWeights is None:
+            if self.weightsType == "GA":
+                self.moranWeights = buildMoranWeights(self.ssdo, None,
+                                          weightsType = self.weightsType,
+                                          numNeighs = self.numNeighs)
+            else:
+                try:
+                    self.moranWeights = buildMoranWeights(self.ssdo,
+                                                          self.weightsMatrix,
+                                                          self.weightsType)
+                except:
+                    #### Fall Back to Moran's I One Model at a Time ####
+                    self.moranWeights = None
+            if self.moranWeights is not None and self.weightsCache:
+                try:
+                    self.weightsCache.save(self.weightsKey,
+                                           self.moranWeights)
+                except (IOError, OSError):
+                    pass
 
         #### Initialize Data ####
         self.runModels()
 
+    def openWeightsCache(self, weightsSpec):
+        """Loads the sparse weights from the cache in the scratch folder
+        when the same features and weights specification were used
+        before.
+
+        INPUTS:
+        weightsSpec (list): values describing the weights
+        """
+
+        self.weightsCache = None
+        scratchFolder = ARCPY.env.scratchFolder
+        if not scratchFolder:
+            return
+
+        #### Key From Feature IDs, Centroids and Weights ####
+        ids = NUM.zeros(self.ssdo.numObs, dtype = float)
+        for masterID, orderID in UTILS.iteritems(self.ssdo.master2Order):
+            ids[orderID] = masterID
+        if self.weightsType == "GA":
+            coords = self.ssdo.xyCoords
+        else:
+            coords = None
+        self.weightsKey = SW.fingerprint(ids, coords, weightsSpec)
+
+        cacheDir = OS.path.join(scratchFolder, "WeightsCache")
+        self.weightsCache = SW.WeightsCache(cacheDir,
+                                            maxBytes = weightsCacheBytes)
+        self.moranWeights = self.weightsCache.load(self.weightsKey)
+
     def runModels(self):
         """Performs additional validation and populates the
         SSDataObject."""
@@ -562,6 +1154,20 @@ class ExploratoryRegression(object):
         for column, variable in enumerate(self.independentVars):
             self.x[:,column + 1] = ssdo.fields[variable].data
 
+        #### Variable Groups With Perfect Multicollinearity ####
+        self.dependentGroups = self.findDependentGroups()
+
+        #### Cross-Product Matrices for Gram Engine and R2 Bounds ####
+        if self.useGram or self.prune:
+            self.gram = RU.GramMatrix(self.x, self.y)
+        if self.useUpdate:
+            self.updater = RU.InverseUpdater(self.gram)
+
+        #### Correlations of All Variables, Subset for Each Model's VIF ####
+        if not self.useGram:
+            with NUM.errstate(divide = "ignore", invalid = "ignore"):
+                self.corX = NUM.corrcoef(self.x[:,1:].T)
+
         #### Calculate Global VIF ####
         self.globalVifVals = COLL.defaultdict(float)
         if k > 2:
@@ -573,197 +1179,1120 @@ class ExploratoryRegression(object):
         #### Create Output Report File ####
         fo = UTILS.openFile(self.outputReportFile, "w")
 
+        #### Worker Pool Sharing the Design Matrix ####
+        self.pool = None
+        if self.numWorkers > 1 and not self.budgeted:
+            self.startPool()
+
         #### Hold Results for Every Choose Combo ####
         self.resultDict = {}
         self.vifVarCount = COLL.defaultdict(int)
         self.model2Table = {}
         self.sumRuns = 0
+        self.sumDiagRuns = 0
+        self.sumSkipped = 0
+        self.cursorSkipped = 0
         self.sumGI = 0
         self.boolGI = 0
         self.boolResults = NUM.zeros(4, dtype = int)
-        self.jbModels = []
-        self.jbValues = []
-        self.jbResiduals = NUM.empty((self.n, 3), dtype = float)
+        self.bestJB = RU.TopK(self.numBest)
+
+        #### Residuals of Best Models, Recomputed When Moran's I Is Run ####
+        self.residualBuffer = NUM.empty((self.n, self.numBest), dtype = float)
         self.perfectMultiWarnBool = False
         self.neighborWarn = False
+        self.reportParts = []
+        self.modelCounts = {}
+        self.perfectMultiDict = {}
+        self.sharded = self.numShards > 1
+
+        #### Continue an Interrupted Search ####
+        cursor = None
+        if self.checkpointFile:
+            self.checkpointKey = self.searchFingerprint()
+            if self.sharded:
+                shardLabel = ":%i/%i" % (self.shardIndex, self.numShards)
+                self.checkpointKey += shardLabel
+            self.lastCheckpoint = TIME.time()
+            if self.resume:
+                cursor = self.loadCheckpoint()
+                for reportPart in self.reportParts:
+                    UTILS.writeText(fo, reportPart)
+
+        #### Budgeted Search Fits All Sizes Together ####
+        if self.budgeted:
+            self.runBudgeted(rangeVars, rangeCombos, fo)
+            rangeCombos = []
 
         for choose in rangeCombos:
-            #### Generate Index Combos ####
-            comboGenerator = ITER.combinations(rangeVars, choose)
+            if cursor is not None and choose < cursor['choose']:
+                #### Completed Before the Checkpoint ####
+                continue
 
             #### Set Progressor ####
             message = ARCPY.GetIDMessage(84293).format(k-1, choose)
             ARCPY.SetProgressor("default", message)
 
             #### Set Result Structure ####
-            rh = ResultHandler(self.independentVars, choose,
-                               self.ssdo, self.weightsMatrix,
-                               weightsType = self.weightsType,
-                               minR2 = self.minR2, maxCoef = self.maxCoef,
-                               maxVIF = self.maxVIF, minJB = self.minJB,
-                               minMI = self.minMI, silent = self.neighborWarn)
+            if cursor is not None and choose == cursor['choose']:
+                rh = cursor['rh']
+                perfectMultiModels = cursor['perfectMultiModels']
+                self.combosDone = cursor['combosDone']
+                self.modelCount = cursor['modelCount']
+                resumeAfter = cursor['lastCombo']
+            else:
+                rh = self.createHandler(choose)
+                perfectMultiModels = []
+                self.combosDone = 0
+                self.modelCount = 0
+                resumeAfter = None
+
+            #### Rank Range of the Combinations Searched Here ####
+            variables = list(rangeVars)
+            numVars = len(variables)
+            numCombos = RU.binomial(numVars, choose)
+            firstRank = numCombos * self.shardIndex // self.numShards
+            endRank = numCombos * (self.shardIndex + 1) // self.numShards
+
+            #### Generate Index Combos, Continuing After a Checkpoint ####
+            if self.prune:
+                after = resumeAfter
+                if after is None and firstRank > 0:
+                    after = [ variables[ind] for ind in
+                              RU.unrankCombination(firstRank - 1, numVars,
+                                                   choose) ]
+                until = None
+                if endRank < numCombos:
+                    until = [ variables[ind] for ind in
+                              RU.unrankCombination(endRank - 1, numVars,
+                                                   choose) ]
+                comboGenerator = self.prunedCombinations(rh, rangeVars,
+                                                         choose,
+                                                         after = after,
+                                                         until = until)
+            elif self.useUpdate:
+                comboGenerator = RU.revolvingDoor(rangeVars, choose,
+                                    start = firstRank + self.combosDone,
+                                    stop = endRank)
+            else:
+                comboGenerator = RU.combinations(rangeVars, choose,
+                                    start = firstRank + self.combosDone,
+                                    stop = endRank)
 
             #### Loop Through All Combinations ####
-            modelCount = 0
             emptyTabValues = [""] * ( self.maxIndVars - choose )
-            perfectMultiModels = []
-            for combo in comboGenerator:
-                #### Create Design Matrix for Given Combination ####
-                columns = [0] + list(combo)
-                comboX = self.x[0:,columns]
-
-                #### Get Model Info for given Combination ####
-                N, K = comboX.shape
-                varNameList = [ self.independentVars[j-1] for j in combo ]
-                varNameListInt = ["Intercept"] + varNameList
-                modelAll = self.dependentVar + " ~ "
-                modelAll += " + ".join(varNameListInt)
-                modelID = str(K) + ":" + str(modelCount)
-
-                #### Run Linear Regression ####
-                runModel = self.calculate(comboX)
-
-                #### Set Near/Perfect Multicoll Bool ####
-                nearPerfectBool = False
-                if K > 2 and runModel:
-                    nearPerfectBool = NUM.any(abs(self.vifVal) >= 1000)
-
-                if (not runModel) or nearPerfectBool:
-                    #### Perfect Multicollinearity ####
-                    #### Unable to Invert the Matrix ####
-                    perfectMultiModels.append(modelAll)
+            if self.pool is not None:
+                self.runParallel(rh, choose, comboGenerator,
+                                 perfectMultiModels)
+            elif self.useBatch:
+                self.runBatch(rh, comboGenerator, perfectMultiModels)
+            else:
+                for combo in comboGenerator:
+                    modelID = str(choose + 1) + ":" + str(self.modelCount)
+                    if self.fitCombo(rh, combo, modelID, perfectMultiModels):
+                        self.modelCount += 1
+                    self.advanceCursor(rh, perfectMultiModels, combo, 1)
 
-                else:
-                    #### Keep Track of Total Number of Models Ran ####
-                    modelCount += 1
-                    self.sumRuns += 1
-                    residuals = self.residuals.flatten()
-
-                    #### Evaluate p-values ####
-                    if self.BPProb < .1:
-                        #### Use Robust Coefficients ####
-                        pValsOut = self.pValsRob[1:]
-                    else:
-                        pValsOut = self.pVals[1:]
-                    coefOut = self.coef[1:]
+            self.finishChoose(rh, choose, perfectMultiModels,
+                              self.modelCount, fo)
 
-                    #### Process Largest VIF Values ####
-                    if K > 2:
-                        for ind, varName in enumerate(varNameList):
-                            vif = self.vifVal[ind]
-                            previousVIF = self.globalVifVals[varName]
-                            if vif > previousVIF:
-                                self.globalVifVals[varName] = vif
+        #### Shut Down Worker Pool ####
+        if self.pool is not None:
+            self.pool.close()
+            self.pool.join()
 
-                    #### Set OLS Result ####
-                    res = OLSResult(modelID, varNameList, coefOut, pValsOut,
-                                    self.vifVal, self.r2Adj, self.aicc,
-                                    self.JBProb, self.BPProb,
-                                    allMIPass = self.allMIPass)
+        #### Run Moran's I on Best Jarque-Bera ####
+        self.createJBReport()
+
+        if self.sharded:
+            #### Partial Results, Reported Once the Shards Are Merged ####
+            self.saveShard()
+            shardMessage = MSG.getMessage("shardWritten",
+                                          self.shardIndex + 1,
+                                          self.numShards, self.shardFile)
+            ARCPY.AddMessage(shardMessage)
+            UTILS.writeText(fo, shardMessage + "\n")
+        else:
+            #### Final Moran Stats ####
+            self.getMoranStats()
 
-                    #### Evaluate Jarque-Bera Stat ####
-                    keep = self.pushPopJB(res, self.residuals.flatten())
+            #### Ending Summary ####
+            self.endSummary()
 
-                    boolReport = rh.evaluateResult(res, residuals, keep = keep)
-                    r2Bool, pvBool, vifBool, jbBool, giBool, keepBool = boolReport
+            UTILS.writeText(fo, self.fullReport)
+        fo.close()
 
-                    #### Add Booleans for End Total Summary ####
-                    boolResult = [r2Bool, pvBool, vifBool, jbBool]
-                    self.boolResults += boolResult
+        #### Search Complete, Checkpoint No Longer Needed ####
+        if self.checkpointFile and OS.path.exists(self.checkpointFile):
+            OS.remove(self.checkpointFile)
 
-                    #### Delete OLS Instance if Not Necessary For Summary ####
-                    if not keepBool:
-                        del res
+    def createHandler(self, choose):
+        """Returns an empty ResultHandler for the number of variables
+        chosen.
 
+        INPUTS:
+        choose (int): # of variables in each combination
+        """
 
-            #### Run Moran's I for Highest Adj. R2 ####
-            r2ResultList = rh.runR2Moran()
-            self.neighborWarn = True
+        return ResultHandler(self.independentVars, choose,
+                             self.ssdo, self.weightsMatrix,
+                             weightsType = self.weightsType,
+                             minR2 = self.minR2, maxCoef = self.maxCoef,
+                             maxVIF = self.maxVIF, minJB = self.minJB,
+                             minMI = self.minMI,
+                             silent = self.neighborWarn,
+                             moranWeights = self.moranWeights,
+                             numBest = self.numBest,
+                             residualFunc = self.survivorResiduals)
+
+    def runBudgeted(self, rangeVars, rangeCombos, fo):
+        """Fits the most promising combinations of every size first and
+        stops once maxSeconds have passed or maxModels combinations were
+        tried.  The variables are ranked by the absolute value of their
+        correlation with the dependent variable and added to the search one
+        at a time in that order; each addition fits every combination that
+        includes the new variable, so at any stop the search has covered
+        all combinations of the best ranked variables.
 
-            #### Add Results to Report File ####
+        INPUTS:
+        rangeVars (list): design matrix column indices of the variables
+        rangeCombos (array): # of variables in each combination searched
+        fo (file): output report file
+        """
+
+        #### Rank Variables by Marginal Correlation ####
+        variables = list(rangeVars)
+        yDev = self.y.flatten() - self.y.mean()
+        xDev = self.x[:,variables] - self.x[:,variables].mean(0)
+        denom = NUM.sqrt((xDev * xDev).sum(0) * (yDev * yDev).sum())
+        corr = NUM.zeros(len(variables), dtype = float)
+        valid = denom > 0.0
+        corr[valid] = NUM.dot(yDev, xDev)[valid] / denom[valid]
+        order = NUM.argsort(-NUM.abs(corr), kind = "mergesort")
+        ranked = [ variables[ind] for ind in order ]
+
+        #### Result Structures for Every Size ####
+        handlers = {}
+        perfectMulti = {}
+        modelCounts = {}
+        for choose in rangeCombos:
+            handlers[choose] = self.createHandler(choose)
+            perfectMulti[choose] = []
+            modelCounts[choose] = 0
+        self.numSpace = sum([ RU.binomial(len(variables), choose)
+                              for choose in rangeCombos ])
+        self.numSearched = 0
+
+        #### Add Variables in Rank Order Until Out of Budget ####
+        message = MSG.getMessage("budgetSearching")
+        ARCPY.SetProgressor("default", message)
+        startTime = TIME.time()
+        outOfBudget = False
+        for newInd, newVar in enumerate(ranked):
+            for choose in rangeCombos:
+                rh = handlers[choose]
+                for others in ITER.combinations(ranked[0:newInd], choose - 1):
+                    if self.maxModels is not None:
+                        outOfBudget = self.numSearched >= self.maxModels
+                    if self.maxSeconds is not None and not outOfBudget:
+                        elapsed = TIME.time() - startTime
+                        outOfBudget = elapsed >= self.maxSeconds
+                    if outOfBudget:
+                        break
+                    combo = tuple(sorted(others + (newVar,)))
+                    count = modelCounts[choose]
+                    modelID = str(choose + 1) + ":" + str(count)
+                    if self.fitCombo(rh, combo, modelID,
+                                     perfectMulti[choose]):
+                        modelCounts[choose] += 1
+                    self.numSearched += 1
+                if outOfBudget:
+                    break
+            if outOfBudget:
+                break
+
+        if outOfBudget:
+            MSG.addMessage("WARNING", "budgetReached", self.numSearched,
+                           self.numSpace)
+
+        #### Report Every Size ####
+        for choose in rangeCombos:
+            self.finishChoose(handlers[choose], choose, perfectMulti[choose],
+                              modelCounts[choose], fo)
+
+    def finishChoose(self, rh, choose, perfectMultiModels, modelCount, fo):
+        """Runs Moran's I for the best models of one number of variables,
+        writes their report and adds them to the result dictionary.
+
+        INPUTS:
+        rh (obj): ResultHandler for the number of variables chosen
+        choose (int): # of variables in each combination
+        perfectMultiModels (list): models with perfect multicollinearity
+        modelCount (int): # of models fit
+        fo (file): output report file
+        """
+
+        #### Residual Diagnostics the Screens Skipped, Best R2 Only ####
+        if self.gateDiagnostics:
+            self.diagnoseBestR2(rh)
+
+        #### Run Moran's I for Highest Adj. R2, Warning Once ####
+        if self.neighborWarn:
+            rh.silent = True
+        r2ResultList = rh.runR2Moran()
+        self.neighborWarn = True
+
+        #### Add Results to Report File ####
+        self.modelCounts[choose] = modelCount
+        self.perfectMultiDict[choose] = perfectMultiModels
+        if not self.sharded:
             result2Print = rh.report()
             UTILS.writeText(fo, result2Print)
-            if len(perfectMultiModels):
-                self.perfectMultiWarnBool = True
-                ARCPY.AddIDMessage("WARNING", 1304)
-                for modelStr in perfectMultiModels:
-                    ARCPY.AddIDMessage("WARNING", 1176, modelStr)
+            self.reportParts.append(result2Print)
+        if len(perfectMultiModels):
+            self.perfectMultiWarnBool = True
+            ARCPY.AddIDMessage("WARNING", 1304)
+            for modelStr in perfectMultiModels:
+                ARCPY.AddIDMessage("WARNING", 1176, modelStr)
+
+        #### Add Choose Run to Result Dictionary ####
+        self.resultDict[choose] = rh
+
+    def findDependentGroups(self):
+        """Returns the groups of variables with perfect multicollinearity
+        found by one QR decomposition with column pivoting of the design
+        matrix.  A group is only kept when its own X'X fails the check for
+        perfect multicollinearity run on every model; X'X of any
+        combination holding the group has a smallest singular value no
+        larger, so those combinations are skipped without being fit.
+
+        RETURN:
+        groups (list): tuples of design matrix column indices, intercept
+            excluded as it is in every model
+        """
 
-            #### Add Choose Run to Result Dictionary ####
-            self.resultDict[choose] = rh
+        groups = []
+        for group in RU.dependentGroups(self.x):
+            columns = [0] + [ col for col in group if col != 0 ]
+            xx = NUM.dot(self.x[:,columns].T, self.x[:,columns])
+            s = LA.svd(xx, compute_uv = False)
+            if UTILS.compareFloat(0.0, s[-1]):
+                groups.append(tuple(columns[1:]))
+        return groups
 
-        #### Run Moran's I on Best Jarque-Bera ####
-        self.createJBReport()
+    def dependentMask(self, combos):
+        """Returns True for every combination holding all the variables of
+        a dependent group.
 
-        #### Final Moran Stats ####
-        self.getMoranStats()
+        INPUTS:
+        combos (array): (m x choose) design matrix column indices
+        """
 
-        #### Ending Summary ####
-        self.endSummary()
+        mask = NUM.zeros(len(combos), dtype = bool)
+        for group in self.dependentGroups:
+            inGroup = NUM.ones(len(combos), dtype = bool)
+            for col in group:
+                inGroup &= (combos == col).any(1)
+            mask |= inGroup
+        return mask
 
-        UTILS.writeText(fo, self.fullReport)
-        fo.close()
+    def fitModel(self, combo, modelID, cxxi = None):
+        """Fits the model for a single combination.  Returns None if the
+        model could not be run due to multicollinearity, otherwise the
+        OLSResult, its residuals (None without residual diagnostics) and
+        whether the residual diagnostics were calculated.
+
+        INPUTS:
+        combo (tuple): design matrix column indices of the variables
+        modelID (str): identifier of the model, E.g. "3:12"
+        cxxi {array, None}: inverse of the centred cross-products of a
+                            batch already checked for multicollinearity
+        """
+
+        #### Design Matrix Columns for Given Combination ####
+        columns = [0] + list(combo)
+        K = len(columns)
+
+        #### Run Linear Regression ####
+        if self.useGram:
+            runModel = self.calculateGram(columns, cxxi = cxxi)
+        else:
+            comboX = self.x[0:,columns]
+            runModel = self.calculate(comboX, columns)
+
+        #### Set Near/Perfect Multicoll Bool ####
+        nearPerfectBool = False
+        if K > 2 and runModel:
+            nearPerfectBool = NUM.any(abs(self.vifVal) >= 1000)
+
+        if (not runModel) or nearPerfectBool:
+            #### Perfect Multicollinearity ####
+            #### Unable to Invert the Matrix ####
+            return None
+
+        #### Residual Diagnostics Only for R2/VIF Survivors ####
+        if self.gateDiagnostics and not self.passesScreens():
+            self.skipResidualDiagnostics()
+        elif self.useGram:
+            self.calculateResidualDiagnostics(columns)
+
+        hasDiag = self.residuals is not None
+        if hasDiag:
+            residuals = self.residuals.flatten()
+        else:
+            residuals = None
+
+        #### Evaluate p-values ####
+        if self.BPProb < .1:
+            #### Use Robust Coefficients ####
+            pValsOut = self.pValsRob[1:]
+        else:
+            pValsOut = self.pVals[1:]
+        coefOut = self.coef[1:]
+
+        #### Set OLS Result ####
+        varNameList = [ self.independentVars[j-1] for j in combo ]
+        res = OLSResult(modelID, varNameList, coefOut, pValsOut,
+                        self.vifVal, self.r2Adj, self.aicc,
+                        self.JBProb, self.BPProb,
+                        allMIPass = self.allMIPass, columns = columns,
+                        betas = self.coef, looRMSE = self.looRMSE)
+
+        return res, residuals, hasDiag
+
+    def passesScreens(self):
+        """Returns whether the model just fit passes the R2 and VIF
+        criteria, which need no residuals."""
+
+        if len(self.coef) > 2:
+            vifPass = NUM.all(self.vifVal < self.maxVIF)
+        else:
+            vifPass = True
+        return bool(vifPass and self.r2Adj >= self.minR2)
+
+    def diagnoseBestR2(self, rh):
+        """Runs the residual diagnostics skipped by the screens for the
+        models in the best R2 list, and updates their stored results, so
+        every reported row has them.
+
+        INPUTS:
+        rh (obj): ResultHandler for the number of variables chosen
+        """
+
+        for r2Value, olsRes in rh.bestR2.ranked():
+            if not NUM.isnan(olsRes.jb):
+                continue
+            columns = olsRes.columns
+            self.calculateGram(columns)
+            self.calculateResidualDiagnostics(columns)
+            if self.BPProb < .1:
+                pVals = self.pValsRob[1:]
+            else:
+                pVals = self.pVals[1:]
+            olsRes.setDiagnostics(self.JBProb, self.BPProb, self.looRMSE,
+                                  pVals)
+            rh.olsResults.setDiagnostics(olsRes.id, olsRes)
+
+    def seedR2Floor(self, rangeVars, choose):
+        """Returns an adjusted R2 the best R2 list of one size is certain
+        to reach, known before any model of that size is fit.  Variables
+        are added by forward selection on the Gram matrix, and the numBest
+        best models completing the selection are the seeds.  Seeds are
+        kept well clear of perfect multicollinearity, so every one is fit
+        by the search.  Returns -inf when fewer than numBest seeds are
+        found.
+
+        INPUTS:
+        rangeVars (list): design matrix column indices of the variables
+        choose (int): # of variables in each combination
+        """
+
+        gram = self.gram
+        variables = NUM.array(list(rangeVars), dtype = int)
+        if not self.numBest or gram.tss <= 0.0:
+            return -NUM.inf
+        if len(variables) < choose + self.numBest - 1:
+            return -NUM.inf
+
+        chosen = []
+        for step in range(choose):
+            #### Each Remaining Variable Added to Those Chosen ####
+            pool = NUM.setdiff1d(variables, chosen)
+            combos = NUM.empty((len(pool), step + 1), dtype = int)
+            combos[:,0:step] = chosen
+            combos[:,step] = pool
+
+            #### Models the Search Is Certain to Fit ####
+            columns = NUM.zeros((len(pool), step + 2), dtype = int)
+            columns[:,1:] = combos
+            xx = gram.xx[columns[:,:,None], columns[:,None,:]]
+            minSV = LA.svd(xx, compute_uv = False)[:,-1]
+            solved, coef, xxiDiag, ess, vifVals, cxxi = \
+                                                gram.solveBatch(combos)
+            valid = solved & (minSV > seedMinSV)
+            valid &= NUM.all(abs(vifVals) < seedMaxVIF, axis = 1)
+            valid &= ~self.dependentMask(combos)
+            r2Values = NUM.where(valid, 1.0 - ess / gram.tss, -NUM.inf)
+
+            if step < choose - 1:
+                best = NUM.argmax(r2Values)
+                if not valid[best]:
+                    return -NUM.inf
+                chosen.append(pool[best])
+
+        #### Seeds Are the numBest Best Completions ####
+        if valid.sum() < self.numBest:
+            return -NUM.inf
+        seeds = combos[NUM.argsort(-r2Values)[0:self.numBest]]
+
+        #### R2 From the Bound Used in Pruning, Less Its Slack ####
+        adjScale = (self.n - 1.0) / (self.n - choose - 1.0)
+        r2Values = [ gram.maxR2([0] + list(seed)) for seed in seeds ]
+        r2Adj = 1.0 - (1.0 - min(r2Values)) * adjScale
+
+        return r2Adj - pruneTolerance
+
+    def prunedCombinations(self, rh, rangeVars, choose, after = None,
+                           until = None):
+        """Yields the combinations in the order of ITER.combinations,
+        skipping every branch that can not reach the minimum R2 or the
+        best R2 list.  The # of models skipped is added to sumSkipped;
+        cursorSkipped holds its value when the last combination was
+        yielded, before any branches skipped while looking for the next.
+
+        INPUTS:
+        rh (obj): ResultHandler for the number of variables chosen
+        rangeVars (list): design matrix column indices of the variables
+        choose (int): # of variables in each combination
+        after {tuple, None}: start after this combination; branches
+            before it were already searched and are neither visited nor
+            counted
+        until {tuple, None}: stop after this combination; branches
+            holding it are not pruned, so a skipped branch never extends
+            past it
+        """
+
+        variables = list(rangeVars)
+        numVars = len(variables)
+
+        #### Adjusted R2 Scale for the Model Size ####
+        adjScale = (self.n - 1.0) / (self.n - choose - 1.0)
+
+        #### Floor Known Before Any Model of This Size Is Fit ####
+        seedFloor = self.seedR2Floor(rangeVars, choose)
+
+        def extend(prefix, start, resuming, ending):
+            need = choose - len(prefix)
+            if need == 0:
+                if not resuming:
+                    self.cursorSkipped = self.sumSkipped
+                    yield tuple(prefix)
+                return
+            if resuming:
+                start = variables.index(after[len(prefix)])
+            stop = numVars - need + 1
+            if ending:
+                stop = variables.index(until[len(prefix)]) + 1
+            for ind in range(start, stop):
+                branch = prefix + [variables[ind]]
+                pool = variables[ind + 1:]
+
+                #### Branches Holding the Start or End Are Not Pruned ####
+                onPath = resuming and ind == start
+                onEnd = ending and ind == stop - 1
+                if need > 1 and not (onPath or onEnd):
+                    #### Bound From All Variables in the Branch ####
+                    r2 = self.gram.maxR2([0] + branch + pool)
+                    r2Bound = 1.0 - (1.0 - r2) * adjScale + pruneTolerance
+                    r2Floor = max(rh.bestR2Floor(), seedFloor)
+                    if r2Bound < self.minR2 and r2Bound <= r2Floor:
+                        skipped = nChooseK(len(pool), need - 1)
+                        self.sumSkipped += int(round(skipped))
+                        continue
+                for combo in extend(branch, ind + 1, onPath, onEnd):
+                    yield combo
+
+        return extend([], 0, after is not None, until is not None)
+
+    def modelString(self, combo):
+        """Returns the model string used in multicollinearity warnings."""
+        varNameListInt = ["Intercept"] + [ self.independentVars[j-1]
+                                           for j in combo ]
+        modelAll = self.dependentVar + " ~ "
+        modelAll += " + ".join(varNameListInt)
+        return modelAll
+
+    def fitCombo(self, rh, combo, modelID, perfectMultiModels,
+                 cxxi = None):
+        """Fits and evaluates the model for a single combination.  Returns
+        False if the model could not be run due to multicollinearity.
+
+        INPUTS:
+        rh (obj): ResultHandler for the number of variables chosen
+        combo (tuple): design matrix column indices of the variables
+        modelID (str): identifier of the model, E.g. "3:12"
+        perfectMultiModels (list): models with perfect multicollinearity
+        cxxi {array, None}: inverse of the centred cross-products of a
+                            batch already checked for multicollinearity
+        """
+
+        #### Combinations Holding a Dependent Group Are Not Fit ####
+        if self.dependentGroups:
+            if self.dependentMask(NUM.array([combo]))[0]:
+                perfectMultiModels.append(self.modelString(combo))
+                return False
+
+        fit = self.fitModel(combo, modelID, cxxi = cxxi)
+        if fit is None:
+            perfectMultiModels.append(self.modelString(combo))
+            return False
+        res, residuals, hasDiag = fit
+
+        #### Keep Track of Total Number of Models Ran ####
+        self.sumRuns += 1
+        if hasDiag:
+            self.sumDiagRuns += 1
+
+        #### Process Largest VIF Values ####
+        if len(combo) > 1:
+            for ind, varName in enumerate(res.varNames):
+                vif = self.vifVal[ind]
+                previousVIF = self.globalVifVals[varName]
+                if vif > previousVIF:
+                    self.globalVifVals[varName] = vif
+
+        #### Evaluate Jarque-Bera Stat ####
+        if hasDiag:
+            keep = self.pushPopJB(res)
+        else:
+            keep = False
+
+        boolReport = rh.evaluateResult(res, residuals, keep = keep)
+        r2Bool, pvBool, vifBool, jbBool, giBool, keepBool = boolReport
+
+        #### Add Booleans for End Total Summary ####
+        boolResult = [r2Bool, pvBool, vifBool, jbBool]
+        self.boolResults += boolResult
+
+        return True
+
+    def runBatch(self, rh, comboGenerator, perfectMultiModels):
+        """Fits all combinations of one size in vectorized chunks.  Models
+        that can pass the R2 and VIF criteria or reach the best R2 or
+        Jarque-Bera lists are handed to fitCombo, with the inverse solved
+        for the chunk.  The rest are tallied in bulk, with the same
+        residual diagnostics and choice of robust p-values as fitCombo.
+        Model IDs are given in combination order to the models fit.
+
+        INPUTS:
+        rh (obj): ResultHandler for the number of variables chosen
+        comboGenerator (iter): combinations of design matrix columns
+        perfectMultiModels (list): models with perfect multicollinearity
+
+        RETURN:
+        ranCombos (list): arrays of the combinations ran, in model order
+        """
+
+        gram = self.gram
+        n = self.n
+        fn = n * 1.0
+        ranCombos = []
+        for combos in comboChunks(comboGenerator, self.batchSize):
+            m = len(combos)
+            lastCombo = combos[-1]
+
+            #### Combinations Holding a Dependent Group Are Not Fit ####
+            allCombos = combos
+            fitInds = NUM.where(~self.dependentMask(combos))[0]
+            if not len(fitInds):
+                for combo in allCombos:
+                    perfectMultiModels.append(self.modelString(combo))
+                self.advanceCursor(rh, perfectMultiModels, lastCombo, m)
+                continue
+            combos = combos[fitInds]
+
+            #### Stack Design Matrix Columns ####
+            choose = combos.shape[1]
+            K = choose + 1
+            columns = NUM.zeros((len(combos), K), dtype = int)
+            columns[:,1:] = combos
+            dof = n - K
+            fdof = dof * 1.0
+
+            #### Check for Perfect Multicollinearity ####
+            xx = gram.xx[columns[:,:,None], columns[:,None,:]]
+            minSV = LA.svd(xx, compute_uv = False)[:,-1]
+            runModel = NUM.array([ not UTILS.compareFloat(0.0, sv)
+                                   for sv in minSV ], dtype = bool)
+
+            #### Batched Solution ####
+            solved, coef, xxiDiag, ess, vifVals, cxxi = \
+                                                gram.solveBatch(combos)
+            runModel &= solved
+            vifVals = abs(vifVals)
+            vifVals[vifVals >= 1000] = 1000
+            if K > 2:
+                runModel &= NUM.all(vifVals < 1000, axis = 1)
+
+            #### Perfect Multicollinearity, In Combo Order ####
+            failed = NUM.ones(m, dtype = bool)
+            failed[fitInds] = ~runModel
+            for ind in NUM.where(failed)[0]:
+                perfectMultiModels.append(self.modelString(allCombos[ind]))
+
+            #### Model IDs Follow the Order of Successful Models ####
+            ranInds = NUM.where(runModel)[0]
+            if not len(ranInds):
+                self.advanceCursor(rh, perfectMultiModels, lastCombo, m)
+                continue
+            combos = combos[ranInds]
+            coef = coef[ranInds]
+            cxxi = cxxi[ranInds]
+            xxiDiag = xxiDiag[ranInds]
+            ess = ess[ranInds]
+            vifVals = vifVals[ranInds]
+
+            #### R2, Standard Errors and t-Tests ####
+            tss = gram.tss
+            s2 = ess / fdof
+            r2Adj = 1.0 - ( (ess / fdof) / (tss / (fn-1)) )
+            seBeta = NUM.sqrt(xxiDiag * s2[:,None])
+            tStat = coef / seBeta
+            if (2 <= dof <= 4) and not self.warnedTProb:
+                #### DOF Warning Once for t-Stats ####
+                STATS.tProb(tStat[0,0], dof, type = 2, silent = False)
+                self.warnedTProb = True
+            pVals = VSTATS.tProb(tStat, dof, type = 2)
+
+            #### Screens ####
+            r2Bool = r2Adj >= self.minR2
+            if K > 2:
+                vifFail = vifVals >= self.maxVIF
+                vifBool = ~vifFail.any(1)
+            else:
+                vifFail = None
+                vifBool = NUM.ones(len(ranInds), dtype = bool)
+            r2Cand = r2Adj > rh.bestR2Floor()
+            single = (r2Bool & vifBool) | r2Cand
+
+            #### Residual Diagnostics for the Rest ####
+            bulkInds = NUM.where(~single)[0]
+            if len(bulkInds):
+                jbProbs, bpProbs, pValsRob = self.calculateBatchDiagnostics(
+                                                        combos[bulkInds],
+                                                        coef[bulkInds],
+                                                        ess[bulkInds])
+
+                #### Those Reaching the Best Jarque-Bera List Are Fit ####
+                jbCand = jbProbs > self.bestJBFloor()
+                single[bulkInds[jbCand]] = True
+                keepBulk = ~jbCand
+                bulkInds = bulkInds[keepBulk]
+                jbProbs = jbProbs[keepBulk]
+                bpProbs = bpProbs[keepBulk]
+                pValsRob = pValsRob[keepBulk]
+
+            #### Interesting Models Are Fit One at a Time, In Order ####
+            fitted = NUM.ones(len(ranInds), dtype = bool)
+            numFailed = 0
+            for ind in NUM.where(single)[0]:
+                modelID = str(K) + ":" + str(self.modelCount + ind -
+                                             numFailed)
+                if not self.fitCombo(rh, tuple(combos[ind]), modelID,
+                                     perfectMultiModels, cxxi = cxxi[ind]):
+                    fitted[ind] = False
+                    numFailed += 1
+            modelInds = self.modelCount + NUM.cumsum(fitted) - 1
+
+            #### Bulk Tallies for the Rest, Robust Where BP Significant ####
+            if len(bulkInds):
+                bulkPVals = NUM.where((bpProbs < .1)[:,None], pValsRob,
+                                      pVals[bulkInds])
+                pvBool = NUM.all(bulkPVals[:,1:] <= self.maxCoef, axis = 1)
+                if rh.allJBPass:
+                    jbCount = len(bulkInds)
+                else:
+                    jbCount = (jbProbs > self.minJB).sum()
+                if vifFail is not None:
+                    bulkFail = vifFail[bulkInds]
+                else:
+                    bulkFail = None
+                rh.tallyBatch(combos[bulkInds] - 1, coef[bulkInds,1:],
+                              bulkPVals[:,1:], bulkFail)
+                self.boolResults += [r2Bool[bulkInds].sum(), pvBool.sum(),
+                                     vifBool[bulkInds].sum(), jbCount]
+                self.sumRuns += len(bulkInds)
+                self.sumDiagRuns += len(bulkInds)
+                rh.recordBatch(modelInds[bulkInds], r2Adj[bulkInds])
+                self.recordBatchJB(modelInds[bulkInds], jbProbs)
+
+            #### Process Largest VIF Values ####
+            combos = combos[fitted]
+            vifVals = vifVals[fitted]
+            if K > 2:
+                maxVIF = NUM.zeros(len(self.independentVars), dtype = float)
+                NUM.maximum.at(maxVIF, combos - 1, vifVals)
+                for ind, varName in enumerate(self.independentVars):
+                    if maxVIF[ind] > self.globalVifVals[varName]:
+                        self.globalVifVals[varName] = maxVIF[ind]
+
+            self.modelCount += len(combos)
+            ranCombos.append(combos)
+            self.advanceCursor(rh, perfectMultiModels, lastCombo, m)
+
+        return ranCombos
+
+    def startPool(self):
+        """Starts the worker processes.  The design matrix is copied once
+        into shared memory that every worker reads from."""
+
+        import multiprocessing as MP
+        if SYS.platform == "win32":
+            #### Launch Python Rather Than the Host Application ####
+            MP.set_executable(OS.path.join(SYS.exec_prefix, "pythonw.exe"))
+
+        n, k = self.x.shape
+        sharedX = MP.RawArray('d', n * k)
+        x = NUM.frombuffer(sharedX, dtype = float).reshape((n, k))
+        x[:] = self.x
+        self.x = x
+        if self.useGram:
+            self.gram.x = x
+
+        self.pool = MP.Pool(self.numWorkers, initializer = initSearchWorker,
+                            initargs = (sharedX, (n, k), self.workerState()))
+
+    def workerState(self):
+        """Returns the attributes a SearchWorker needs to fit models."""
+
+        names = ["y", "n", "independentVars", "dependentVar", "minR2",
+                 "maxCoef", "maxVIF", "minJB", "minMI", "allMIPass",
+                 "engine", "useGram", "useBatch", "useUpdate",
+                 "gateDiagnostics", "batchSize", "dependentGroups"]
+        state = dict([ (name, getattr(self, name)) for name in names ])
+        if self.useGram:
+            state['gram'] = self.gram
+        else:
+            state['corX'] = self.corX
+
+        #### Parent Issues the DOF Warning ####
+        state['warnedTProb'] = True
+        return state
+
+    def runParallel(self, rh, choose, comboGenerator, perfectMultiModels):
+        """Fits all combinations of one size across the worker pool.
+
+        INPUTS:
+        rh (obj): ResultHandler for the number of variables chosen
+        choose (int): # of variables in each combination
+        comboGenerator (iter): combinations of design matrix columns
+        perfectMultiModels (list): models with perfect multicollinearity
+        """
+
+        #### DOF Warning Once for t-Stats ####
+        dof = self.n - (choose + 1)
+        if (2 <= dof <= 4) and not self.warnedTProb:
+            STATS.tProb(0.0, dof, type = 2, silent = False)
+            self.warnedTProb = True
+
+        #### Cursor After Each Chunk, Noted as the Chunk Is Created ####
+        chunkCursors = COLL.deque()
+        def chunkTasks():
+            for combos in comboChunks(comboGenerator, self.batchSize):
+                chunkCursors.append( (combos[-1], len(combos),
+                                      self.cursorSkipped) )
+                yield choose, combos
+
+        #### Results Arrive in Chunk Order ####
+        for chunk in self.pool.imap(runSearchChunk, chunkTasks()):
+            perfectMultiModels += chunk['perfect']
+            self.mergeChunk(rh, choose, chunk, self.modelCount)
+            self.modelCount += len(chunk['ranCombos'])
+            lastCombo, numCombos, sumSkipped = chunkCursors.popleft()
+            self.advanceCursor(rh, perfectMultiModels, lastCombo, numCombos,
+                               sumSkipped = sumSkipped)
+
+    def mergeChunk(self, rh, choose, chunk, offset):
+        """Merges the results of a chunk fit by a worker.  Counts are
+        added directly.  The best R2 and Jarque-Bera lists and Moran's I
+        depend on model order, so they are replayed in order, refitting
+        only the models that can change them.  The outcome is identical
+        to fitting the chunk serially.
+
+        INPUTS:
+        rh (obj): ResultHandler for the number of variables chosen
+        choose (int): # of variables in each combination
+        chunk (dict): from SearchWorker.runChunk
+        offset (int): # of models ran before the chunk
+        """
+
+        #### Order Independent Results ####
+        rh.mergeTallies(chunk['tallies'], offset)
+        self.sumRuns += chunk['sumRuns']
+        self.sumDiagRuns += chunk['sumDiagRuns']
+        self.boolResults += chunk['boolResults']
+        for varName, vif in UTILS.iteritems(chunk['globalVifVals']):
+            if vif > self.globalVifVals[varName]:
+                self.globalVifVals[varName] = vif
+
+        #### Replay Order Dependent Results ####
+        r2Values = chunk['r2']
+        jbValues = chunk['jb']
+        allBools = chunk['allBool']
+        candidates = (allBools | (r2Values > rh.bestR2Floor()) |
+                      (jbValues > self.bestJBFloor()))
+        K = choose + 1
+        for modelInd in NUM.where(candidates)[0]:
+            allBool = allBools[modelInd]
+            inJB = jbValues[modelInd] > self.bestJBFloor()
+            if not (allBool or inJB or rh.entersBestR2(r2Values[modelInd])):
+                continue
+
+            modelID = str(K) + ":" + str(offset + modelInd)
+            combo = tuple(chunk['ranCombos'][modelInd])
+            res, residuals, hasDiag = self.fitModel(combo, modelID)
+            res.evaluateVIF(maxVIF = self.maxVIF)
+            if hasDiag:
+                keep = self.pushPopJB(res)
+            else:
+                keep = False
+            rh.rankResult(res, residuals, allBool, keep = keep)
+
+    def bestJBFloor(self):
+        """Returns the value a model must exceed to enter the best
+        Jarque-Bera list."""
+        return self.bestJB.floor()
+
+    def recordBatchJB(self, modelInds, jbValues):
+        """Hook for workers that record the Jarque-Bera p-values of bulk
+        tallied models."""
+        pass
+
+    def advanceCursor(self, rh, perfectMultiModels, lastCombo, numCombos,
+                      sumSkipped = None):
+        """Moves the cursor past combinations whose results have been
+        recorded and saves a checkpoint when one is due.
+
+        INPUTS:
+        rh (obj): ResultHandler for the number of variables chosen
+        perfectMultiModels (list): models with perfect multicollinearity
+        lastCombo (tuple): last combination recorded
+        numCombos (int): # of combinations recorded
+        sumSkipped {int, None}: # of models skipped by pruning up to
+            lastCombo, None for cursorSkipped
+        """
+
+        self.combosDone += numCombos
+        if not self.checkpointFile:
+            return
+        if TIME.time() - self.lastCheckpoint < checkpointInterval:
+            return
+
+        if sumSkipped is None:
+            sumSkipped = self.cursorSkipped
+        cursor = {'choose': len(lastCombo), 'combosDone': self.combosDone,
+                  'modelCount': self.modelCount,
+                  'lastCombo': tuple([ int(i) for i in lastCombo ]),
+                  'rh': rh, 'perfectMultiModels': perfectMultiModels}
+        self.saveCheckpoint(cursor, sumSkipped)
+        self.lastCheckpoint = TIME.time()
+
+    def searchFingerprint(self):
+        """Returns a key identifying the data and settings of the search,
+        so a checkpoint is only resumed by the same search."""
+
+        settings = [checkpointVersion, self.dependentVar,
+                    self.independentVars, self.weightsFile,
+                    self.weightsType, self.minIndVars, self.maxIndVars,
+                    self.minR2, self.maxCoef, self.maxVIF, self.minJB,
+                    self.minMI, self.engine, self.batchSize, self.prune,
+                    self.numBest]
+        sha = HASH.sha1(repr(settings).encode("utf-8"))
+        sha.update(self.x.tobytes())
+        sha.update(self.y.tobytes())
+        return sha.hexdigest()
+
+    def saveCheckpoint(self, cursor, sumSkipped):
+        """Writes the accumulated results and the cursor to the checkpoint
+        file.
+
+        INPUTS:
+        cursor (dict): position within the current number of variables
+        sumSkipped (int): # of models skipped by pruning up to the cursor
+        """
+
+        state = dict([ (name, getattr(self, name))
+                       for name in checkpointNames ])
+        state['sumSkipped'] = sumSkipped
+        state['key'] = self.checkpointKey
+        state['cursor'] = cursor
+        if self.useUpdate:
+            state['updater'] = self.updater
+
+        #### Write Then Rename So a Crash Never Leaves a Partial File ####
+        tempPath = self.checkpointFile + ".%i.tmp" % OS.getpid()
+        fo = open(tempPath, "wb")
+        try:
+            PICKLE.dump(state, fo, PICKLE.HIGHEST_PROTOCOL)
+        finally:
+            fo.close()
+        if OS.path.exists(self.checkpointFile):
+            OS.remove(self.checkpointFile)
+        OS.rename(tempPath, self.checkpointFile)
+
+    def loadCheckpoint(self):
+        """Restores the results saved in the checkpoint file.  Returns the
+        cursor of the interrupted number of variables, or None to search
+        from the beginning."""
+
+        if not OS.path.exists(self.checkpointFile):
+            return None
+        try:
+            fi = open(self.checkpointFile, "rb")
+            try:
+                state = PICKLE.load(fi)
+            finally:
+                fi.close()
+        except Exception:
+            state = None
+        if state is None or state['key'] != self.checkpointKey:
+            MSG.addMessage("WARNING", "checkpointMismatch")
+            return None
+
+        for name in checkpointNames:
+            setattr(self, name, state[name])
+        self.cursorSkipped = self.sumSkipped
+        if self.useUpdate:
+            self.updater = state['updater']
+            self.updater.gram = self.gram
+
+        #### Reattach Data and Weights to the Result Handlers ####
+        cursor = state['cursor']
+        for rh in list(self.resultDict.values()) + [cursor['rh']]:
+            rh.ssdo = self.ssdo
+            rh.weightMatrix = self.weightsMatrix
+            rh.moranWeights = self.moranWeights
+            rh.residualFunc = self.survivorResiduals
+
+        return cursor
+
+    def saveShard(self):
+        """Writes the partial results of the shard to shardFile."""
+
+        state = dict([ (name, getattr(self, name))
+                       for name in checkpointNames ])
+        state['settings'] = dict([ (name, getattr(self, name))
+                                   for name in shardSettingNames ])
+        state['key'] = self.searchFingerprint()
+        state['numShards'] = self.numShards
+        state['shardIndex'] = self.shardIndex
+        state['jbSurvivorMI'] = self.jbSurvivorMI
+
+        #### Write Then Rename So a Crash Never Leaves a Partial File ####
+        tempPath = self.shardFile + ".%i.tmp" % OS.getpid()
+        fo = open(tempPath, "wb")
+        try:
+            PICKLE.dump(state, fo, PICKLE.HIGHEST_PROTOCOL)
+        finally:
+            fo.close()
+        if OS.path.exists(self.shardFile):
+            OS.remove(self.shardFile)
+        OS.rename(tempPath, self.shardFile)
+
+    def survivorResiduals(self, results):
+        """Recomputes the residuals of models in a best list into the
+        reusable residual buffer.  Returns a view with one column per
+        result.
+
+        INPUTS:
+        results (list): OLSResults with design matrix columns and betas
+        """
+
+        residuals = self.residualBuffer[:,0:len(results)]
+        for ind, olsRes in enumerate(results):
+            comboX = self.x[0:,olsRes.columns]
+            e = self.y - NUM.dot(comboX, olsRes.betas)
+            residuals[:,ind] = e.flatten()
+        return residuals
 
     def getMoranStats(self):
-        self.sumMoranRuns = 0
-        self.sumMoranPass = 0
-        miValues = []
-        miModels = []
-        miSorted = NUM.array([(0.0, 0.0), (0.0, 0.0), (0.0, 0.0)], 
-                             dtype = [('mi', float), ('r2', float)])
+        """Counts the models Moran's I was run for and ranks the highest
+        Moran's I p-values across the result stores.  p-values the same
+        within UTILS.compareFloat are ties, broken by the highest adjusted
+        R2 and then by the earliest model."""
+
+        #### Stored Models With Moran's I ####
+        miValues = [ NUM.empty(0) ]
+        r2Values = [ NUM.empty(0) ]
+        sizes = [ NUM.empty(0, dtype = int) ]
+        modelNums = [ NUM.empty(0, dtype = int) ]
+        miRows = []
         for resKey, resHandler in UTILS.iteritems(self.resultDict):
-            for olsKey, olsRes in UTILS.iteritems(resHandler.olsResults):
-                miValue = olsRes.miPVal
-                if miValue is not None:
-                    numRes = len(miValues)
-                    if numRes < 3:
-                        miValues.append(miValue)
-                        miModels.append(olsRes)
-                    else:
-                        if numRes == 3:
-                            miSorted['mi'] = miValues
-                            miSorted['r2'] = [ ols.r2 for ols in miModels ]
-
-                        minIndex = miSorted.argsort(order = ('mi', 'r2'))[0]
-                        minValue = miValues[minIndex]
-                        valueSame = UTILS.compareFloat(minValue, miValue)
-                        update = False
-                        if valueSame:
-                            if olsRes.r2 > miModels[minIndex].r2:
-                                update = True
-                        else:
-                            if minValue < miValue:
-                                update = True
-                        if update:
-                            miValues[minIndex] = miValue
-                            miModels[minIndex] = olsRes
-                            miSorted['mi'][minIndex] = miValue
-                            miSorted['r2'][minIndex] = olsRes.r2
-                    self.sumMoranRuns += 1
-                    if miValue > self.minMI:
-                        self.sumMoranPass += 1
-
-        miOrder = list(miSorted.argsort(order = ('mi', 'r2')))
-        #miOrder = list(NUM.argsort(miValues))
-        miOrder.reverse()
+            store = resHandler.olsResults
+            miColumn = store.column('mi')
+            rowInds = NUM.where(~NUM.isnan(miColumn))[0]
+            miValues.append(miColumn[rowInds])
+            r2Values.append(store.column('r2')[rowInds])
+            sizes.append(NUM.zeros(len(rowInds), dtype = int) +
+                         store.numChoose)
+            modelNums.append(store.column('model')[rowInds])
+            miRows += [ (store, rowInd) for rowInd in rowInds ]
+        miValues = NUM.concatenate(miValues)
+        r2Values = NUM.concatenate(r2Values)
+        sizes = NUM.concatenate(sizes)
+        modelNums = NUM.concatenate(modelNums)
+        self.sumMoranRuns = len(miValues)
+        self.sumMoranPass = int((miValues > self.minMI).sum())
+
+        #### Group p-values Equal Within Tolerance, Highest First ####
+        miDesc = NUM.argsort(-miValues, kind = 'mergesort')
+        groups = NUM.zeros(len(miValues), dtype = int)
+        group = 0
+        for prevInd, ind in zip(miDesc[0:-1], miDesc[1:]):
+            if not UTILS.compareFloat(miValues[prevInd], miValues[ind]):
+                group += 1
+            groups[ind] = group
+
+        #### Highest Moran's I p-values ####
+        miOrder = NUM.lexsort((modelNums, sizes, -r2Values, groups))
         self.miReportRows = []
-        for miIndex in miOrder:
-            try:
-                miResult = miModels[miIndex]
-                self.miReportRows.append(miResult.report(orderType = 2))
-            except:
-                pass
+        for ind in miOrder[0:self.numBest]:
+            store, rowInd = miRows[ind]
+            miResult = store.resultAt(rowInd)
+            self.miReportRows.append(miResult.report(orderType = 2))
 
     def createJBReport(self):
+        """Runs Moran's I for the best Jarque-Bera models and creates
+        their report rows."""
+
         self.jbReportRows = []
-        sortIndex = NUM.argsort(self.jbValues).tolist()
-        sortIndex.reverse()
-        for ind in sortIndex:
-            olsRes = self.jbModels[ind]
+        survivors = [ olsRes for jbValue, olsRes in self.bestJB.ranked() ]
+
+        #### Best Jarque-Bera Models Are Kept in the Result Stores ####
+        storedList = []
+        for olsRes in survivors:
+            numChoose = int(olsRes.id.split(":")[0]) - 1
+            storedList.append(self.resultDict[numChoose].olsResults[olsRes.id])
+        missing = [ ind for ind, stored in enumerate(storedList)
+                    if stored.miPVal is None ]
+        self.jbSurvivorMI = [ storedList[ind].id for ind in missing ]
+        if len(missing) and not self.allMIPass:
+            residuals = self.survivorResiduals([ survivors[ind]
+                                                 for ind in missing ])
+        else:
+            residuals = None
+
+        #### Bulk Moran's I for Best Jarque-Bera ####
+        if self.moranWeights is not None and residuals is not None:
+            pVals = self.moranWeights.moransI(residuals)[-1]
+            for ind, pVal in zip(missing, pVals):
+                storedList[ind].setMoransI(pVal)
+
+        for ind, olsRes in enumerate(storedList):
             if olsRes.miPVal is None:
                 if not self.allMIPass:
-                    residuals = self.jbResiduals[:,ind].flatten()
-                    mi = runMoransI(self.ssdo, residuals, self.weightsMatrix,
+                    column = residuals[:,missing.index(ind)].flatten()
+                    mi = runMoransI(self.ssdo, column, self.weightsMatrix,
                                     weightsType = self.weightsType)
                     miPVal = mi.pVal
                 else:
@@ -773,25 +2302,9 @@ class ExploratoryRegression(object):
             olsOut = olsRes.report(orderType = 1)
             self.jbReportRows.append(olsOut)
 
-
-    def pushPopJB(self, olsRes, residuals):
+    def pushPopJB(self, olsRes):
         """Keeps track of the best (highest) Jarque-Bera p-values."""
-        lenRes = len(self.jbValues)
-        keep = False
-        if lenRes < 3:
-            self.jbValues.append(self.JBProb)
-            self.jbModels.append(olsRes)
-            self.jbResiduals[:,lenRes] = residuals
-            keep = True
-        else:
-            minIndex = NUM.argsort(self.jbValues)[0]
-            minValue = self.jbValues[minIndex]
-            if minValue < self.JBProb:
-                self.jbValues[minIndex] = self.JBProb
-                self.jbModels[minIndex] = olsRes
-                self.jbResiduals[:,minIndex] = residuals
-                keep = True
-        return keep
+        return self.bestJB.offer(self.JBProb, olsRes)
 
     def endSummary(self):
         """Creates End Summary for Report File."""
@@ -825,6 +2338,10 @@ class ExploratoryRegression(object):
         sumOut = [ self.sumRuns for i in self.boolResults ]
         sumOut += [self.sumMoranRuns]
 
+        #### Jarque-Bera Only Evaluated for Models With Residuals ####
+        boolPerc[3] = returnPerc(self.boolResults[3], self.sumDiagRuns)
+        sumOut[3] = self.sumDiagRuns
+
         for ind, category in enumerate(categories):
             outValue = LOCALE.format("%0.2f", boolPerc[ind])
             outCutoff = cutoffList[ind]
@@ -837,6 +2354,19 @@ class ExploratoryRegression(object):
                                         header = passHeader,
                                         pad = 1, justify = "right")
 
+        #### Models Skipped by Branch-and-Bound ####
+        if self.prune:
+            skipMess = MSG.getMessage("modelsSkipped", self.sumSkipped)
+            self.passReport += "\n" + skipMess + "\n"
+
+        #### Share of the Combinations a Budgeted Search Covered ####
+        if self.budgeted:
+            coverPerc = LOCALE.format("%0.2f", returnPerc(self.numSearched,
+                                                          self.numSpace))
+            coverMess = MSG.getMessage("budgetCoverage", self.numSearched,
+                                       self.numSpace, coverPerc)
+            self.passReport += "\n" + coverMess + "\n"
+
         ##### Variable Significance and VIF Reports ####
         ##### Create Table Headers ####
         signHeader = ARCPY.GetIDMessage(84305)
@@ -873,11 +2403,13 @@ class ExploratoryRegression(object):
                 totalPos += numPos
 
                 #### VIF Results ####
-                numViolate, covariates = result.vifDict[varName]
+                numViolate = result.vifDict[varName][0]
                 totalViolations += numViolate
-                for covariate in covariates:
-                    if covariate != varName:
-                        totalCovariates[covariate] += 1
+                varIndex = result.varIndex[varName]
+                pairCounts = result.vifPairs[varIndex]
+                for covInd, covariate in enumerate(self.independentVars):
+                    if covariate != varName and pairCounts[covInd]:
+                        totalCovariates[covariate] += int(pairCounts[covInd])
 
             #### Add Perfect Multicollinearity Results * ####
             successfulRun = totalRan > 0
@@ -959,7 +2491,9 @@ class ExploratoryRegression(object):
         ##### Residual Normality Summary ####
         jbHeader = ARCPY.GetIDMessage(84310)
         jbResults = [ [ARCPY.GetIDMessage(84042), ARCPY.GetIDMessage(84021),
-                       ARCPY.GetIDMessage(84249), ARCPY.GetIDMessage(84036),
+                       ARCPY.GetIDMessage(84249),
+                       MSG.getMessage("looRMSE"),
+                       ARCPY.GetIDMessage(84036),
                        ARCPY.GetIDMessage(84284), ARCPY.GetIDMessage(84292),
                        ARCPY.GetIDMessage(84286)] ]
         jbResults += self.jbReportRows
@@ -970,11 +2504,12 @@ class ExploratoryRegression(object):
         if not self.allMIPass:
             miHeader = ARCPY.GetIDMessage(84311)
             miResults = [ [ARCPY.GetIDMessage(84292), ARCPY.GetIDMessage(84021),
-                           ARCPY.GetIDMessage(84249), ARCPY.GetIDMessage(84042),
+                           ARCPY.GetIDMessage(84249),
+                           MSG.getMessage("looRMSE"),
+                           ARCPY.GetIDMessage(84042),
                            ARCPY.GetIDMessage(84036), ARCPY.GetIDMessage(84284),
                            ARCPY.GetIDMessage(84286)] ]
             miResults += self.miReportRows
-            justify = ["right"] * 6 + ["left"]
             self.miReport = UTILS.outputTextTable(miResults, header = miHeader,
                                               pad = 1, justify = masterJustify)
         else:
@@ -1037,11 +2572,15 @@ class ExploratoryRegression(object):
                            dashMess]
         self.fullReport = "\n".join(self.fullReport)
 
-    def calculate(self, comboX):
-        """Performs OLS and related diagnostics."""
+    def calculate(self, comboX, columns):
+        """Performs OLS and related diagnostics.
+
+        INPUTS:
+        comboX (array): design matrix of the model
+        columns (list): design matrix columns, intercept (0) first
+        """
 
         #### Shorthand Attributes ####
-        ssdo = self.ssdo
         x = comboX
         n, k = NUM.shape(comboX)
         y = self.y
@@ -1102,32 +2641,17 @@ class ExploratoryRegression(object):
         tStatRob = (coef.T / seBetaRob).flatten()
 
         #### DOF Warning Once for t-Stats ####
-        silentVector = [ True for i in range(k) ]
         if (2 <= dof <= 4) and not self.warnedTProb:
-            silentVector[0] = False
+            STATS.tProb(tStat[0], dof, type = 2, silent = False)
             self.warnedTProb = True
 
-        #### Coefficient t-Tests ####
-        pVals = []
-        pValsRob = []
-        for varInd in UTILS.ssRange(k):
-            #### General ####
-            try:
-                p = STATS.tProb(tStat[varInd], dof, type = 2,
-                                silent = silentVector[varInd])
-            except:
-                p =  NUM.nan
-                badProbs = True
-            pVals.append(p)
-
-            #### Robust ####
-            try:
-                p = STATS.tProb(tStatRob[varInd], dof, type = 2,
-                                silent = True)
-            except:
-                p =  NUM.nan
-                badProbs = True
-            pValsRob.append(p)
+        #### Coefficient t-Tests, Classic and Robust in One Call ####
+        allProbs = VSTATS.tProb(NUM.concatenate([tStat, tStatRob]), dof,
+                                type = 2)
+        if NUM.isnan(allProbs).any():
+            badProbs = True
+        pVals = list(allProbs[0:k])
+        pValsRob = list(allProbs[k:])
 
         #### Jarque-Bera Test For Normality of the Residuals ####
         muE = (e.sum()) / fn
@@ -1139,11 +2663,6 @@ class ExploratoryRegression(object):
         skew = u3 / denomS
         kurt = u4 / denomK
         self.JB = (n/6.) * ( skew**2. + ( (kurt - 3.)**2. / 4. ))
-        if self.JB >= 0.0:
-            self.JBProb = STATS.chiProb(self.JB, 2, type = 1)
-        else:
-            self.JBProb = NUM.nan
-            badProbs = True
 
         #### Breusch-Pagan Test for Heteroskedasticity ####
         u2y = NUM.dot(xt, u2)
@@ -1156,21 +2675,13 @@ class ExploratoryRegression(object):
         tssU = NUM.dot(ssU.T, ssU)
         r2U = 1.0 - (essU/tssU)
         self.BP = (fn * r2U)[0][0]
-        if self.BP >= 0.0:
-            self.BPProb = STATS.chiProb(self.BP, (k-1), type = 1)
-        else:
-            self.BPProb = NUM.nan
-            badProbs = True
 
         #### Classic Joint-Hypothesis F-Test ####
         q = k - 1
         fq = q * 1.0
         self.fStat = (r2/fq) / ((1 - r2) / (fn - k))
-        try:
-            self.fProb = abs(STATS.fProb(self.fStat, q,
-                                      (n-k), type = 1))
-        except:
-            self.fProb = NUM.nan
+        self.fProb = abs(float(VSTATS.fProb(self.fStat, q, (n-k), type = 1)))
+        if NUM.isnan(self.fProb):
             badProbs = True
 
         #### Wald Robust Joint Hypothesis Test ####
@@ -1185,11 +2696,17 @@ class ExploratoryRegression(object):
             return False
 
         self.waldStat = ( NUM.dot(NUM.dot(Rb.T, invRbR), Rb) )[0][0]
-        if self.waldStat >= 0.0:
-            self.waldProb = STATS.chiProb(self.waldStat, q, type = 1)
-        else:
-            self.waldProb = NUM.nan
+
+        #### Chi-Square Tests in One Call, Undefined Below Zero ####
+        chiStats = NUM.array([self.JB, self.BP, self.waldStat])
+        valid = chiStats >= 0.0
+        chiProbs = VSTATS.chiProb(NUM.where(valid, chiStats, 0.0),
+                                  [2, k - 1, q], type = 1)
+        chiProbs[~valid] = NUM.nan
+        if not valid.all():
             badProbs = True
+        self.JBProb, self.BPProb, self.waldProb = [ float(p) for p in
+                                                    chiProbs ]
 
         #### Log-Likelihood ####
         self.logLik = -(n / 2.) * (1. + NUM.log(2. * NUM.pi)) - \
@@ -1200,13 +2717,17 @@ class ExploratoryRegression(object):
         self.aic = -2. * self.logLik + 2. * k1
         self.aicc = -2. * self.logLik + 2. * k1 * (fn / (fn - k1 - 1))
 
+        #### Leave-One-Out Prediction Error From the Hat Diagonal ####
+        self.press, self.looRMSE = RU.leaveOneOut(x, xxi, e)
+
         #### Calculate the Variance Inflation Factor ####
         if k <= 2:
             self.vifVal = ARCPY.GetIDMessage(84090)
             self.vif = False
         else:
-            xTemp = xt[1:]
-            corX = NUM.corrcoef(xTemp)
+            #### Subset of the Correlation Matrix of All Variables ####
+            slopes = [ col - 1 for col in columns[1:] ]
+            corX = self.corX[NUM.ix_(slopes, slopes)]
             try:
                 ic = LA.inv(corX)
                 self.vifVal = abs(ic.diagonal())
@@ -1244,6 +2765,517 @@ class ExploratoryRegression(object):
 
         return True
 
+    def calculateGram(self, columns, cxxi = None):
+        """Performs OLS from the precomputed cross-product matrices.  Only
+        the diagnostics that do not require residuals are calculated; the
+        coefficient t-tests are left to calculateResidualDiagnostics so
+        that classic and robust run in one call.
+
+        INPUTS:
+        columns (list): design matrix columns, intercept (0) first
+        cxxi {array, None}: inverse of the centred cross-products from
+                            solveBatch, whose multicollinearity check
+                            has been made by runBatch
+        """
+
+        #### Shorthand Attributes ####
+        gram = self.gram
+        n = gram.n
+        k = len(columns)
+
+        #### General Information ####
+        fn = n * 1.0
+        dof = n - k
+        fdof = dof * 1.0
+
+        #### Solve From Centred Cross-Products ####
+        checked = cxxi is not None
+        try:
+            if self.useUpdate and not checked:
+                cxxi = self.updater.inverse(columns[1:])
+            if cxxi is not None:
+                coef, xxi, ess, vifVal = gram.solveInverse(columns, cxxi)
+            else:
+                coef, xxi, ess, vifVal = gram.solve(columns)
+            solved = True
+        except:
+            solved = False
+
+        #### Check for Perfect Multicollinearity, Unless the Batch Did ####
+        #### 1 / trace((X'X)^-1) Bounds the Smallest Singular Value ####
+        if not (checked or (self.useUpdate and solved and
+                            0.0 < xxi.trace() < maxInverseTrace)):
+            U, s, V = LA.svd(gram.subset(columns))
+            if UTILS.compareFloat(0.0, s[-1]):
+                return False
+
+        if not solved:
+            #### Perfect multicollinearity, cannot proceed ####
+            return False
+
+        #### Sum Of Squares, R2, Etc. ####
+        tss = gram.tss
+        s2 = (ess / fdof)
+        s2mle = (ess / fn)
+        r2 = 1.0 - (ess/tss)
+        r2Adj =  1.0 - ( (ess / (fdof)) / (tss / (fn-1)) )
+
+        #### Variance-Covariance for Coefficients ####
+        varBeta = xxi * s2
+
+        #### Standard Errors / t-Statistics ####
+        seBeta = NUM.sqrt(varBeta.diagonal())
+        tStat = (coef.T / seBeta).flatten()
+
+        #### DOF Warning Once for t-Stats ####
+        if (2 <= dof <= 4) and not self.warnedTProb:
+            STATS.tProb(tStat[0], dof, type = 2, silent = False)
+            self.warnedTProb = True
+
+        #### Log-Likelihood ####
+        self.logLik = -(n / 2.) * (1. + NUM.log(2. * NUM.pi)) - \
+                       (n / 2.) * NUM.log(s2mle)
+
+        #### AIC/AICc ####
+        k1 = k + 1
+        self.aic = -2. * self.logLik + 2. * k1
+        self.aicc = -2. * self.logLik + 2. * k1 * (fn / (fn - k1 - 1))
+
+        #### Variance Inflation Factor From the Centred Inverse ####
+        if k <= 2:
+            self.vifVal = ARCPY.GetIDMessage(84090)
+            self.vif = False
+        else:
+            self.vifVal = abs(vifVal)
+            self.vifVal[self.vifVal >= 1000] = 1000
+            self.vif = True
+
+        #### Set Attributes ####
+        self.dof = dof
+        self.coef = coef
+        self.xxi = xxi
+        self.yBar = gram.yBar
+        self.ess = ess
+        self.tss = tss
+        self.varCoef = varBeta
+        self.seCoef = seBeta
+        self.tStats = tStat
+        self.r2 = r2
+        self.r2Adj = r2Adj
+        self.s2 = s2
+        self.s2mle = s2mle
+        self.q = k - 1
+        self.badProbs = False
+
+        return True
+
+    def calculateResidualDiagnostics(self, columns):
+        """Completes a Gram engine fit with the coefficient t-tests and
+        the residual based diagnostics: Jarque-Bera, Breusch-Pagan, Robust
+        Standard Errors and the leave-one-out prediction error.
+
+        INPUTS:
+        columns (list): design matrix columns, intercept (0) first
+        """
+
+        #### Shorthand Attributes ####
+        x = self.x[:,columns]
+        n, k = x.shape
+        xxi = self.xxi
+        coef = self.coef
+        dof = self.dof
+        fn = n * 1.0
+
+        #### Residuals ####
+        e = self.gram.residuals(columns, coef)
+        u2 = e * e
+
+        #### White's Robust Standard Errors ####
+        dofScale =  (int( n / (n - k) )) * 1.0
+        sHat = NUM.dot((u2 * x).T, x) * dofScale
+        varBetaRob = NUM.dot(NUM.dot(xxi, sHat), xxi)
+        seBetaRob =  NUM.sqrt(varBetaRob.diagonal())
+        tStatRob = (coef.T / seBetaRob).flatten()
+
+        #### Coefficient t-Tests, Classic and Robust in One Call ####
+        allProbs = VSTATS.tProb(NUM.concatenate([self.tStats, tStatRob]),
+                                dof, type = 2)
+        if NUM.isnan(allProbs).any():
+            self.badProbs = True
+        pVals = list(allProbs[0:k])
+        pValsRob = list(allProbs[k:])
+
+        #### Jarque-Bera Test For Normality of the Residuals ####
+        muE = (e.sum()) / fn
+        devE = e - muE
+        u3 = (devE**3.0).sum() / fn
+        u4 = (devE**4.0).sum() / fn
+        denomS = self.s2mle**1.5
+        denomK = self.s2mle**2.0
+        skew = u3 / denomS
+        kurt = u4 / denomK
+        self.JB = (n/6.) * ( skew**2. + ( (kurt - 3.)**2. / 4. ))
+
+        #### Breusch-Pagan Test for Heteroskedasticity ####
+        u2y = NUM.dot(x.T, u2)
+        bpCoef = NUM.dot(xxi, u2y)
+        u2Hat = NUM.dot(x, bpCoef)
+        eU = u2 - u2Hat
+        essU = NUM.dot(eU.T, eU)
+        u2Bar = (u2.sum()) / fn
+        ssU = u2 - u2Bar
+        tssU = NUM.dot(ssU.T, ssU)
+        r2U = 1.0 - (essU/tssU)
+        self.BP = (fn * r2U)[0][0]
+
+        #### Chi-Square Tests in One Call, Undefined Below Zero ####
+        chiStats = NUM.array([self.JB, self.BP])
+        valid = chiStats >= 0.0
+        chiProbs = VSTATS.chiProb(NUM.where(valid, chiStats, 0.0),
+                                  [2, k - 1], type = 1)
+        chiProbs[~valid] = NUM.nan
+        if not valid.all():
+            self.badProbs = True
+        self.JBProb, self.BPProb = [ float(p) for p in chiProbs ]
+
+        #### Leave-One-Out Prediction Error From the Hat Diagonal ####
+        self.press, self.looRMSE = RU.leaveOneOut(x, xxi, e)
+
+        #### Set Attributes ####
+        self.residuals = e
+        self.seResiduals = NUM.sqrt(self.s2)
+        self.varCoefRob = varBetaRob
+        self.seCoefRob = seBetaRob
+        self.tStatsRob = tStatRob
+        self.pVals = pVals
+        self.pValsRob = pValsRob
+
+    def skipResidualDiagnostics(self):
+        """Completes a Gram engine fit without residuals: classic
+        coefficient t-tests only, the residual based diagnostics NaN."""
+
+        pVals = VSTATS.tProb(self.tStats, self.dof, type = 2)
+        if NUM.isnan(pVals).any():
+            self.badProbs = True
+        self.pVals = list(pVals)
+        self.residuals = None
+        self.JBProb = NUM.nan
+        self.BPProb = NUM.nan
+        self.looRMSE = NUM.nan
+
+    def calculateBatchDiagnostics(self, combos, coef, ess):
+        """Jarque-Bera and Breusch-Pagan for models of one size tallied in
+        bulk, and robust coefficient p-values where Breusch-Pagan is
+        significant, as calculate would give them.  Residuals are formed
+        for blocks of models at a time.
+
+        INPUTS:
+        combos (array): (m x c) design matrix column indices of the
+                        variables, intercept excluded
+        coef (array): (m x c+1) beta coefficients, intercept first
+        ess (array): m Error Sums of Squares
+
+        RETURN:
+        jbProbs (array): m Jarque-Bera p-values
+        bpProbs (array): m Breusch-Pagan p-values
+        pValsRob (array): (m x c+1) robust coefficient p-values, NaN where
+                          Breusch-Pagan is not significant
+        """
+
+        #### Shorthand Attributes ####
+        gram = self.gram
+        n = self.n
+        fn = n * 1.0
+        m, c = combos.shape
+        k = c + 1
+        dof = n - k
+        dofScale = (int( n / (n - k) )) * 1.0
+        s2mle = ess / fn
+
+        jbStats = NUM.empty(m, dtype = float)
+        bpStats = NUM.empty(m, dtype = float)
+        seBetaRob = NUM.empty((m, k), dtype = float)
+        seBetaRob.fill(NUM.nan)
+        blockSize = max(batchElements // (n * k), 1)
+        for start in range(0, m, blockSize):
+            block = slice(start, start + blockSize)
+            blockCombos = combos[block]
+            blockCoef = coef[block]
+            e = gram.residualsBatch(blockCombos, blockCoef)
+            u2 = e * e
+
+            #### Jarque-Bera Test For Normality of the Residuals ####
+            devE = e - e.mean(0)
+            u3 = (devE**3.0).sum(0) / fn
+            u4 = (devE**4.0).sum(0) / fn
+            skew = u3 / s2mle[block]**1.5
+            kurt = u4 / s2mle[block]**2.0
+            jbStats[block] = (n/6.) * ( skew**2. + ( (kurt - 3.)**2. / 4. ))
+
+            #### Breusch-Pagan: Regression of u2 on the Variables ####
+            slopes = blockCombos - 1
+            cxxi = LA.inv(gram.cxx[slopes[:,:,None], slopes[:,None,:]])
+            u2Sum = u2.sum(0)
+            u2x = NUM.dot(self.x.T, u2).T
+            cu2x = (u2x[NUM.arange(len(blockCombos))[:,None], blockCombos] -
+                    gram.xBar[blockCombos] * u2Sum[:,None])
+            regU = NUM.einsum('mi,mij,mj->m', cu2x, cxxi, cu2x)
+            ssU = u2 - u2Sum / fn
+            tssU = (ssU * ssU).sum(0)
+            bpStats[block] = fn * (regU / tssU)
+
+            #### White's Robust Standard Errors Where BP is Significant ####
+            bpProbs = self.chiProbs(bpStats[block], c)
+            robust = NUM.where(bpProbs < .1)[0]
+            if not len(robust):
+                continue
+            means = gram.xBar[blockCombos[robust]]
+            cm = NUM.einsum('mij,mj->mi', cxxi[robust], means)
+            xxi = NUM.empty((len(robust), k, k), dtype = float)
+            xxi[:,0,0] = (1.0 / n) + (means * cm).sum(1)
+            xxi[:,0,1:] = -cm
+            xxi[:,1:,0] = -cm
+            xxi[:,1:,1:] = cxxi[robust]
+            columns = NUM.zeros((len(robust), k), dtype = int)
+            columns[:,1:] = blockCombos[robust]
+            xr = NUM.einsum('nmi,mij->nmj', self.x[:,columns], xxi)
+            varBetaRob = NUM.einsum('nm,nmj->mj', u2[:,robust], xr * xr)
+            seBetaRob[start + robust] = NUM.sqrt(varBetaRob * dofScale)
+
+        #### Chi-Square and Robust t-Tests ####
+        jbProbs = self.chiProbs(jbStats, 2)
+        bpProbs = self.chiProbs(bpStats, c)
+        pValsRob = VSTATS.tProb(coef / seBetaRob, dof, type = 2)
+
+        return jbProbs, bpProbs, pValsRob
+
+    def chiProbs(self, chiStats, dof):
+        """Returns upper tail chi-square p-values, NaN for statistics
+        below zero.
+
+        INPUTS:
+        chiStats (array): chi-square statistics
+        dof (int): degrees of freedom
+        """
+
+        valid = chiStats >= 0.0
+        chiProbs = VSTATS.chiProb(NUM.where(valid, chiStats, 0.0), dof,
+                                  type = 1)
+        chiProbs[~valid] = NUM.nan
+        return chiProbs
+
+class SearchWorker(ExploratoryRegression):
+    """Fits chunks of combinations in a worker process.  Created from the
+    state of the parent ExploratoryRegression and a shared design matrix,
+    without the data object or spatial weights."""
+
+    def __init__(self, sharedX, shape, state):
+
+        #### Set Initial Attributes ####
+        self.__dict__.update(state)
+        self.x = NUM.frombuffer(sharedX, dtype = float).reshape(shape)
+        if self.useGram:
+            self.gram.x = self.x
+            self.gram.y = self.y
+        if self.useUpdate:
+            self.updater = RU.InverseUpdater(self.gram)
+
+    def pushPopJB(self, olsRes):
+        """Records the Jarque-Bera p-value for the parent to rank."""
+        modelInd = int(olsRes.id.split(":")[-1])
+        self.jbChunk[modelInd] = self.JBProb
+        return False
+
+    def bestJBFloor(self):
+        """Best Jarque-Bera list is replayed by the parent."""
+        return NUM.inf
+
+    def recordBatchJB(self, modelInds, jbValues):
+        """Records the Jarque-Bera p-values of bulk tallied models."""
+        self.jbChunk[modelInds] = jbValues
+
+    def advanceCursor(self, rh, perfectMultiModels, lastCombo, numCombos,
+                      sumSkipped = None):
+        """The parent keeps the cursor and checkpoints."""
+        pass
+
+    def runChunk(self, choose, combos):
+        """Fits a chunk of combinations and returns the partial results.
+
+        INPUTS:
+        choose (int): # of variables in each combination
+        combos (array): (m x choose) design matrix column indices
+        """
+
+        #### Reset Chunk Results ####
+        numCombos = len(combos)
+        self.sumRuns = 0
+        self.sumDiagRuns = 0
+        self.modelCount = 0
+        self.boolResults = NUM.zeros(4, dtype = int)
+        self.globalVifVals = COLL.defaultdict(float)
+        self.jbChunk = NUM.empty(numCombos, dtype = float)
+        self.jbChunk.fill(NUM.nan)
+        rh = ChunkResultHandler(self.independentVars, choose, numCombos,
+                                minR2 = self.minR2, maxCoef = self.maxCoef,
+                                maxVIF = self.maxVIF, minJB = self.minJB)
+
+        #### Fit Models, Numbered in Chunk Order ####
+        perfectMultiModels = []
+        if self.useBatch:
+            ranCombos = self.runBatch(rh, iter(combos), perfectMultiModels)
+        else:
+            ranCombos = []
+            for combo in combos:
+                modelID = str(choose + 1) + ":" + str(len(ranCombos))
+                if self.fitCombo(rh, tuple(combo), modelID,
+                                 perfectMultiModels):
+                    ranCombos.append(combo[None,:])
+        if len(ranCombos):
+            ranCombos = NUM.concatenate(ranCombos)
+        else:
+            ranCombos = NUM.empty((0, choose), dtype = int)
+        numRan = len(ranCombos)
+
+        return {'perfect': perfectMultiModels, 'ranCombos': ranCombos,
+                'r2': rh.r2Values[0:numRan], 'jb': self.jbChunk[0:numRan],
+                'allBool': rh.allBools[0:numRan],
+                'tallies': rh.returnTallies(), 'sumRuns': self.sumRuns,
+                'sumDiagRuns': self.sumDiagRuns,
+                'boolResults': self.boolResults,
+                'globalVifVals': dict(self.globalVifVals)}
+
+class ShardMerge(ExploratoryRegression):
+    """Rebuilds the report of an Exploratory Regression searched in shards
+    from the partial result files of every shard, without the data object
+    or spatial weights.  Models are renumbered in the order of a single
+    run, the order independent results are added and the best lists are
+    rebuilt from the lists of the shards.
+
+    INPUTS:
+    shardFiles (list): paths to the partial results of all shards
+    outputReportFile (str): path to the text report
+    """
+
+    def __init__(self, shardFiles, outputReportFile):
+
+        #### Load Shards in Shard Order ####
+        states = []
+        for shardFile in shardFiles:
+            fi = open(shardFile, "rb")
+            try:
+                states.append(PICKLE.load(fi))
+            finally:
+                fi.close()
+        states.sort(key = OP.itemgetter('shardIndex'))
+
+        #### Shards Must Be the Complete Set From One Search ####
+        keys = set([ state['key'] for state in states ])
+        shardInds = [ state['shardIndex'] for state in states ]
+        if len(keys) > 1 or shardInds != list(range(states[0]['numShards'])):
+            MSG.addMessage("ERROR", "shardsIncomplete")
+            raise SystemExit()
+
+        #### Set Initial Attributes ####
+        self.__dict__.update(states[0]['settings'])
+        self.outputReportFile = outputReportFile
+        self.ssdo = None
+        self.weightsMatrix = None
+        self.moranWeights = None
+        self.budgeted = False
+
+        #### Merge and Report ####
+        self.mergeShards(states)
+
+    def mergeShards(self, states):
+        """Merges the shard results and writes the report.
+
+        INPUTS:
+        states (list): partial results of the shards, in shard order
+        """
+
+        #### Order Independent Results ####
+        self.sumRuns = sum([ state['sumRuns'] for state in states ])
+        self.sumDiagRuns = sum([ state['sumDiagRuns'] for state in states ])
+        self.sumSkipped = sum([ state['sumSkipped'] for state in states ])
+        self.boolResults = NUM.zeros(4, dtype = int)
+        self.globalVifVals = COLL.defaultdict(float)
+        self.perfectMultiWarnBool = False
+        for state in states:
+            self.boolResults += state['boolResults']
+            for varName, vif in UTILS.iteritems(state['globalVifVals']):
+                if vif > self.globalVifVals[varName]:
+                    self.globalVifVals[varName] = vif
+            if state['perfectMultiWarnBool']:
+                self.perfectMultiWarnBool = True
+
+        fo = UTILS.openFile(self.outputReportFile, "w")
+        self.resultDict = {}
+        jbCandidates = []
+        for choose in sorted(states[0]['resultDict']):
+            rh = ResultHandler(self.independentVars, choose, None, None,
+                               weightsType = self.weightsType,
+                               minR2 = self.minR2, maxCoef = self.maxCoef,
+                               maxVIF = self.maxVIF, minJB = self.minJB,
+                               minMI = self.minMI, silent = True,
+                               numBest = self.numBest)
+
+            #### Shards Follow One Another in Model Order ####
+            K = choose + 1
+            offset = 0
+            perfectMultiModels = []
+            for state in states:
+                rh.mergeShard(state['resultDict'][choose], offset)
+                perfectMultiModels += state['perfectMultiDict'][choose]
+
+                #### Best Jarque-Bera Candidates, Renumbered ####
+                for jbValue, olsRes in state['bestJB'].ranked():
+                    if olsRes.k == choose:
+                        modelInd = offset + int(olsRes.id.split(":")[-1])
+                        olsRes = COPY.copy(olsRes)
+                        olsRes.id = str(K) + ":" + str(modelInd)
+                        jbCandidates.append( (K, modelInd, jbValue, olsRes) )
+                for olsID in state['jbSurvivorMI']:
+                    numVars, modelInd = [ int(i) for i in olsID.split(":") ]
+                    if numVars == K:
+                        modelInd += offset
+                        rh.survivorMI.append(str(K) + ":" + str(modelInd))
+                offset += state['modelCounts'][choose]
+
+            #### Add Results to Report File ####
+            result2Print = rh.report()
+            UTILS.writeText(fo, result2Print)
+            if len(perfectMultiModels):
+                ARCPY.AddIDMessage("WARNING", 1304)
+                for modelStr in perfectMultiModels:
+                    ARCPY.AddIDMessage("WARNING", 1176, modelStr)
+
+            self.resultDict[choose] = rh
+
+        #### Best Jarque-Bera, Offered in Model Order ####
+        self.bestJB = RU.TopK(self.numBest)
+        jbCandidates.sort(key = OP.itemgetter(0, 1))
+        for K, modelInd, jbValue, olsRes in jbCandidates:
+            self.bestJB.offer(jbValue, olsRes)
+
+        #### Moran's I Run for Models Only a Shard Ranked Is Dropped ####
+        keepMI = set([ olsRes.id for jbValue, olsRes
+                       in self.bestJB.ranked() ])
+        for choose, rh in UTILS.iteritems(self.resultDict):
+            r2IDs = set([ olsRes.id for r2Value, olsRes
+                          in rh.bestR2.ranked() ])
+            for olsID in rh.survivorMI:
+                if olsID not in keepMI and olsID not in r2IDs:
+                    rh.olsResults[olsID].setMoransI(NUM.nan)
+
+        #### Best Jarque-Bera and Moran's I, Ending Summary ####
+        self.createJBReport()
+        self.getMoranStats()
+        self.endSummary()
+
+        UTILS.writeText(fo, self.fullReport)
+        fo.close()
+
 if __name__ == '__main__':
     er = runExploratoryRegression()
 
@@ -0,0 +1,149 @@
+# coding: utf-8
+"""
+Source Name:   RegressionMessages.py
+Description:   Text of the messages and report labels of the regression tools
+               that have no ID in the message catalog, kept in one table so
+               they are translated together.  getMessage and addMessage are
+               used like ARCPY.GetIDMessage and ARCPY.AddIDMessage, with a
+               key in place of the ID.
+"""
+
+################ Imports ####################
+import arcpy as ARCPY
+
+################ Message Table ####################
+messageTable = {
+    #### Exploratory Regression ####
+    "shardIndexRange": "Shard index must be from 0 to the number of shards "
+                       "minus one.",
+    "budgetExclusive": "A search budget can not be combined with shards or a "
+                       "checkpoint file.",
+    "shardsIncomplete": "The shard files are not the complete set of shards "
+                        "of one search.",
+    "shardWritten": "Results of shard {0} of {1} written to {2}.",
+    "checkpointMismatch": "The checkpoint does not match this search; "
+                          "searching from the beginning.",
+    "budgetSearching": "Searching the most promising combinations first...",
+    "budgetReached": "Search budget reached after {0} of {1} combinations.",
+    "budgetCoverage": "Combinations Searched Within Budget: {0} of {1} "
+                      "({2}%)",
+    "modelsSkipped": "Models Skipped (R2 Bound Below Cutoff): {0}",
+
+    #### Leave-One-Out Prediction Error ####
+    "press": "PRESS",
+    "pressDesc": "Predicted Residual Error Sum of Squares",
+    "looRMSE": "LOO RMSE",
+    "looRMSEDesc": "Root Mean Squared Leave-One-Out Residual",
+
+    #### OLS Parameters ####
+    "resampleMethods": "Resampling method must be one of: {0}.",
+    "gwrKernels": "GWR kernel must be one of: {0}.",
+    "gwrOneResponse": "GWR supports one dependent variable, with the data in "
+                      "memory.",
+    "spatialModels": "Spatial model must be one of: {0}.",
+    "spatialOneResponse": "Spatial regression supports one dependent "
+                          "variable, with the data in memory and no GWR.",
+    "modelFileOLS": "Model files hold a single OLS model, without GWR or "
+                    "spatial regression.",
+    "streamOneResponse": "Streaming supports one dependent variable.",
+    "streamResample": "Resampling needs the data in memory and is not "
+                      "available when streaming.",
+    "streamReport": "The report file plots every observation and is not "
+                    "created when streaming.",
+    "multiResponseReport": "The report file is created for one dependent "
+                           "variable; rerun with each to create it.",
+    "streamExcluded": "{0} records with null or non-finite values were "
+                      "excluded from the analysis.",
+
+    #### Resampled Inference ####
+    "resampleAllSingular": "Every resampled model was singular.",
+    "resampleSingular": "{0} of {1} resampled models were singular and were "
+                        "dropped.",
+    "resampleLower": "{0} {1}% Lower",
+    "resampleUpper": "{0} {1}% Upper",
+    "resampleProb": "{0} Probability {1}",
+
+    #### Geographically Weighted Regression ####
+    "gwrTooFew": "GWR needs more than {0} features.",
+    "gwrNeighborLimit": "Local samples are limited to the {0} nearest "
+                        "neighbors.",
+    "gwrSingular": "{0} local regressions were singular.",
+    "gwrReport": "The report file plots the global OLS model and is not "
+                 "created for GWR.",
+    "gwrHeader": "Geographically Weighted Regression",
+    "gwrKernel": "Kernel",
+    "gwrBisquare": "Bisquare, {0}",
+    "gwrAdaptive": "Adaptive",
+    "gwrFixed": "Fixed",
+    "gwrBandNeighbors": "Bandwidth (# of Neighbors)",
+    "gwrBandDistance": "Bandwidth (Distance)",
+    "gwrBandsEvaluated": "Bandwidths Evaluated",
+    "gwrNeighborLimitLab": "Neighbor Limit",
+    "gwrEffectiveParams": "Effective Number of Parameters",
+    "gwrSigma": "Sigma",
+
+    #### Spatial Regression ####
+    "spatialRegression": "Spatial Regression",
+    "spatialError": "Spatial Error Model",
+    "spatialLag": "Spatial Lag Model",
+    "rho": "Rho",
+    "lambda": "Lambda",
+    "spatialHeader": "Maximum Likelihood {0}",
+    "spatialDiagHeader": "{0} Diagnostics",
+    "zStatistic": "z-Statistic",
+    "logDet": "Log-Determinant",
+    "logDetEigen": "Eigenvalues",
+    "logDetMonteCarlo": "Monte Carlo",
+    "paramRange": "{0} Range",
+    "valueRange": "{0} to {1}",
+    "likelihoodEvals": "Likelihood Evaluations",
+    "sigmaSquared": "Sigma-Squared",
+    "logLikelihood": "Log-Likelihood",
+    "olsAIC": "OLS AIC",
+    "lrTest": "Likelihood Ratio Test",
+    "lrProb": "Likelihood Ratio Probability",
+    "residMoran": "Residual Moran's I",
+    "residMoranZ": "Residual Moran's I z-Score",
+    "residMoranProb": "Residual Moran's I Probability",
+    "spatialReport": "The report file plots the OLS model and is not "
+                     "created for spatial regression.",
+
+    #### Scoring New Data ####
+    "confidenceRange": "Confidence level must be between 0 and 100.",
+    "scoreCSV": "CSV input is scored to a CSV output.",
+    "scoreMissingVar": "Independent variable {0} of the model is not in "
+                       "{1}.",
+    "scoredRows": "Scored {0} rows with the model of {1} on {2}.",
+    "scoreNullRows": "{0} rows with null or non-numeric values have null "
+                     "predictions.",
+}
+
+############### Methods ###############
+
+def getMessage(key, *args):
+    """Returns the text of a message, formatted with args.
+
+    INPUTS:
+    key (str): key of the message in messageTable
+    *args: values of the {0}, {1}, ... fields of the message
+    """
+
+    return messageTable[key].format(*args)
+
+def addMessage(severity, key, *args):
+    """Adds a message to the tool output.
+
+    INPUTS:
+    severity (str): ERROR, WARNING or INFORMATIVE
+    key (str): key of the message in messageTable
+    *args: values of the {0}, {1}, ... fields of the message
+    """
+
+    text = getMessage(key, *args)
+    severity = severity.upper()
+    if severity == "ERROR":
+        ARCPY.AddError(text)
+    elif severity == "WARNING":
+        ARCPY.AddWarning(text)
+    else:
+        ARCPY.AddMessage(text)
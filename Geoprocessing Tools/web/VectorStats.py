@@ -0,0 +1,359 @@
+# coding: utf-8
+"""
+Source Name:   VectorStats.py
+Description:   Array versions of the tail probabilities in Stats, built on
+               the regularized incomplete beta and gamma functions.
+"""
+
+################ Imports ####################
+import math as MATH
+import numpy as NUM
+
+################ Constants ####################
+maxIterations = 500
+epsilon = 1.0e-16
+tiny = 1.0e-300
+
+############## Helper Functions ##############
+
+def gammaLn(values):
+    """Returns the natural log of the gamma function for an array.  The
+    parameters of a batch are usually a handful of distinct degrees of
+    freedom, so math.lgamma is only called for the unique values.
+
+    INPUTS:
+    values (array): positive values
+    """
+
+    values = NUM.asarray(values, dtype = float)
+    uniqueVals, inverse = NUM.unique(values, return_inverse = True)
+    lnVals = NUM.array([ MATH.lgamma(v) for v in uniqueVals ], dtype = float)
+    return lnVals[inverse].reshape(values.shape)
+
+def betaLn(a, b):
+    """Returns the natural log of the beta function.  When one argument is
+    large the gamma ratio is taken from Stirling's series so that the
+    three large log-gamma terms do not cancel.
+
+    INPUTS:
+    a (array): first shape parameter (> 0)
+    b (array): second shape parameter (> 0)
+    """
+
+    lo = NUM.minimum(a, b)
+    hi = NUM.maximum(a, b)
+    result = NUM.empty(lo.shape, dtype = float)
+    large = hi >= 10.0
+    if (~large).any():
+        l, h = lo[~large], hi[~large]
+        result[~large] = gammaLn(l) + gammaLn(h) - gammaLn(l + h)
+    if large.any():
+        l, h = lo[large], hi[large]
+        lnRatio = ((h - 0.5) * NUM.log1p(l / h) + l * NUM.log(l + h) - l +
+                   stirlingCorrection(l + h) - stirlingCorrection(h))
+        result[large] = gammaLn(l) - lnRatio
+    return result
+
+def stirlingCorrection(x):
+    """Returns ln(gamma(x)) - ((x - 0.5) ln(x) - x + 0.5 ln(2 pi)) for
+    x >= 10."""
+
+    x2 = 1.0 / (x * x)
+    return (1.0 / x) * (1.0 / 12. - x2 * (1.0 / 360. - x2 * (1.0 / 1260. -
+            x2 * (1.0 / 1680. - x2 / 1188.))))
+
+def iterationLimit(shape):
+    """Returns the # of iterations allowed the series and continued
+    fractions.  Near the mean they need about the square root of the
+    largest shape parameter, so large degrees of freedom get more.
+
+    INPUTS:
+    shape (array): shape parameters
+    """
+
+    if not shape.size:
+        return maxIterations
+    return maxIterations + int(10.0 * MATH.sqrt(max(shape.max(), 0.0)))
+
+def betaContinuedFraction(a, b, x):
+    """Evaluates the continued fraction for the incomplete beta function
+    by the modified Lentz method.  Arrays must share one shape."""
+
+    qab = a + b
+    qap = a + 1.0
+    qam = a - 1.0
+    c = NUM.ones_like(x)
+    d = 1.0 - qab * x / qap
+    d[NUM.abs(d) < tiny] = tiny
+    d = 1.0 / d
+    h = d.copy()
+    active = NUM.ones(x.shape, dtype = bool)
+    for m in range(1, iterationLimit(qab) + 1):
+        m2 = 2.0 * m
+
+        #### Even Step ####
+        aa = m * (b - m) * x / ((qam + m2) * (a + m2))
+        d = 1.0 + aa * d
+        d[NUM.abs(d) < tiny] = tiny
+        c = 1.0 + aa / c
+        c[NUM.abs(c) < tiny] = tiny
+        d = 1.0 / d
+        h = NUM.where(active, h * d * c, h)
+
+        #### Odd Step ####
+        aa = -(a + m) * (qab + m) * x / ((a + m2) * (qap + m2))
+        d = 1.0 + aa * d
+        d[NUM.abs(d) < tiny] = tiny
+        c = 1.0 + aa / c
+        c[NUM.abs(c) < tiny] = tiny
+        d = 1.0 / d
+        delta = d * c
+        h = NUM.where(active, h * delta, h)
+
+        #### Stop Once Every Element Has Converged ####
+        active &= NUM.abs(delta - 1.0) > epsilon
+        if not active.any():
+            break
+    return h
+
+def betaInc(a, b, x):
+    """Returns the regularized incomplete beta function I_x(a, b).
+
+    INPUTS:
+    a (array): first shape parameter (> 0)
+    b (array): second shape parameter (> 0)
+    x (array): upper limit of integration, 0 <= x <= 1
+    """
+
+    a, b, x = NUM.broadcast_arrays(NUM.asarray(a, dtype = float),
+                                   NUM.asarray(b, dtype = float),
+                                   NUM.asarray(x, dtype = float))
+    result = NUM.empty(x.shape, dtype = float)
+    result.fill(NUM.nan)
+    result[x <= 0.0] = 0.0
+    result[x >= 1.0] = 1.0
+    inside = (x > 0.0) & (x < 1.0)
+    if inside.any():
+        ai, bi, xi = a[inside], b[inside], x[inside]
+        lnFront = (ai * NUM.log(xi) + bi * NUM.log1p(-xi) -
+                   betaLn(ai, bi))
+        front = NUM.exp(lnFront)
+
+        #### Fraction Converges Rapidly on the Near Side of the Mean ####
+        swap = xi >= (ai + 1.0) / (ai + bi + 2.0)
+        aS = NUM.where(swap, bi, ai)
+        bS = NUM.where(swap, ai, bi)
+        xS = NUM.where(swap, 1.0 - xi, xi)
+        frac = front * betaContinuedFraction(aS, bS, xS) / aS
+        result[inside] = NUM.where(swap, 1.0 - frac, frac)
+    return result
+
+def gammaInc(a, x, upper = False):
+    """Returns the regularized incomplete gamma function P(a, x), or
+    Q(a, x) = 1 - P(a, x) when upper is True.
+
+    INPUTS:
+    a (array): shape parameter (> 0)
+    x (array): upper limit of integration (>= 0)
+    upper {bool, False}: return the upper tail Q(a, x)?
+    """
+
+    a, x = NUM.broadcast_arrays(NUM.asarray(a, dtype = float),
+                                NUM.asarray(x, dtype = float))
+    lower = NUM.zeros(x.shape, dtype = float)
+    uppr = NUM.ones(x.shape, dtype = float)
+    positive = x > 0.0
+    if positive.any():
+        ap, xp = a[positive], x[positive]
+        lnFront = -xp + ap * NUM.log(xp) - gammaLn(ap)
+        useSeries = xp < ap + 1.0
+        lowerP = NUM.empty(xp.shape, dtype = float)
+        upperP = NUM.empty(xp.shape, dtype = float)
+
+        #### Series Representation ####
+        if useSeries.any():
+            aa, xx = ap[useSeries], xp[useSeries]
+            term = 1.0 / aa
+            total = term.copy()
+            ap1 = aa.copy()
+            active = NUM.ones(aa.shape, dtype = bool)
+            for i in range(iterationLimit(aa)):
+                ap1 += 1.0
+                term = NUM.where(active, term * xx / ap1, 0.0)
+                total += term
+                active &= NUM.abs(term) > NUM.abs(total) * epsilon
+                if not active.any():
+                    break
+            p = total * NUM.exp(lnFront[useSeries])
+            lowerP[useSeries] = p
+            upperP[useSeries] = 1.0 - p
+
+        #### Continued Fraction Representation ####
+        useFrac = ~useSeries
+        if useFrac.any():
+            aa, xx = ap[useFrac], xp[useFrac]
+            b = xx + 1.0 - aa
+            c = NUM.ones_like(xx) / tiny
+            d = 1.0 / b
+            h = d.copy()
+            active = NUM.ones(aa.shape, dtype = bool)
+            for i in range(1, iterationLimit(aa) + 1):
+                an = -i * (i - aa)
+                b = b + 2.0
+                d = an * d + b
+                d[NUM.abs(d) < tiny] = tiny
+                c = b + an / c
+                c[NUM.abs(c) < tiny] = tiny
+                d = 1.0 / d
+                delta = d * c
+                h = NUM.where(active, h * delta, h)
+                active &= NUM.abs(delta - 1.0) > epsilon
+                if not active.any():
+                    break
+            q = NUM.exp(lnFront[useFrac]) * h
+            upperP[useFrac] = q
+            lowerP[useFrac] = 1.0 - q
+
+        lower[positive] = lowerP
+        uppr[positive] = upperP
+
+    #### Undefined Where x is NaN ####
+    undefined = NUM.isnan(x)
+    lower[undefined] = NUM.nan
+    uppr[undefined] = NUM.nan
+
+    if upper:
+        return uppr
+    else:
+        return lower
+
+################ Distributions ##################
+
+def tProb(t, dof, type = 0):
+    """Calculates the area under the curve of the Student-t distribution.
+
+    INPUTS:
+    t (array): t-statistics
+    dof (array): degrees of freedom
+    type {int, 0}:
+        0: area under the curve to the left of t
+        1: area under the curve to the right of t
+        2: two-sided (area greater than abs(t) in both tails)
+    """
+
+    t = NUM.asarray(t, dtype = float)
+    dof = NUM.asarray(dof, dtype = float)
+    t2 = t * t
+
+    #### Complement Only Where betaInc Would Take 1 - I Itself ####
+    #### Small Tails Then Come Straight From the Continued Fraction ####
+    small = t2 * (dof + 2.0) < 3.0 * dof
+    x = NUM.where(small, t2, dof) / (dof + t2)
+    tail = NUM.where(small, 0.5 - 0.5 * betaInc(0.5, dof / 2.0, x),
+                     0.5 * betaInc(dof / 2.0, 0.5, x))
+    if type == 2:
+        return 2.0 * tail
+    elif type == 1:
+        return NUM.where(t > 0.0, tail, 1.0 - tail)
+    else:
+        return NUM.where(t > 0.0, 1.0 - tail, tail)
+
+def chiProb(chi, dof, type = 0):
+    """Calculates the area under the curve of the chi-square distribution.
+
+    INPUTS:
+    chi (array): chi-square statistics
+    dof (array): degrees of freedom
+    type {int, 0}:
+        0: area under the curve to the left of chi
+        1: area under the curve to the right of chi
+    """
+
+    chi = NUM.asarray(chi, dtype = float)
+    dof = NUM.asarray(dof, dtype = float)
+    return gammaInc(dof / 2.0, chi / 2.0, upper = (type == 1))
+
+def fProb(f, dof1, dof2, type = 0):
+    """Calculates the area under the curve of the F distribution.
+
+    INPUTS:
+    f (array): F-statistics
+    dof1 (array): numerator degrees of freedom
+    dof2 (array): denominator degrees of freedom
+    type {int, 0}:
+        0: area under the curve to the left of f
+        1: area under the curve to the right of f
+    """
+
+    f = NUM.asarray(f, dtype = float)
+    dof1 = NUM.asarray(dof1, dtype = float)
+    dof2 = NUM.asarray(dof2, dtype = float)
+    f = NUM.where(f > 0.0, f, 0.0) + NUM.where(NUM.isnan(f), NUM.nan, 0.0)
+
+    #### Each Tail From Its Own Incomplete Beta, No 1 - x Round Off ####
+    if type == 1:
+        x = dof2 / (dof2 + dof1 * f)
+        return betaInc(dof2 / 2.0, dof1 / 2.0, x)
+    else:
+        x = dof1 * f / (dof1 * f + dof2)
+        return betaInc(dof1 / 2.0, dof2 / 2.0, x)
+
+def zProb(z, type = 0):
+    """Calculates the area under the curve of the standard normal
+    distribution.
+
+    INPUTS:
+    z (array): z-scores
+    type {int, 0}:
+        0: area under the curve to the left of z
+        1: area under the curve to the right of z
+        2: two-sided (area greater than abs(z) in both tails)
+    """
+
+    z = NUM.asarray(z, dtype = float)
+    if type == 2:
+        values = NUM.abs(z)
+    elif type == 1:
+        values = z
+    else:
+        values = -z
+    flat = values.flatten() / MATH.sqrt(2.0)
+    tail = NUM.array([ MATH.erfc(v) if v == v else NUM.nan for v in flat ],
+                     dtype = float).reshape(z.shape) * 0.5
+    if type == 2:
+        return 2.0 * tail
+    else:
+        return tail
+
+def tInverse(prob, dof):
+    """Returns the t-statistics with area prob under the curve of the
+    Student-t distribution to their left, by bisection on tProb.
+
+    INPUTS:
+    prob (array): areas to the left, 0 < prob < 1
+    dof (array): degrees of freedom
+    """
+
+    prob, dof = NUM.broadcast_arrays(NUM.asarray(prob, dtype = float),
+                                     NUM.asarray(dof, dtype = float))
+
+    #### Widen the Bracket Until It Holds Every Quantile ####
+    hi = NUM.ones(prob.shape, dtype = float)
+    outside = NUM.ones(prob.shape, dtype = bool)
+    for i in range(64):
+        outside &= tProb(hi, dof) < NUM.maximum(prob, 1.0 - prob)
+        if not outside.any():
+            break
+        hi[outside] *= 2.0
+    lo = -hi
+
+    #### Halve It Until No Midpoint Lies Between the Bounds ####
+    for i in range(maxIterations):
+        mid = (lo + hi) / 2.0
+        if not NUM.any((mid > lo) & (mid < hi)):
+            break
+        left = tProb(mid, dof) < prob
+        lo = NUM.where(left, mid, lo)
+        hi = NUM.where(left, hi, mid)
+    return NUM.where(NUM.isnan(prob) | NUM.isnan(dof), NUM.nan,
+                     (lo + hi) / 2.0)